@@ -0,0 +1,349 @@
+"""
+TechResona Backup Manager
+Incremental, resumable backup and restore of site collections
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from bson import decode_file_iter, json_util
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+mongo_url = os.environ['MONGO_URL']
+db_name = os.environ.get('DB_NAME', 'test_database')
+client = AsyncIOMotorClient(mongo_url)
+db = client[db_name]
+
+DEFAULT_BACKUP_DIR = ROOT_DIR.parent / "backups"
+MANIFEST_NAME = "manifest.json"
+RESTORE_STATE_NAME = "restore_state.json"
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 4
+# Timestamps are set by the app before the write commits, so a write stamped
+# just before a checkpoint can land after that run's export. Incremental runs
+# re-read this far behind the checkpoint; restores upsert, so re-exports are harmless.
+CHECKPOINT_OVERLAP = timedelta(seconds=int(os.environ.get("BACKUP_OVERLAP_SECONDS", "300")))
+
+# Field used to find documents changed since the last checkpoint. Timestamps
+# are stored as ISO-8601 strings, which sort correctly as strings. Collections
+# not listed here are small and are always exported in full.
+CHANGE_FIELDS = {
+    "blogs": "updated_at",
+    "seo_settings": "updated_at",
+    "robots_txt": "updated_at",
+    "site_pointers": "updated_at",
+    # Set on submit and on every status change (earlier documents only have
+    # submitted_at and are captured by full runs)
+    "contact_submissions": "updated_at",
+    "keywords": "tracked_at",
+    "logos": "uploaded_at",
+    "admins": "created_at",
+    # Append-only: stored revisions never change
+    "blog_revisions": "created_at",
+    "slow_queries": "last_seen",
+}
+# Transient data that must not be restored as-is: the cache invalidation bus
+# is a capped collection the server creates (and tails) itself
+SKIPPED_COLLECTIONS = {"cache_invalidations"}
+
+RAW_CODEC = CodecOptions(document_class=RawBSONDocument)
+JSON_OPTIONS = json_util.CANONICAL_JSON_OPTIONS
+
+def log(message=""):
+    """Progress output goes to stderr so stdout stays machine-readable"""
+    print(message, file=sys.stderr)
+
+# ==================== MANIFEST ====================
+
+def load_json(path, default):
+    if not path.exists():
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+def write_json_atomic(path, data):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def sha256_file(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# ==================== BACKUP ====================
+
+def overlap_start(since):
+    """The checkpoint moved back by CHECKPOINT_OVERLAP, in the same ISO format"""
+    try:
+        return (datetime.fromisoformat(since) - CHECKPOINT_OVERLAP).isoformat()
+    except ValueError:
+        return since
+
+def _encode(doc, fmt):
+    if fmt == "bson":
+        return doc.raw
+    return (json_util.dumps(doc, json_options=JSON_OPTIONS) + "\n").encode()
+
+async def export_collection(name, run_dir, since=None, fmt="bson", batch_size=DEFAULT_BATCH_SIZE):
+    """Stream one collection into a gzip file, returning its manifest entry.
+
+    The file is written under a temporary name and renamed once complete, so
+    an interrupted run never leaves a partial file behind.
+    """
+    field = CHANGE_FIELDS.get(name)
+    query = {}
+    if field and since:
+        # Documents stamped within the overlap before the checkpoint are
+        # re-exported, and restore upserts by _id so duplicates are harmless.
+        query = {field: {"$gte": overlap_start(since)}}
+
+    # BSON files are written straight from the raw bytes; NDJSON needs decoding anyway
+    collection = db.get_collection(name, codec_options=RAW_CODEC) if fmt == "bson" else db[name]
+    cursor = collection.find(query, batch_size=batch_size)
+    if field:
+        cursor = cursor.sort(field, 1)
+
+    suffix = "bson.gz" if fmt == "bson" else "ndjson.gz"
+    final_path = run_dir / f"{name}.{suffix}"
+    tmp_path = final_path.with_suffix(final_path.suffix + ".tmp")
+
+    count = 0
+    checkpoint = since
+    gz = await asyncio.to_thread(gzip.open, tmp_path, "wb")
+    try:
+        chunk = []
+        async for doc in cursor:
+            chunk.append(_encode(doc, fmt))
+            count += 1
+            if field:
+                value = doc.get(field)
+                if isinstance(value, str) and (checkpoint is None or value > checkpoint):
+                    checkpoint = value
+            if len(chunk) >= batch_size:
+                await asyncio.to_thread(gz.write, b"".join(chunk))
+                chunk = []
+        if chunk:
+            await asyncio.to_thread(gz.write, b"".join(chunk))
+    finally:
+        await asyncio.to_thread(gz.close)
+
+    os.replace(tmp_path, final_path)
+    checksum = await asyncio.to_thread(sha256_file, final_path)
+    log(f"✓ {name}: {count} documents -> {final_path.name}")
+    return {
+        "file": final_path.name,
+        "format": fmt,
+        "count": count,
+        "sha256": checksum,
+        "field": field,
+        "since": since,
+        "checkpoint": checkpoint,
+    }
+
+async def run_backup(backup_dir, full=False, fmt="bson", workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE):
+    """Export every collection, only changes since the last checkpoint unless `full`.
+
+    Checkpoints advance per collection only after its file has been written,
+    so re-running after a failure resumes from the last completed export.
+    Deletions are not captured by incremental runs; take a periodic `--full`.
+    """
+    backup_dir = Path(backup_dir)
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = backup_dir / MANIFEST_NAME
+    manifest = load_json(manifest_path, {"database": db_name, "checkpoints": {}, "runs": []})
+
+    names = sorted(
+        n for n in await db.list_collection_names()
+        if not n.startswith("system.") and n not in SKIPPED_COLLECTIONS
+    )
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    # Increments are only restorable on top of a complete full run, so keep
+    # taking full runs until one succeeds
+    has_full = any(r["mode"] == "full" and r.get("complete") for r in manifest["runs"])
+    mode = "full" if full or not has_full else "incremental"
+    run_dir = backup_dir / run_id
+    run_dir.mkdir()
+    run = {"id": run_id, "mode": mode, "started_at": datetime.now(timezone.utc).isoformat(), "collections": {}}
+
+    semaphore = asyncio.Semaphore(max(1, workers))
+
+    async def export(name):
+        since = None if mode == "full" else manifest["checkpoints"].get(name)
+        async with semaphore:
+            entry = await export_collection(name, run_dir, since, fmt, batch_size)
+        run["collections"][name] = entry
+        if entry["checkpoint"] is not None:
+            manifest["checkpoints"][name] = entry["checkpoint"]
+
+    results = await asyncio.gather(*(export(n) for n in names), return_exceptions=True)
+    errors = {n: str(r) for n, r in zip(names, results) if isinstance(r, Exception)}
+
+    run["finished_at"] = datetime.now(timezone.utc).isoformat()
+    run["complete"] = not errors
+    if errors:
+        run["errors"] = errors
+    manifest["runs"].append(run)
+    write_json_atomic(manifest_path, manifest)
+    return run
+
+# ==================== RESTORE ====================
+
+def _iter_documents(path, fmt):
+    with gzip.open(path, "rb") as f:
+        if fmt == "bson":
+            yield from decode_file_iter(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json_util.loads(line, json_options=JSON_OPTIONS)
+
+async def restore_file(target_db, name, path, entry, batch_size):
+    """Upsert every document of a backup file by _id, in unordered batches"""
+    actual = await asyncio.to_thread(sha256_file, path)
+    if actual != entry["sha256"]:
+        raise ValueError(f"Checksum mismatch for {path}: expected {entry['sha256']}, got {actual}")
+
+    documents = _iter_documents(path, entry["format"])
+    restored = 0
+    try:
+        while True:
+            # Decompress and decode off the event loop, one batch at a time
+            batch = await asyncio.to_thread(list, itertools.islice(documents, batch_size))
+            if not batch:
+                break
+            ops = [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in batch]
+            await target_db[name].bulk_write(ops, ordered=False)
+            restored += len(ops)
+    finally:
+        documents.close()
+    return restored
+
+async def run_restore(backup_dir, target_db_name=None, until=None, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE, collections=None):
+    """Replay the last full run and every later incremental run, oldest first.
+
+    Files for different collections are restored in parallel; runs are applied
+    in order so newer versions of a document win. Completed files are recorded
+    in a state file, so an interrupted restore picks up where it stopped.
+    """
+    backup_dir = Path(backup_dir)
+    manifest = load_json(backup_dir / MANIFEST_NAME, None)
+    if manifest is None:
+        raise FileNotFoundError(f"No {MANIFEST_NAME} in {backup_dir}")
+
+    runs = manifest["runs"]
+    if until:
+        runs = [r for r in runs if r["id"] <= until]
+    full_indexes = [i for i, r in enumerate(runs) if r["mode"] == "full" and r.get("complete")]
+    if not full_indexes:
+        raise ValueError("No complete full backup to restore from")
+    # Later runs are replayed even if incomplete: their manifest only lists
+    # collections whose files were fully written and checkpointed.
+    runs = runs[full_indexes[-1]:]
+
+    target_db = client[target_db_name or manifest["database"]]
+    state_path = backup_dir / RESTORE_STATE_NAME
+    # Progress only carries over to a restore with the same parameters; an
+    # interrupted partial restore must not mark files done for a full one
+    params = {"database": target_db.name, "until": until, "collections": sorted(collections) if collections else None}
+    state = load_json(state_path, None)
+    if state is None or state.get("params") != params:
+        state = {"params": params, "done": []}
+    done = set(state["done"])
+
+    semaphore = asyncio.Semaphore(max(1, workers))
+    summary = {}
+
+    async def restore(run, name, entry):
+        key = f"{run['id']}/{entry['file']}"
+        if key in done:
+            log(f"⊘ Already restored: {key}")
+            return
+        async with semaphore:
+            count = await restore_file(target_db, name, backup_dir / run["id"] / entry["file"], entry, batch_size)
+        done.add(key)
+        state["done"] = sorted(done)
+        write_json_atomic(state_path, state)
+        summary[name] = summary.get(name, 0) + count
+        log(f"✓ {key}: {count} documents")
+
+    for run in runs:
+        items = [
+            (name, entry) for name, entry in run["collections"].items()
+            if (collections is None or name in collections) and name not in SKIPPED_COLLECTIONS
+        ]
+        # Let every file of the run finish (and be recorded) before failing
+        results = await asyncio.gather(*(restore(run, name, entry) for name, entry in items), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+    state_path.unlink(missing_ok=True)
+    return {"database": target_db.name, "runs": [r["id"] for r in runs], "restored": summary}
+
+# ==================== CLI ====================
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="TechResona backup manager. Prints a JSON summary to stdout; progress goes to stderr."
+    )
+    parser.add_argument("--dir", default=str(DEFAULT_BACKUP_DIR), help="Backup directory")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Collections processed in parallel")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Documents per write batch")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backup = subparsers.add_parser("backup", help="Export collections (incremental after the first run)")
+    backup.add_argument("--full", action="store_true", help="Export everything and reset checkpoints")
+    backup.add_argument("--format", choices=["bson", "ndjson"], default="bson")
+
+    restore = subparsers.add_parser("restore", help="Restore the latest full backup plus increments")
+    restore.add_argument("--db", help="Target database (defaults to the backed-up database)")
+    restore.add_argument("--until", help="Ignore runs newer than this run id")
+    restore.add_argument("--collection", action="append", help="Restore only this collection (repeatable)")
+
+    subparsers.add_parser("list", help="Show backup runs and checkpoints")
+    return parser
+
+async def run_command(args):
+    """Print the JSON summary, including on failure; returns the exit code"""
+    errors = None
+    try:
+        if args.command == "backup":
+            result = await run_backup(args.dir, args.full, args.format, args.workers, args.batch_size)
+            errors = result.get("errors")
+        elif args.command == "restore":
+            result = await run_restore(args.dir, args.db, args.until, args.workers, args.batch_size, args.collection)
+        else:
+            result = load_json(Path(args.dir) / MANIFEST_NAME, {"checkpoints": {}, "runs": []})
+    except Exception as e:
+        log(f"✗ {args.command} failed: {e}")
+        result, errors = None, {"error": str(e), "type": type(e).__name__}
+    finally:
+        client.close()
+    summary = {"command": args.command, "ok": not errors, "result": result}
+    if errors:
+        summary["errors"] = errors
+    print(json.dumps(summary, indent=2, default=str))
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run_command(build_parser().parse_args())))
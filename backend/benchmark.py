@@ -0,0 +1,395 @@
+"""
+TechResona API Benchmarks
+Drives the FastAPI app in-process through httpx's ASGI transport, against
+mongomock-motor or a local mongod loaded from the bundled fixtures, and
+reports throughput and latency percentiles for the hot endpoints.
+
+Usage:
+    python benchmark.py                                  # mongomock, default scenarios
+    python benchmark.py --concurrency 1,10,50 --copies 1,20
+    python benchmark.py --mongo local --mongo-url mongodb://localhost:27017
+    python benchmark.py --scenario get_blogs --scenario sitemap_xml --save-baseline
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+REPORTS_DIR = ROOT_DIR.parent / "test_reports"
+BASELINE_PATH = REPORTS_DIR / "benchmark_baseline.json"
+
+DEFAULT_REQUESTS = 200
+DEFAULT_SLOW_REQUESTS = 20
+DEFAULT_WARMUP = 10
+DEFAULT_PROFILE_REQUESTS = 20
+DEFAULT_BENCH_DB = "techresona_bench"
+
+BENCH_ADMIN_EMAIL = "bench@techresona.com"
+BENCH_ADMIN_PASSWORD = "bench-password"
+
+# Bumped when scenarios change what they measure; perf_gate.py refuses older baselines
+REPORT_VERSION = 2
+# The ASGI transport has a single client address, so each request can set its own here
+CLIENT_HEADER = "x-benchmark-client"
+_contacts = itertools.count(1)
+
+def contact_payload():
+    """A submission from a new sender and address with unrelated wording, so
+    spam screening runs its full lookups without flagging the request"""
+    n = next(_contacts)
+    words = " ".join(uuid.uuid4().hex[i:i + 4] + uuid.uuid4().hex[i:i + 4] for i in range(0, 32, 4))
+    return {
+        "name": "Benchmark Visitor",
+        "email": f"visitor{n}@example.com",
+        "company": "Example Co",
+        "phone": "+1 555 0100",
+        "message": f"Benchmark {words}",
+    }, {CLIENT_HEADER: f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255 or 1}"}
+
+# name -> (method, path, json body or a function returning a fresh (body,
+# headers) per request); "{slug}" is filled with a published blog.
+# Slow scenarios (bcrypt on every login) run DEFAULT_SLOW_REQUESTS by default.
+SCENARIOS = {
+    "get_blogs": ("GET", "/api/blogs", None),
+    "get_blog": ("GET", "/api/blogs/{slug}", None),
+    "sitemap_xml": ("GET", "/sitemap.xml", None),
+    "robots_txt": ("GET", "/robots.txt", None),
+    "login": ("POST", "/api/auth/login", {"email": BENCH_ADMIN_EMAIL, "password": BENCH_ADMIN_PASSWORD}),
+    "contact_submit": ("POST", "/api/contact/submit", contact_payload),
+}
+SLOW_SCENARIOS = {"login"}
+
+# Motor methods that each cost at least one round-trip to the server
+MONGO_OPERATIONS = {
+    "find", "find_one", "find_one_and_update", "find_one_and_replace", "find_one_and_delete",
+    "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "bulk_write", "aggregate", "count_documents",
+    "estimated_document_count", "distinct", "create_index", "create_indexes", "drop",
+}
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+async def send(http, method, path, body):
+    headers = None
+    if callable(body):
+        body, headers = body()
+    return await http.request(method, path, json=body, headers=headers)
+
+def client_from_header(app):
+    """ASGI wrapper taking the client address from CLIENT_HEADER when present"""
+    header = CLIENT_HEADER.encode()
+
+    async def wrapped(scope, receive, send):
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name == header:
+                    scope = {**scope, "client": (value.decode(), 0)}
+                    break
+        await app(scope, receive, send)
+
+    return wrapped
+
+def int_list(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+def summarize(latencies, elapsed, errors):
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "req_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": ms(statistics.fmean(ordered)) if ordered else 0.0,
+        "p50_ms": ms(percentile(ordered, 50)),
+        "p95_ms": ms(percentile(ordered, 95)),
+        "p99_ms": ms(percentile(ordered, 99)),
+        "max_ms": ms(ordered[-1]) if ordered else 0.0,
+    }
+
+class CallCounter:
+    def __init__(self):
+        self.calls = 0
+
+class CountedCollection:
+    """Proxy counting the database operations a handler issues, so Mongo calls
+    per request can be tracked with mongomock as well as a real mongod"""
+
+    def __init__(self, collection, counter):
+        self._collection = collection
+        self._counter = counter
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name not in MONGO_OPERATIONS:
+            return attr
+
+        def counted(*args, **kwargs):
+            self._counter.calls += 1
+            return attr(*args, **kwargs)
+
+        return counted
+
+class CountedDatabase:
+    def __init__(self, database, counter):
+        self._database = database
+        self._counter = counter
+
+    def __getitem__(self, name):
+        return CountedCollection(self._database[name], self._counter)
+
+    def get_collection(self, name, **options):
+        return CountedCollection(self._database.get_collection(name, **options), self._counter)
+
+    def __getattr__(self, name):
+        if name.startswith("_") or name in ("client", "name", "command", "create_collection",
+                                             "list_collection_names"):
+            return getattr(self._database, name)
+        return self[name]
+
+def configure_environment(args):
+    """Point server.py at the benchmark database before it is imported"""
+    os.environ["DB_NAME"] = args.db
+    if args.mongo == "local":
+        os.environ["MONGO_URL"] = args.mongo_url
+    else:
+        # Never dialled; the Motor client is swapped for mongomock below
+        os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    if not args.live_notifications:
+        # Refused instantly instead of waiting on a real SMTP server or Slack
+        os.environ["SMTP_HOST"] = "127.0.0.1"
+        os.environ["SMTP_PORT"] = "1"
+        os.environ["SLACK_WEBHOOK_URL"] = ""
+
+def prepare_server(args, snapshot_dir, counter):
+    sys.path.insert(0, str(ROOT_DIR))
+    import server
+
+    if not args.verbose:
+        # Per-request INFO/ERROR lines (httpx, refused SMTP) would dominate the timings
+        logging.getLogger().setLevel(logging.CRITICAL)
+
+    if args.mongo == "mock":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("mongomock-motor is required for --mongo mock (pip install mongomock-motor)")
+        server.client = AsyncMongoMockClient()
+        server.db = server.client[args.db]
+        # mongomock has no tailable cursors; a single process needs no bus anyway
+        server.cache_bus.mode = "off"
+    else:
+        server.connect_db()
+    server.db = CountedDatabase(server.db, counter)
+    server.cache_bus.db = server.db
+    # A private snapshot file, so a running server's snapshot is never touched
+    server.site_snapshot.path = Path(snapshot_dir) / f"techresona-{args.db}.snapshot"
+    if args.cold:
+        server.cache.ttl = 0
+    return server
+
+async def load_data(server, copies, cold):
+    from fixture_loader import load_fixtures
+
+    counts = await load_fixtures(server.db, copies=copies)
+    await server.db.admins.insert_one({
+        "id": "benchmark-admin",
+        "email": BENCH_ADMIN_EMAIL,
+        "password_hash": server.get_password_hash(BENCH_ADMIN_PASSWORD),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    })
+    server.cache.clear()
+    if cold:
+        server.site_snapshot.stale = True
+    elif server.site_snapshot.is_leader:
+        await server.site_snapshot.rebuild()
+
+    blog = await server.db.blogs.find_one({"published": True}, {"_id": 0, "slug": 1})
+    return counts, blog["slug"] if blog else "missing"
+
+async def run_scenario(http, name, slug, requests, concurrency, warmup):
+    method, path, body = SCENARIOS[name]
+    path = path.format(slug=slug)
+
+    async def call():
+        response = await send(http, method, path, body)
+        return response.status_code < 400
+
+    for _ in range(warmup):
+        await call()
+
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            ok = await call()
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+async def profile_scenario(http, name, slug, requests, counter):
+    """Sequential pass measuring Mongo calls and peak traced allocations per
+    request; kept apart from the timed runs because tracemalloc is slow"""
+    method, path, body = SCENARIOS[name]
+    path = path.format(slug=slug)
+    if requests <= 0:
+        return {"mongo_calls_per_request": None, "alloc_kib_per_request": None}
+
+    calls_before = counter.calls
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(requests):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await send(http, method, path, body)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return {
+        "mongo_calls_per_request": round((counter.calls - calls_before) / requests, 2),
+        "alloc_kib_per_request": round(statistics.fmean(peaks) / 1024, 1),
+    }
+
+async def run_benchmarks(args):
+    import httpx
+
+    snapshot_dir = tempfile.mkdtemp(prefix="techresona-bench-")
+    counter = CallCounter()
+    server = prepare_server(args, snapshot_dir, counter)
+    results = []
+    try:
+        # ASGITransport does not send lifespan events, so run the lifespan here
+        transport = httpx.ASGITransport(app=client_from_header(server.app))
+        async with server.app.router.lifespan_context(server.app), \
+                httpx.AsyncClient(transport=transport, base_url="http://benchmark") as http:
+            for copies in args.copies:
+                counts, slug = await load_data(server, copies, args.cold)
+                log(f"Loaded {sum(counts.values())} documents (copies={copies})")
+                for name in args.scenario:
+                    requests = args.requests
+                    if name in SLOW_SCENARIOS and not args.requests_explicit:
+                        requests = DEFAULT_SLOW_REQUESTS
+                    rows = []
+                    for concurrency in args.concurrency:
+                        log(f"  {name} x{requests} @ concurrency {concurrency}")
+                        stats = await run_scenario(http, name, slug, requests, concurrency, args.warmup)
+                        rows.append({"scenario": name, "copies": copies, "concurrency": concurrency, **stats})
+                    profile = await profile_scenario(
+                        http, name, slug, min(args.profile_requests, requests), counter
+                    )
+                    results.extend({**row, **profile} for row in rows)
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+    return {
+        "version": REPORT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mongo": "mongomock" if args.mongo == "mock" else "mongodb",
+        "settings": {name: getattr(args, name) for name in RERUN_SETTINGS},
+        "results": results,
+    }
+
+def format_table(results):
+    header = (f"{'scenario':<16}{'copies':>7}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+              f"{'p99 ms':>10}{'mongo/req':>11}{'KiB/req':>9}{'errors':>8}")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['scenario']:<16}{r['copies']:>7}{r['concurrency']:>6}{r['req_per_sec']:>10}"
+            f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+            f"{str(r.get('mongo_calls_per_request')):>11}{str(r.get('alloc_kib_per_request')):>9}{r['errors']:>8}"
+        )
+    return "\n".join(lines)
+
+def write_report(report, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n")
+    return path
+
+# Arguments recorded in each report so perf_gate.py can repeat the same run
+RERUN_SETTINGS = (
+    "scenario", "concurrency", "copies", "requests", "requests_explicit",
+    "warmup", "profile_requests", "mongo", "cold",
+)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark TechResona API endpoints in-process")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 10, 50],
+                        help="Comma-separated concurrency levels (default: 1,10,50)")
+    parser.add_argument("--copies", type=int_list, default=[1],
+                        help="Comma-separated fixture multipliers for data size (default: 1)")
+    parser.add_argument("--requests", type=int, default=None,
+                        help=f"Requests per run (default: {DEFAULT_REQUESTS}, {DEFAULT_SLOW_REQUESTS} for login)")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="Untimed requests before each run")
+    parser.add_argument("--profile-requests", type=int, default=DEFAULT_PROFILE_REQUESTS,
+                        help="Requests per scenario for Mongo call and allocation counts (0 to skip)")
+    parser.add_argument("--mongo", choices=["mock", "local"], default="mock",
+                        help="mongomock-motor in memory, or a local mongod")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017", help="mongod URL for --mongo local")
+    parser.add_argument("--db", default=DEFAULT_BENCH_DB, help="Database to load fixtures into (dropped per run)")
+    parser.add_argument("--cold", action="store_true",
+                        help="Bypass the read cache and site snapshot so every read hits MongoDB")
+    parser.add_argument("--live-notifications", action="store_true",
+                        help="Let contact submissions use the configured SMTP/Slack settings")
+    parser.add_argument("--verbose", action="store_true", help="Keep the app's request logging")
+    parser.add_argument("--output", help="Report path (default: test_reports/benchmark_<timestamp>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Also write {BASELINE_PATH.name}")
+    return parser
+
+def parse_args(argv=None):
+    args = build_parser().parse_args(argv)
+    args.scenario = args.scenario or list(SCENARIOS)
+    args.requests_explicit = args.requests is not None
+    args.requests = args.requests or DEFAULT_REQUESTS
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_environment(args)
+    report = asyncio.run(run_benchmarks(args))
+
+    print(format_table(report["results"]))
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = write_report(report, args.output or REPORTS_DIR / f"benchmark_{stamp}.json")
+    log(f"Report written to {path}")
+    if args.save_baseline:
+        log(f"Baseline written to {write_report(report, BASELINE_PATH)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Write-time processing for blog HTML, so reads serve stored fields as-is.
+
+`process_blog_html` sanitizes the HTML against an allowlist, minifies it,
+marks images `loading="lazy"`, gives h2/h3 headings stable ids and returns
+the table of contents, word count and reading time alongside the cleaned
+content. Built on the standard library's HTMLParser; output is always
+well-formed (unclosed tags are closed, stray end tags dropped).
+"""
+import math
+import os
+import re
+from html import escape
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+
+WORDS_PER_MINUTE = int(os.environ.get("BLOG_WORDS_PER_MINUTE", "200"))
+TOC_LEVELS = ("h2", "h3")
+EXCERPT_CHARS = 200
+
+ALLOWED_TAGS = {
+    "a", "abbr", "article", "b", "blockquote", "br", "caption", "code", "div", "em",
+    "figcaption", "figure", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "i", "img", "li",
+    "ol", "p", "pre", "section", "span", "strong", "sub", "sup", "table", "tbody", "td",
+    "tfoot", "th", "thead", "tr", "u", "ul",
+}
+# Dropped together with everything inside them; other unknown tags are unwrapped
+DROPPED_TAGS = {
+    "script", "style", "iframe", "object", "embed", "noscript", "template", "form",
+    "textarea", "select", "button", "svg", "math", "head", "title",
+}
+VOID_TAGS = {"br", "hr", "img"}
+BLOCK_TAGS = {
+    "article", "blockquote", "caption", "div", "figcaption", "figure", "h1", "h2", "h3",
+    "h4", "h5", "h6", "hr", "li", "ol", "p", "pre", "section", "table", "tbody", "td",
+    "tfoot", "th", "thead", "tr", "ul", "br",
+}
+GLOBAL_ATTRS = {"class", "id", "title", "style"}
+TAG_ATTRS = {
+    "a": {"href", "target", "rel"},
+    "img": {"src", "alt", "width", "height", "loading"},
+    "ol": {"start"},
+    "table": {"border", "cellpadding", "cellspacing"},
+    "td": {"colspan", "rowspan"},
+    "th": {"colspan", "rowspan", "scope"},
+}
+URL_ATTRS = {"href", "src"}
+SAFE_URL_SCHEMES = {"http", "https", "mailto", "tel"}
+# Backslashes (CSS escapes) and comments could spell any of these in disguise
+UNSAFE_STYLE = re.compile(r"expression|url\s*\(|javascript:|@import|behavior|binding|\\|/\*", re.IGNORECASE)
+URL_SCHEME = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*):")
+# Browsers drop these anywhere in a URL before parsing it, e.g. "java\tscript:"
+URL_IGNORED_CHARS = re.compile(r"[\x00-\x20\x7f]")
+WHITESPACE = re.compile(r"\s+")
+WORD = re.compile(r"\w+(?:['’-]\w+)*")
+
+def safe_url(value: str) -> bool:
+    """Relative URLs and allowlisted schemes only. `value` has its character
+    references decoded already (the parser converts them)."""
+    match = URL_SCHEME.match(URL_IGNORED_CHARS.sub("", value))
+    return match is None or match.group(1).lower() in SAFE_URL_SCHEMES
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^\w]+", "-", text.lower()).strip("-") or "section"
+
+class _BlogHTMLProcessor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out: List[Optional[str]] = []
+        self.open: List[str] = []
+        self.dropping: List[str] = []
+        self.text: List[str] = []
+        self.toc: List[Dict[str, Any]] = []
+        self.ids = set()
+        self.heading: Optional[Tuple[int, str, List[Tuple[str, str]], List[str]]] = None
+        # Whitespace right after a block tag boundary is insignificant
+        self.at_boundary = True
+
+    # ---- parser callbacks ----
+
+    def handle_starttag(self, tag, attrs):
+        if self.dropping:
+            if tag in DROPPED_TAGS and tag not in VOID_TAGS:
+                self.dropping.append(tag)
+            return
+        if tag in DROPPED_TAGS:
+            self.dropping.append(tag)
+            return
+        if tag not in ALLOWED_TAGS:
+            return
+        if tag in BLOCK_TAGS:
+            self._block_boundary()
+        attrs = self._clean_attrs(tag, attrs)
+        if tag in TOC_LEVELS and self.heading is None:
+            # Rendered at the end tag, once the text (and so the id) is known
+            self.heading = (len(self.out), tag, attrs, [])
+            self.out.append(None)
+        else:
+            self.out.append(self._render_start(tag, attrs))
+        if tag not in VOID_TAGS:
+            self.open.append(tag)
+        self.at_boundary = tag in BLOCK_TAGS
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and not self.dropping and tag in ALLOWED_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.dropping:
+            if tag == self.dropping[-1]:
+                self.dropping.pop()
+            return
+        if tag not in self.open:
+            return
+        while self.open:
+            current = self.open.pop()
+            self._close(current)
+            if current == tag:
+                break
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        if "pre" not in self.open:
+            data = WHITESPACE.sub(" ", data)
+            if self.at_boundary:
+                data = data.lstrip()
+            if not data:
+                return
+        self.at_boundary = False
+        self.out.append(escape(data, quote=False))
+        self.text.append(data)
+        if self.heading is not None:
+            self.heading[3].append(data)
+
+    # ---- helpers ----
+
+    def _clean_attrs(self, tag, attrs):
+        allowed = GLOBAL_ATTRS | TAG_ATTRS.get(tag, set())
+        cleaned = []
+        for name, value in attrs:
+            value = value or ""
+            if name not in allowed:
+                continue
+            if name in URL_ATTRS and not safe_url(value):
+                continue
+            if name == "style" and UNSAFE_STYLE.search(value):
+                continue
+            cleaned.append((name, value.strip()))
+        names = {name for name, _ in cleaned}
+        if tag == "img" and "loading" not in names:
+            cleaned.append(("loading", "lazy"))
+        if tag == "a" and dict(cleaned).get("target") == "_blank":
+            cleaned = [(n, v) for n, v in cleaned if n != "rel"] + [("rel", "noopener noreferrer")]
+        return cleaned
+
+    def _render_start(self, tag, attrs):
+        rendered = "".join(f' {name}="{escape(value)}"' for name, value in attrs)
+        return f"<{tag}{rendered}>"
+
+    def _close(self, tag):
+        if tag in BLOCK_TAGS and tag != "pre":
+            self._trim_trailing_space()
+        if self.heading is not None and self.heading[1] == tag:
+            self._finish_heading()
+        self.out.append(f"</{tag}>")
+        self.at_boundary = tag in BLOCK_TAGS
+        if tag in BLOCK_TAGS:
+            self.text.append(" ")
+
+    def _finish_heading(self):
+        index, tag, attrs, text = self.heading
+        self.heading = None
+        title = WHITESPACE.sub(" ", "".join(text)).strip()
+        anchor = dict(attrs).get("id") or self._unique_id(slugify(title))
+        self.ids.add(anchor)
+        attrs = [(n, v) for n, v in attrs if n != "id"] + [("id", anchor)]
+        self.out[index] = self._render_start(tag, attrs)
+        if title:
+            self.toc.append({"id": anchor, "text": title, "level": int(tag[1])})
+
+    def _unique_id(self, base):
+        anchor, n = base, 2
+        while anchor in self.ids:
+            anchor, n = f"{base}-{n}", n + 1
+        return anchor
+
+    def _trim_trailing_space(self):
+        if self.out and self.out[-1] and not self.out[-1].startswith("<") and "pre" not in self.open:
+            self.out[-1] = self.out[-1].rstrip()
+
+    def _block_boundary(self):
+        self._trim_trailing_space()
+        self.text.append(" ")
+
+    def result(self) -> Dict[str, Any]:
+        self.close()
+        while self.open:
+            self._close(self.open.pop())
+        words = len(WORD.findall("".join(self.text)))
+        return {
+            "content": "".join(piece for piece in self.out if piece),
+            "toc": self.toc,
+            "word_count": words,
+            "reading_time_minutes": max(1, math.ceil(words / WORDS_PER_MINUTE)) if words else 0,
+            "text": WHITESPACE.sub(" ", "".join(self.text)).strip(),
+        }
+
+def process_blog_html(html: str) -> Dict[str, Any]:
+    """Sanitized, minified content plus its derived fields (toc, word_count,
+    reading_time_minutes); `text` is the plain text, for excerpts"""
+    processor = _BlogHTMLProcessor()
+    processor.feed(html or "")
+    return processor.result()
+
+def excerpt_from(text: str, limit: int = EXCERPT_CHARS) -> str:
+    """First `limit` characters of plain text, cut at a word boundary"""
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0].rstrip(",.;:") + "…"
+
+def processed_fields(content: str, excerpt: Optional[str] = None) -> Dict[str, Any]:
+    """Fields to store for a blog whose content is being written; fills a blank excerpt"""
+    processed = process_blog_html(content)
+    text = processed.pop("text")
+    if excerpt is not None and not excerpt.strip():
+        processed["excerpt"] = excerpt_from(text)
+    return processed
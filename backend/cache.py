@@ -0,0 +1,253 @@
+"""
+Per-process read cache and the cross-worker invalidation bus that keeps it
+coherent when uvicorn runs with several workers, plus single-flight
+coalescing of concurrent misses.
+
+Every write publishes an invalidation message to MongoDB; every worker tails
+those messages and drops the matching local entries. Two transports:
+
+- a capped collection read with a tailable, await-data cursor (works on any
+  deployment, including a standalone mongod), or
+- a change stream on the same collection when a replica set is available.
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL_SECONDS = float(os.environ.get("CACHE_TTL_SECONDS", "300"))
+CACHE_BUS_MODE = os.environ.get("CACHE_BUS_MODE", "auto")  # auto, capped, changestream, off
+CACHE_BUS_COLLECTION = "cache_invalidations"
+CACHE_BUS_SIZE_BYTES = 1024 * 1024
+RESUME_OVERLAP = timedelta(seconds=1)
+# Pause before reopening a tail or change stream that failed
+RETRY_SECONDS = 1.0
+
+class LocalCache:
+    """Dict-backed cache keyed by (namespace, key), with a TTL as a safety net
+    in case an invalidation message is ever missed.
+
+    Every invalidation bumps a generation. A loader takes `generation()`
+    before reading the database and passes it to `set()`; if an invalidation
+    arrived during the read, the value it loaded may predate the write, so it
+    is not stored."""
+
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._data: Dict[str, Dict[Hashable, Tuple[float, Any]]] = {}
+        self._epoch = 0
+        self._namespace_generations: Dict[str, int] = {}
+        self._key_generations: Dict[str, Dict[Hashable, int]] = {}
+
+    def get(self, namespace: str, key: Hashable = None, default: Any = None) -> Any:
+        entry = self._data.get(namespace, {}).get(key)
+        if entry is None:
+            return default
+        expires, value = entry
+        if expires < time.monotonic():
+            self._data[namespace].pop(key, None)
+            return default
+        return value
+
+    def generation(self, namespace: str, key: Hashable = None) -> Tuple[int, int, int]:
+        return (
+            self._epoch,
+            self._namespace_generations.get(namespace, 0),
+            self._key_generations.get(namespace, {}).get(key, 0),
+        )
+
+    def set(self, namespace: str, key: Hashable, value: Any, generation: Optional[Tuple[int, int, int]] = None) -> Any:
+        """Store `value` and return it; with a `generation`, only if nothing
+        was invalidated since it was taken"""
+        if generation is None or generation == self.generation(namespace, key):
+            self._data.setdefault(namespace, {})[key] = (time.monotonic() + self.ttl, value)
+        return value
+
+    def invalidate(self, namespace: str, key: Hashable = None):
+        """Drop one key, or the whole namespace when key is None"""
+        if key is None:
+            self._data.pop(namespace, None)
+            self._namespace_generations[namespace] = self._namespace_generations.get(namespace, 0) + 1
+            # The namespace bump already outdates every generation taken for its keys
+            self._key_generations.pop(namespace, None)
+        else:
+            self._data.get(namespace, {}).pop(key, None)
+            keys = self._key_generations.setdefault(namespace, {})
+            keys[key] = keys.get(key, 0) + 1
+
+    def clear(self):
+        self._data.clear()
+        self._epoch += 1
+        self._namespace_generations.clear()
+        self._key_generations.clear()
+
+class SingleFlight:
+    """Coalesces concurrent cache misses: callers loading the same
+    (namespace, key) while a load is in flight await that load instead of
+    starting their own. Flights are keyed by the cache generation as well, so
+    once an invalidation lands new callers start a fresh load rather than
+    joining one that may have read the old data; the older load still cannot
+    fill the cache, since loaders store through `LocalCache.set` with the
+    generation they took. Nothing is kept once the load finishes."""
+
+    def __init__(self, cache: LocalCache):
+        self.cache = cache
+        self._flights: Dict[Tuple[str, Hashable, Tuple[int, int, int]], asyncio.Future] = {}
+
+    async def do(self, namespace: str, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        flight_key = (namespace, key, self.cache.generation(namespace, key))
+        flight = self._flights.get(flight_key)
+        if flight is None:
+            flight = asyncio.ensure_future(load())
+            self._flights[flight_key] = flight
+            flight.add_done_callback(lambda done: self._landed(flight_key, done))
+        # A caller that disconnects must not cancel the load for the others
+        return await asyncio.shield(flight)
+
+    def _landed(self, flight_key, flight: asyncio.Future):
+        del self._flights[flight_key]
+        if not flight.cancelled():
+            # Mark the error retrieved even if every waiter went away
+            flight.exception()
+
+class InvalidationBus:
+    """Publishes and applies cache invalidations across worker processes"""
+
+    def __init__(self, db, cache: LocalCache, mode: str = CACHE_BUS_MODE,
+                 collection: str = CACHE_BUS_COLLECTION, size_bytes: int = CACHE_BUS_SIZE_BYTES):
+        self.db = db
+        self.cache = cache
+        self.mode = mode
+        self.collection_name = collection
+        self.size_bytes = size_bytes
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+        self._listeners = []
+
+    @property
+    def collection(self):
+        return self.db[self.collection_name]
+
+    def add_listener(self, callback):
+        """Call `callback(namespace, key)` for every invalidation, local or remote"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    async def prepare(self):
+        """Ready the bus for publishing without following it (for scripts)"""
+        if self.mode == "off":
+            return
+        await self._ensure_collection()
+        if self.mode == "auto":
+            self.mode = "changestream" if await self._is_replica_set() else "capped"
+
+    async def start(self):
+        if self.mode == "off":
+            return
+        await self.prepare()
+        runner = self._watch_changes if self.mode == "changestream" else self._tail_capped
+        self._task = asyncio.create_task(runner())
+        logger.info(f"Cache invalidation bus started ({self.mode}, origin {self.origin})")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def publish(self, namespace: str, key: Hashable = None):
+        """Invalidate locally right away, then tell the other workers"""
+        self._apply(namespace, key)
+        if self.mode == "off":
+            return
+        try:
+            await self.collection.insert_one({
+                "ns": namespace,
+                "key": key,
+                "origin": self.origin,
+                "at": datetime.now(timezone.utc),
+            })
+        except PyMongoError as e:
+            # Other workers fall back to the cache TTL
+            logger.error(f"Failed to publish cache invalidation {namespace}/{key}: {str(e)}")
+
+    def _apply(self, namespace, key):
+        self.cache.invalidate(namespace, key)
+        for callback in self._listeners:
+            callback(namespace, key)
+
+    def _handle(self, message):
+        if message.get("origin") == self.origin or "ns" not in message:
+            return
+        self._apply(message["ns"], message.get("key"))
+
+    async def _ensure_collection(self):
+        try:
+            await self.db.create_collection(self.collection_name, capped=True, size=self.size_bytes)
+            # A tailable cursor on an empty capped collection dies immediately
+            await self.collection.insert_one({"origin": "init", "at": datetime.now(timezone.utc)})
+        except CollectionInvalid:
+            pass
+        except OperationFailure as e:
+            if e.code != 48:  # NamespaceExists, raised by another worker racing us
+                raise
+
+    async def _is_replica_set(self):
+        try:
+            hello = await self.db.command("hello")
+        except PyMongoError:
+            return False
+        return "setName" in hello
+
+    async def _tail_capped(self):
+        # ObjectIds from different processes are not ordered by insertion, so
+        # resume by timestamp with a small overlap instead; re-applying an
+        # invalidation is harmless.
+        since = datetime.now(timezone.utc)
+        while True:
+            cursor = self.collection.find(
+                {"at": {"$gte": since - RESUME_OVERLAP}}, cursor_type=CursorType.TAILABLE_AWAIT
+            )
+            try:
+                while cursor.alive:
+                    async for message in cursor:
+                        since = max(since, message["at"].replace(tzinfo=timezone.utc))
+                        self._handle(message)
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                logger.warning(f"Cache invalidation tail interrupted: {str(e)}")
+                await asyncio.sleep(RETRY_SECONDS)
+            finally:
+                await cursor.close()
+            await asyncio.sleep(0.05)
+
+    async def _watch_changes(self):
+        resume_token = None
+        while True:
+            try:
+                async with self.collection.watch(
+                    [{"$match": {"operationType": "insert"}}], resume_after=resume_token
+                ) as stream:
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        self._handle(change["fullDocument"])
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                logger.warning(f"Cache invalidation change stream interrupted: {str(e)}")
+                await asyncio.sleep(RETRY_SECONDS)
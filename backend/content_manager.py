@@ -2,13 +2,18 @@
 TechResona Content Management Script
 Manages blogs, SEO settings, and other site content
 """
+import argparse
 import asyncio
+import json
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 from pathlib import Path
 import sys
+import uuid
+
+from blog_content import processed_fields
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -837,122 +842,319 @@ ADDITIONAL_BLOGS = [
 
 # ==================== FUNCTIONS ====================
 
-async def seed_seo_settings():
+DEFAULT_WORKERS = 8
+
+def log(message=""):
+    """Progress output goes to stderr so stdout stays machine-readable"""
+    print(message, file=sys.stderr)
+
+# The server globals api_writes() replaced, until release_api_writes()
+_server_globals = None
+
+async def api_writes():
+    """The API server module, wired to this script's database, so edits take
+    the same write path as the API: revision history and cache invalidations
+    published to running workers (which also rebuild the site snapshot).
+    release_api_writes() puts the module back as it was."""
+    global _server_globals
+    import server
+
+    if _server_globals is None and server.db is not db:
+        _server_globals = (server.db, server.cache_bus.db, server.cache_bus.mode, server.revision_store.db)
+        server.db = db
+        server.cache_bus.db = db
+        await server.cache_bus.prepare()
+        await server.revision_store.start(db)
+    return server
+
+def release_api_writes():
+    global _server_globals
+    if _server_globals is None:
+        return
+    import server
+
+    server.db, server.cache_bus.db, server.cache_bus.mode, server.revision_store.db = _server_globals
+    _server_globals = None
+
+def banner(title):
+    log("\n" + "="*50)
+    log(title)
+    log("="*50)
+
+async def gather_bounded(coros, workers=DEFAULT_WORKERS):
+    """Run coroutines concurrently, at most `workers` at a time. Every
+    coroutine is awaited; a failure is returned in its slot, not raised."""
+    semaphore = asyncio.Semaphore(max(1, workers))
+    
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+    
+    return await asyncio.gather(*(bounded(coro) for coro in coros), return_exceptions=True)
+
+def error_entry(error):
+    return {"error": f"{type(error).__name__}: {error}"}
+
+def item_outcomes(keys, outcomes):
+    """Map each item to its outcome; failed items get an {"error": ...} entry"""
+    results = {}
+    for key, outcome in zip(keys, outcomes):
+        if isinstance(outcome, Exception):
+            log(f"✗ {key}: {outcome}")
+            outcome = error_entry(outcome)
+        results[key] = outcome
+    return results
+
+def failures(result, path=""):
+    """Paths of the {"error": ...} entries anywhere in a command's result"""
+    if isinstance(result, dict):
+        if set(result) == {"error"}:
+            return {path or "command": result["error"]}
+        found = {}
+        for key, value in result.items():
+            found.update(failures(value, f"{path}.{key}" if path else str(key)))
+        return found
+    return {}
+
+async def _upsert_seo(seo_data):
+    now = datetime.now(timezone.utc).isoformat()
+    fields = {k: v for k, v in seo_data.items() if k != "id"}
+    fields["updated_at"] = now
+    result = await db.seo_settings.update_one(
+        {"page": seo_data["page"]},
+        {"$set": fields, "$setOnInsert": {"id": str(uuid.uuid4())}},
+        upsert=True
+    )
+    if result.upserted_id is not None:
+        log(f"✓ Created SEO for: {seo_data['page']}")
+        return "created"
+    log(f"✓ Updated SEO for: {seo_data['page']}")
+    return "updated"
+
+async def seed_seo_settings(workers=DEFAULT_WORKERS):
     """Add SEO settings for all pages"""
-    print("\n" + "="*50)
-    print("Seeding SEO Settings")
-    print("="*50)
+    banner("Seeding SEO Settings")
     
-    for page_key, seo_data in SEO_SETTINGS.items():
-        existing = await db.seo_settings.find_one({"page": seo_data["page"]}, {"_id": 0})
-        
-        if existing:
-            # Update existing
-            seo_data['updated_at'] = datetime.now(timezone.utc).isoformat()
-            await db.seo_settings.update_one(
-                {"page": seo_data["page"]},
-                {"$set": seo_data}
-            )
-            print(f"✓ Updated SEO for: {seo_data['page']}")
-        else:
-            # Create new
-            import uuid
-            seo_data['id'] = str(uuid.uuid4())
-            seo_data['updated_at'] = datetime.now(timezone.utc).isoformat()
-            await db.seo_settings.insert_one(seo_data)
-            print(f"✓ Created SEO for: {seo_data['page']}")
-
-async def seed_additional_blogs():
+    pages = list(SEO_SETTINGS.values())
+    outcomes = await gather_bounded((_upsert_seo(seo) for seo in pages), workers)
+    server = await api_writes()
+    await server.invalidate(
+        *(("seo", seo["page"]) for seo in pages), ("seo_list", None), ("page_bundle", None)
+    )
+    return item_outcomes([seo["page"] for seo in pages], outcomes)
+
+async def _insert_blog_if_missing(blog):
+    now = datetime.now(timezone.utc).isoformat()
+    doc = {**blog, **processed_fields(blog["content"], blog.get("excerpt")), "created_at": now, "updated_at": now}
+    result = await db.blogs.update_one(
+        {"slug": blog["slug"]},
+        {"$setOnInsert": doc},
+        upsert=True
+    )
+    if result.upserted_id is None:
+        log(f"⊘ Blog already exists: {blog['title']}")
+        return "exists"
+    log(f"✓ Created blog: {blog['title']}")
+    return "created"
+
+async def seed_additional_blogs(workers=DEFAULT_WORKERS):
     """Add additional blogs to the site"""
-    print("\n" + "="*50)
-    print("Seeding Additional Blogs")
-    print("="*50)
+    banner("Seeding Additional Blogs")
+    
+    outcomes = await gather_bounded((_insert_blog_if_missing(b) for b in ADDITIONAL_BLOGS), workers)
+    created = [blog["slug"] for blog, outcome in zip(ADDITIONAL_BLOGS, outcomes) if outcome == "created"]
+    if created:
+        server = await api_writes()
+        await server.invalidate(*{entry for slug in created for entry in server.blog_invalidations(slug)})
+    return item_outcomes([blog["slug"] for blog in ADDITIONAL_BLOGS], outcomes)
+
+async def _reprocess_blog(server, blog):
+    fields = processed_fields(blog["content"], blog.get("excerpt"))
+    if all(blog.get(field) == value for field, value in fields.items()):
+        log(f"⊘ Already processed: {blog['slug']}")
+        return "unchanged"
+    update = {"content": blog["content"]}
+    if blog.get("excerpt") is not None:
+        update["excerpt"] = blog["excerpt"]
+    # A regular edit: bumps the revision, records history and invalidates caches
+    updated = await server.save_blog_update(blog, update, {"email": "content_manager"})
+    log(f"✓ Processed blog: {blog['slug']} ({fields['word_count']} words, {len(fields['toc'])} headings)")
+    return {
+        "word_count": fields["word_count"],
+        "reading_time_minutes": fields["reading_time_minutes"],
+        "headings": len(fields["toc"]),
+        "revision": updated["revision"],
+    }
+
+async def reprocess_blogs(workers=DEFAULT_WORKERS):
+    """Run stored blogs through the write-time content pipeline (backfills toc,
+    word_count and reading_time_minutes), as edits through the API write path"""
+    banner("Reprocessing Blog Content")
     
-    for blog in ADDITIONAL_BLOGS:
-        existing = await db.blogs.find_one({"slug": blog["slug"]}, {"_id": 0})
-        
-        if existing:
-            print(f"⊘ Blog already exists: {blog['title']}")
-        else:
-            blog["created_at"] = datetime.now(timezone.utc).isoformat()
-            blog["updated_at"] = datetime.now(timezone.utc).isoformat()
-            await db.blogs.insert_one(blog)
-            print(f"✓ Created blog: {blog['title']}")
+    server = await api_writes()
+    blogs = await db.blogs.find({}, {"_id": 0}).to_list(None)
+    outcomes = await gather_bounded((_reprocess_blog(server, b) for b in blogs), workers)
+    return item_outcomes([blog["slug"] for blog in blogs], outcomes)
 
 async def view_site_status():
     """View current site content status"""
-    print("\n" + "="*50)
-    print("SITE CONTENT STATUS")
-    print("="*50)
+    (
+        blog_count,
+        published_count,
+        blogs,
+        seo_count,
+        seo_pages,
+        contact_count,
+        admin_count,
+        keyword_count,
+    ) = await asyncio.gather(
+        db.blogs.count_documents({}),
+        db.blogs.count_documents({"published": True}),
+        db.blogs.find({}, {"_id": 0, "title": 1, "slug": 1, "published": 1}).to_list(100),
+        db.seo_settings.count_documents({}),
+        db.seo_settings.find({}, {"_id": 0, "page": 1}).to_list(100),
+        db.contact_submissions.count_documents({}),
+        db.admins.count_documents({}),
+        db.keywords.count_documents({}),
+    )
     
-    # Count blogs
-    blog_count = await db.blogs.count_documents({})
-    published_count = await db.blogs.count_documents({"published": True})
-    print(f"\n📝 Blogs: {blog_count} total ({published_count} published)")
-    
-    # List blog titles
-    blogs = await db.blogs.find({}, {"_id": 0, "title": 1, "slug": 1, "published": 1}).to_list(100)
+    banner("SITE CONTENT STATUS")
+    log(f"\n📝 Blogs: {blog_count} total ({published_count} published)")
     for i, blog in enumerate(blogs, 1):
-        status = "✓" if blog['published'] else "✗"
-        print(f"  {i}. {status} {blog['title'][:60]}...")
-    
-    # Count SEO settings
-    seo_count = await db.seo_settings.count_documents({})
-    print(f"\n🔍 SEO Settings: {seo_count} pages configured")
+        status = "✓" if blog.get('published') else "✗"
+        log(f"  {i}. {status} {blog['title'][:60]}...")
     
-    seo_pages = await db.seo_settings.find({}, {"_id": 0, "page": 1}).to_list(100)
+    log(f"\n🔍 SEO Settings: {seo_count} pages configured")
     for seo in seo_pages:
-        print(f"  ✓ {seo['page']}")
-    
-    # Count contact submissions
-    contact_count = await db.contact_submissions.count_documents({})
-    print(f"\n📧 Contact Submissions: {contact_count} total")
+        log(f"  ✓ {seo['page']}")
     
-    # Count admins
-    admin_count = await db.admins.count_documents({})
-    print(f"\n👤 Admin Users: {admin_count}")
+    log(f"\n📧 Contact Submissions: {contact_count} total")
+    log(f"\n👤 Admin Users: {admin_count}")
+    log(f"\n🎯 Keywords Tracked: {keyword_count}")
     
-    # Count keywords
-    keyword_count = await db.keywords.count_documents({})
-    print(f"\n🎯 Keywords Tracked: {keyword_count}")
+    return {
+        "blogs": {
+            "total": blog_count,
+            "published": published_count,
+            "items": blogs,
+        },
+        "seo_settings": {
+            "total": seo_count,
+            "pages": [seo["page"] for seo in seo_pages],
+        },
+        "contact_submissions": contact_count,
+        "admins": admin_count,
+        "keywords": keyword_count,
+    }
 
-async def add_sample_keywords():
+SAMPLE_KEYWORDS = [
+    {"keyword": "azure cloud solutions for small business", "page": "services", "search_volume": 500, "difficulty": "Medium"},
+    {"keyword": "aws cloud solutions for small business", "page": "services", "search_volume": 400, "difficulty": "Medium"},
+    {"keyword": "office 365 licensing for small business", "page": "services", "search_volume": 300, "difficulty": "High"},
+    {"keyword": "power bi consulting services", "page": "services", "search_volume": 150, "difficulty": "Medium"},
+    {"keyword": "managed services for small businesses", "page": "services", "search_volume": 200, "difficulty": "Low"},
+    {"keyword": "cloud service providers", "page": "blog", "search_volume": 1000, "difficulty": "High"},
+    {"keyword": "microsoft azure consulting small business", "page": "services", "search_volume": 80, "difficulty": "Medium"},
+    {"keyword": "aws managed services small business", "page": "services", "search_volume": 200, "difficulty": "Medium"},
+]
+
+async def _insert_keyword_if_missing(kw_data):
+    kw = {
+        "id": str(uuid.uuid4()),
+        "keyword": kw_data["keyword"],
+        "page": kw_data["page"],
+        "search_volume": kw_data.get("search_volume"),
+        "difficulty": kw_data.get("difficulty"),
+        "ranking": None,
+        "tracked_at": datetime.now(timezone.utc).isoformat()
+    }
+    result = await db.keywords.update_one(
+        {"keyword": kw_data["keyword"]},
+        {"$setOnInsert": kw},
+        upsert=True
+    )
+    if result.upserted_id is None:
+        log(f"⊘ Keyword exists: {kw_data['keyword']}")
+        return "exists"
+    log(f"✓ Added keyword: {kw_data['keyword']}")
+    return "created"
+
+async def add_sample_keywords(workers=DEFAULT_WORKERS):
     """Add sample keywords for tracking"""
-    print("\n" + "="*50)
-    print("Adding Sample Keywords")
-    print("="*50)
-    
-    keywords = [
-        {"keyword": "azure cloud solutions for small business", "page": "services", "search_volume": 500, "difficulty": "Medium"},
-        {"keyword": "aws cloud solutions for small business", "page": "services", "search_volume": 400, "difficulty": "Medium"},
-        {"keyword": "office 365 licensing for small business", "page": "services", "search_volume": 300, "difficulty": "High"},
-        {"keyword": "power bi consulting services", "page": "services", "search_volume": 150, "difficulty": "Medium"},
-        {"keyword": "managed services for small businesses", "page": "services", "search_volume": 200, "difficulty": "Low"},
-        {"keyword": "cloud service providers", "page": "blog", "search_volume": 1000, "difficulty": "High"},
-        {"keyword": "microsoft azure consulting small business", "page": "services", "search_volume": 80, "difficulty": "Medium"},
-        {"keyword": "aws managed services small business", "page": "services", "search_volume": 200, "difficulty": "Medium"},
-    ]
+    banner("Adding Sample Keywords")
     
-    import uuid
-    for kw_data in keywords:
-        existing = await db.keywords.find_one({"keyword": kw_data["keyword"]}, {"_id": 0})
-        if not existing:
-            kw = {
-                "id": str(uuid.uuid4()),
-                "keyword": kw_data["keyword"],
-                "page": kw_data["page"],
-                "search_volume": kw_data.get("search_volume"),
-                "difficulty": kw_data.get("difficulty"),
-                "ranking": None,
-                "tracked_at": datetime.now(timezone.utc).isoformat()
-            }
-            await db.keywords.insert_one(kw)
-            print(f"✓ Added keyword: {kw_data['keyword']}")
-        else:
-            print(f"⊘ Keyword exists: {kw_data['keyword']}")
+    outcomes = await gather_bounded((_insert_keyword_if_missing(kw) for kw in SAMPLE_KEYWORDS), workers)
+    return item_outcomes([kw["keyword"] for kw in SAMPLE_KEYWORDS], outcomes)
+
+async def run_all(workers=DEFAULT_WORKERS):
+    """Full content setup: seed steps touch disjoint collections, so run them together"""
+    steps = await asyncio.gather(
+        seed_seo_settings(workers),
+        seed_additional_blogs(workers),
+        add_sample_keywords(workers),
+        return_exceptions=True,
+    )
+    seo, blogs, keywords = (error_entry(step) if isinstance(step, Exception) else step for step in steps)
+    try:
+        status = await view_site_status()
+    except Exception as e:
+        status = error_entry(e)
+    return {"seo_settings": seo, "blogs": blogs, "keywords": keywords, "status": status}
+
+# ==================== CLI ====================
+
+COMMANDS = {
+    "status": lambda args: view_site_status(),
+    "seed-seo": lambda args: seed_seo_settings(args.workers),
+    "seed-blogs": lambda args: seed_additional_blogs(args.workers),
+    "keywords": lambda args: add_sample_keywords(args.workers),
+    "reprocess-blogs": lambda args: reprocess_blogs(args.workers),
+    "all": lambda args: run_all(args.workers),
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="TechResona content manager. Prints a JSON summary to stdout; progress goes to stderr."
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    help_text = {
+        "status": "View site content status",
+        "seed-seo": "Seed/update SEO settings for all pages",
+        "seed-blogs": "Add additional blogs",
+        "keywords": "Add sample keywords for tracking",
+        "reprocess-blogs": "Re-run stored blogs through the content pipeline",
+        "all": "Full content setup (seed everything, then show status)",
+    }
+    for name in COMMANDS:
+        sub = subparsers.add_parser(name, help=help_text[name])
+        sub.add_argument(
+            "--workers", type=int, default=DEFAULT_WORKERS,
+            help=f"Maximum concurrent writes per seed step (default: {DEFAULT_WORKERS})"
+        )
+        sub.add_argument("--indent", type=int, default=2, help="JSON indent (0 for compact)")
+    return parser
+
+async def run_command(args):
+    """Print the JSON summary, including on failure; returns the exit code"""
+    try:
+        result = await COMMANDS[args.command](args)
+    except Exception as e:
+        log(f"✗ {args.command} failed: {e}")
+        result = error_entry(e)
+    finally:
+        release_api_writes()
+        client.close()
+    errors = failures(result)
+    summary = {"command": args.command, "ok": not errors, "result": result}
+    if errors:
+        summary["errors"] = errors
+    print(json.dumps(summary, indent=args.indent or None, default=str))
+    return 1 if errors else 0
 
 # ==================== MAIN MENU ====================
 
+MENU_CHOICES = {"1": "status", "2": "seed-seo", "3": "seed-blogs", "4": "keywords", "5": "all"}
+
 async def main():
     print("\n" + "="*60)
     print("  TECHRESONA CONTENT MANAGER")
@@ -968,24 +1170,12 @@ async def main():
     
     choice = input("\nEnter your choice (1-6): ").strip()
     
-    if choice == "1":
-        await view_site_status()
-    elif choice == "2":
-        await seed_seo_settings()
-        print("\n✓ SEO settings updated successfully!")
-    elif choice == "3":
-        await seed_additional_blogs()
-        print("\n✓ Additional blogs added successfully!")
-    elif choice == "4":
-        await add_sample_keywords()
-        print("\n✓ Sample keywords added successfully!")
-    elif choice == "5":
-        print("\n🚀 Running full content setup...\n")
-        await seed_seo_settings()
-        await seed_additional_blogs()
-        await add_sample_keywords()
-        await view_site_status()
-        print("\n✓ Full content setup completed successfully!")
+    if choice in MENU_CHOICES:
+        if choice == "5":
+            print("\n🚀 Running full content setup...\n")
+        await COMMANDS[MENU_CHOICES[choice]](argparse.Namespace(workers=DEFAULT_WORKERS))
+        if choice != "1":
+            print("\n✓ Done!")
     elif choice == "6":
         print("\n👋 Goodbye!")
         client.close()
@@ -993,7 +1183,13 @@ async def main():
     else:
         print("\n❌ Invalid choice. Please try again.")
     
+    release_api_writes()
     client.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = build_parser().parse_args()
+    if args.command is None:
+        # No subcommand: keep the interactive menu for manual use
+        asyncio.run(main())
+    else:
+        sys.exit(asyncio.run(run_command(args)))
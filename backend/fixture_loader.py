@@ -0,0 +1,135 @@
+"""
+TechResona Fixture Loader
+Loads the bundled mongodump in test_database_backup into a database without
+the external mongo tools, for local development, tests and benchmarks.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from bson import ObjectId, decode_file_iter, json_util
+from dotenv import load_dotenv
+from pymongo import TEXT, IndexModel
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+DEFAULT_DUMP_DIR = ROOT_DIR.parent / "test_database_backup" / "test_database"
+DEFAULT_BATCH_SIZE = 1000
+
+# Index options mongodump writes into *.metadata.json that create_indexes accepts
+INDEX_OPTIONS = (
+    "unique", "sparse", "expireAfterSeconds", "partialFilterExpression",
+    "collation", "weights", "default_language", "language_override",
+    "textIndexVersion", "2dsphereIndexVersion", "hidden",
+)
+
+def read_collection(dump_dir, name):
+    """Decode one .bson dump file into a list of documents"""
+    with open(Path(dump_dir) / f"{name}.bson", "rb") as f:
+        return list(decode_file_iter(f))
+
+def index_keys(spec):
+    """Key list for create_indexes. Text indexes are dumped by their internal
+    form ({_fts: "text", _ftsx: 1}); the indexed fields are the weights' keys."""
+    keys = []
+    for field, direction in spec["key"].items():
+        if field == "_fts":
+            keys.extend((text_field, TEXT) for text_field in spec.get("weights", {}))
+        elif field != "_ftsx":
+            keys.append((field, direction))
+    return keys
+
+def read_indexes(dump_dir, name):
+    """Build IndexModels from a mongodump metadata file, skipping the _id index"""
+    path = Path(dump_dir) / f"{name}.metadata.json"
+    if not path.exists():
+        return []
+    metadata = json_util.loads(path.read_text())
+    models = []
+    for spec in metadata.get("indexes", []):
+        if spec.get("name") == "_id_":
+            continue
+        keys = index_keys(spec)
+        options = {k: spec[k] for k in INDEX_OPTIONS if k in spec}
+        models.append(IndexModel(keys, name=spec["name"], **options))
+    return models
+
+def scale_documents(docs, copies):
+    """Repeat fixtures `copies` times with fresh _id and suffixed id/slug/email
+    values, so benchmarks can run against larger collections."""
+    if copies <= 1:
+        return docs
+    scaled = list(docs)
+    for n in range(1, copies):
+        for doc in docs:
+            clone = dict(doc, _id=ObjectId())
+            for field in ("id", "slug"):
+                if isinstance(clone.get(field), str):
+                    clone[field] = f"{clone[field]}-{n}"
+            if isinstance(clone.get("email"), str) and "@" in clone["email"]:
+                local, domain = clone["email"].split("@", 1)
+                clone["email"] = f"{local}+{n}@{domain}"
+            scaled.append(clone)
+    return scaled
+
+def list_collections(dump_dir):
+    return sorted(p.stem for p in Path(dump_dir).glob("*.bson"))
+
+async def load_collection(db, dump_dir, name, drop=True, copies=1, batch_size=DEFAULT_BATCH_SIZE):
+    docs, indexes = await asyncio.gather(
+        asyncio.to_thread(read_collection, dump_dir, name),
+        asyncio.to_thread(read_indexes, dump_dir, name),
+    )
+    docs = scale_documents(docs, copies)
+    if drop:
+        await db[name].drop()
+    batches = [docs[i:i + batch_size] for i in range(0, len(docs), batch_size)]
+    await asyncio.gather(
+        *(db[name].insert_many(batch, ordered=False) for batch in batches),
+        *([db[name].create_indexes(indexes)] if indexes else []),
+    )
+    return len(docs)
+
+async def load_fixtures(db, dump_dir=DEFAULT_DUMP_DIR, collections=None, drop=True, copies=1, batch_size=DEFAULT_BATCH_SIZE):
+    """Load every dumped collection into `db` concurrently.
+
+    Returns a mapping of collection name to the number of documents inserted.
+    """
+    names = collections or list_collections(dump_dir)
+    counts = await asyncio.gather(
+        *(load_collection(db, dump_dir, name, drop, copies, batch_size) for name in names)
+    )
+    return dict(zip(names, counts))
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Load the bundled test_database_backup dump into MongoDB")
+    parser.add_argument("--dir", default=str(DEFAULT_DUMP_DIR), help="mongodump directory for one database")
+    parser.add_argument("--db", default=os.environ.get("DB_NAME", "test_database"), help="Target database")
+    parser.add_argument("--collection", action="append", help="Load only this collection (repeatable)")
+    parser.add_argument("--no-drop", action="store_true", help="Keep existing documents instead of dropping first")
+    parser.add_argument("--copies", type=int, default=1, help="Repeat every fixture N times (benchmark data sizes)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    return parser
+
+async def main(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    started = time.perf_counter()
+    try:
+        counts = await load_fixtures(
+            client[args.db], args.dir, args.collection, not args.no_drop, args.copies, args.batch_size
+        )
+    finally:
+        client.close()
+    elapsed = time.perf_counter() - started
+    print(f"Loaded {sum(counts.values())} documents into {args.db} in {elapsed:.3f}s", file=sys.stderr)
+    print(json.dumps({"database": args.db, "collections": counts, "seconds": round(elapsed, 4)}, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
@@ -0,0 +1,77 @@
+"""
+TechResona Import Budget Check
+Imports server.py in a fresh interpreter, without MONGO_URL or DB_NAME, and
+fails if the import takes longer than the budget or pulls in modules that
+server.py is meant to load lazily (SMTP, Slack, JWT, bcrypt, Motor).
+
+Usage:
+    python import_budget.py                      # budget from IMPORT_BUDGET_MS (default 1000)
+    python import_budget.py --budget-ms 700 --runs 5
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+DEFAULT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", "1000"))
+DEFAULT_RUNS = 3
+
+# Imported on first use by server.py; seeing one after `import server` is a regression
+LAZY_MODULES = (
+    "aiohttp", "aiosmtplib", "email.mime.multipart", "jose", "passlib.context",
+    "bcrypt", "motor.motor_asyncio", "PIL",
+)
+
+PROBE = (
+    "import json, sys; import server; "
+    f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+)
+IMPORTTIME_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| server$")
+
+def measure_once():
+    """Return (import ms, eagerly loaded lazy modules) from one fresh interpreter"""
+    env = {k: v for k, v in os.environ.items() if k not in ("MONGO_URL", "DB_NAME")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import server failed:\n{result.stderr[-2000:]}")
+    micros = [int(m.group(1)) for m in map(IMPORTTIME_LINE.match, result.stderr.splitlines()) if m]
+    return micros[-1] / 1000, json.loads(result.stdout.strip().splitlines()[-1])
+
+def check(budget_ms=DEFAULT_BUDGET_MS, runs=DEFAULT_RUNS):
+    samples, eager = [], set()
+    for _ in range(runs):
+        ms, loaded = measure_once()
+        samples.append(ms)
+        eager.update(loaded)
+    best = min(samples)
+    return {
+        "budget_ms": budget_ms,
+        "best_ms": round(best, 1),
+        "samples_ms": [round(ms, 1) for ms in samples],
+        "eager_modules": sorted(eager),
+        "passed": best <= budget_ms and not eager,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail when importing server.py gets slow or eager")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Fresh interpreters to try; best time counts")
+    args = parser.parse_args(argv)
+
+    result = check(args.budget_ms, args.runs)
+    print(json.dumps(result, indent=2))
+    if result["eager_modules"]:
+        print(f"Imported eagerly: {', '.join(result['eager_modules'])}", file=sys.stderr)
+    if result["best_ms"] > args.budget_ms:
+        print(f"import server took {result['best_ms']}ms, budget {args.budget_ms}ms", file=sys.stderr)
+    sys.exit(0 if result["passed"] else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Logo asset generation for content-hashed, immutable logo URLs.
+
+Runs inside a process pool (see server.get_logo_pool), so it only imports
+what it needs and every function takes and returns plain, picklable values.
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+# Heights in CSS pixels the site renders the logo at (Navbar/Footer use h-12),
+# generated at 1x, 2x and 4x for high-density screens.
+LOGO_HEIGHTS = (48, 96, 192)
+FAVICON_SIZES = ((16, 16), (32, 32), (48, 48))
+HASH_LENGTH = 12
+# Raster formats accepted for upload (Pillow format name -> stored suffix).
+# Anything script-capable, SVG included, is refused: logos are served from
+# the API origin with immutable caching.
+LOGO_FORMATS = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp", "GIF": ".gif"}
+
+def asset_name(stem, digest, suffix, variant=None):
+    """logo.<hash>.png / logo.<hash>.h96.webp"""
+    parts = [stem, digest[:HASH_LENGTH]]
+    if variant:
+        parts.append(variant)
+    return ".".join(parts) + suffix
+
+def _write_atomic(out_dir, name, write):
+    fd, tmp = tempfile.mkstemp(dir=out_dir, prefix=f".{name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, out_dir / name)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return name
+
+def publish_copy(source, dest):
+    """Atomically replace `dest` with a copy of `source`"""
+    dest = Path(dest)
+    _write_atomic(dest.parent, dest.name, lambda tmp: shutil.copyfile(source, tmp))
+
+def detect_format(path):
+    """The stored suffix for an accepted logo format, judged from the file's
+    bytes rather than the client's content type; None if it isn't one"""
+    try:
+        from PIL import Image
+
+        with Image.open(path) as img:
+            return LOGO_FORMATS.get(img.format)
+    except Exception:
+        return None
+
+def generate_derivatives(staged, out_dir, digest, suffix=".png"):
+    """Move a staged upload to its hashed name and render resized PNG/WebP
+    variants and a favicon next to it.
+
+    Returns {"original": name, "variants": {key: {"file", "width", "height",
+    "format"}}}. Variants are skipped when Pillow is unavailable or the image
+    can't be decoded; the hashed original is always written.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # The staged upload becomes the hashed original; same name means same bytes
+    original = asset_name("logo", digest, suffix)
+    source = out_dir / original
+    os.replace(staged, source)
+    result = {"original": original, "variants": {}}
+
+    try:
+        from PIL import Image
+    except ImportError:
+        return result
+
+    try:
+        with Image.open(source) as img:
+            img.load()
+            image = img.convert("RGBA")
+    except Exception:
+        return result
+
+    for height in LOGO_HEIGHTS:
+        if height > image.height:
+            continue
+        width = max(1, round(image.width * height / image.height))
+        resized = image.resize((width, height), Image.LANCZOS)
+        for fmt, ext in (("PNG", ".png"), ("WEBP", ".webp")):
+            key = f"h{height}{ext.replace('.', '_')}"
+            name = asset_name("logo", digest, ext, f"h{height}")
+            _write_atomic(out_dir, name, lambda tmp: resized.save(tmp, format=fmt, optimize=True))
+            result["variants"][key] = {"file": name, "width": width, "height": height, "format": fmt.lower()}
+
+    favicon = asset_name("favicon", digest, ".ico")
+    _write_atomic(out_dir, favicon, lambda tmp: image.save(tmp, format="ICO", sizes=list(FAVICON_SIZES)))
+    result["variants"]["favicon"] = {"file": favicon, "width": 48, "height": 48, "format": "ico"}
+    return result
@@ -0,0 +1,124 @@
+"""
+TechResona Performance Regression Gate
+Re-runs the benchmarks recorded in a baseline report (see benchmark.py) with
+the same settings and fails when a tracked metric regresses beyond tolerance:
+p95 latency, peak allocations per request, or Mongo calls per request.
+
+Usage:
+    python perf_gate.py                                  # against test_reports/benchmark_baseline.json
+    python perf_gate.py --baseline path/to/report.json --p95-tolerance 0.5
+    python perf_gate.py --update-baseline                # replace the baseline when the gate passes
+
+Exit status is 0 when every metric is within tolerance, 1 on regression.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import benchmark
+
+# metric -> (default relative tolerance, absolute slack in the metric's unit).
+# The slack keeps sub-millisecond timings from failing on scheduler noise.
+TRACKED_METRICS = {
+    "p95_ms": (0.25, 0.5),
+    "alloc_kib_per_request": (0.10, 4.0),
+    "mongo_calls_per_request": (0.0, 0.0),
+}
+
+def row_key(row):
+    return (row["scenario"], row["copies"], row["concurrency"])
+
+def compare(baseline, current, tolerances):
+    """Return one finding per (row, metric): dicts with status ok/regressed/missing"""
+    current_rows = {row_key(row): row for row in current["results"]}
+    findings = []
+    for base in baseline["results"]:
+        key = row_key(base)
+        row = current_rows.get(key)
+        for metric, (tolerance, slack) in tolerances.items():
+            before = base.get(metric)
+            if before is None:
+                continue
+            after = row.get(metric) if row else None
+            limit = before * (1 + tolerance) + slack
+            if after is None:
+                status = "missing"
+            else:
+                status = "regressed" if after > limit else "ok"
+            findings.append({
+                "scenario": key[0], "copies": key[1], "concurrency": key[2], "metric": metric,
+                "baseline": before, "current": after, "limit": round(limit, 3), "status": status,
+            })
+    return findings
+
+def format_findings(findings):
+    header = f"{'scenario':<16}{'copies':>7}{'conc':>6}  {'metric':<25}{'baseline':>10}{'current':>10}{'limit':>10}  status"
+    lines = [header, "-" * len(header)]
+    for f in findings:
+        lines.append(
+            f"{f['scenario']:<16}{f['copies']:>7}{f['concurrency']:>6}  {f['metric']:<25}"
+            f"{f['baseline']:>10}{str(f['current']):>10}{f['limit']:>10}  {f['status'].upper()}"
+        )
+    return "\n".join(lines)
+
+def rerun_args(baseline, args):
+    """Benchmark arguments that repeat the baseline's run"""
+    settings = baseline.get("settings")
+    if baseline.get("version") != benchmark.REPORT_VERSION:
+        raise SystemExit("Baseline was recorded by an older benchmark.py; regenerate it with benchmark.py --save-baseline")
+    if not settings:
+        raise SystemExit("Baseline has no recorded settings; regenerate it with benchmark.py --save-baseline")
+    bench_args = benchmark.parse_args([])
+    for name, value in settings.items():
+        setattr(bench_args, name, value)
+    bench_args.mongo_url = args.mongo_url
+    bench_args.db = args.db
+    return bench_args
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Fail when benchmarks regress against a stored baseline")
+    parser.add_argument("--baseline", default=str(benchmark.BASELINE_PATH), help="Baseline report to compare against")
+    for metric, (tolerance, _) in TRACKED_METRICS.items():
+        flag = "--" + metric.split("_")[0] + "-tolerance"
+        parser.add_argument(flag, type=float, default=tolerance, dest=f"{metric}_tolerance",
+                            help=f"Allowed relative increase in {metric} (default: {tolerance})")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017", help="mongod URL if the baseline used one")
+    parser.add_argument("--db", default=benchmark.DEFAULT_BENCH_DB, help="Database to load fixtures into")
+    parser.add_argument("--output", help="Where to write the new run (default: test_reports/benchmark_<timestamp>.json)")
+    parser.add_argument("--update-baseline", action="store_true", help="Replace the baseline if the gate passes")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    baseline_path = Path(args.baseline)
+    if not baseline_path.exists():
+        raise SystemExit(f"No baseline at {baseline_path}; create one with: python benchmark.py --save-baseline")
+    baseline = json.loads(baseline_path.read_text())
+
+    bench_args = rerun_args(baseline, args)
+    benchmark.configure_environment(bench_args)
+    current = asyncio.run(benchmark.run_benchmarks(bench_args))
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = benchmark.write_report(current, args.output or benchmark.REPORTS_DIR / f"benchmark_{stamp}.json")
+    benchmark.log(f"Current run written to {path}")
+
+    tolerances = {
+        metric: (getattr(args, f"{metric}_tolerance"), slack)
+        for metric, (_, slack) in TRACKED_METRICS.items()
+    }
+    findings = compare(baseline, current, tolerances)
+    print(format_findings(findings))
+
+    failed = [f for f in findings if f["status"] != "ok"]
+    if failed:
+        print(f"\n{len(failed)} of {len(findings)} checks regressed against {baseline_path}")
+        sys.exit(1)
+    print(f"\nAll {len(findings)} checks within tolerance of {baseline_path}")
+    if args.update_baseline:
+        benchmark.log(f"Baseline updated: {benchmark.write_report(current, baseline_path)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Connection pool statistics from pymongo's pool monitoring events: open and
+in-use connections per server, checkout counts and failures, and how long
+requests waited to check a connection out. Served by /health and /ready and
+exported as Prometheus metrics.
+
+Checkout started/finished events for one request fire on the same driver
+thread, so the start time is kept in a thread-local.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+from pymongo import monitoring
+
+import metrics
+
+POOL_WAIT = metrics.registry.register(metrics.Histogram(
+    "mongodb_pool_checkout_wait_seconds", "Time spent waiting to check out a pooled connection.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)))
+POOL_IN_USE = metrics.registry.register(metrics.Gauge(
+    "mongodb_pool_connections_in_use", "Pooled connections checked out.", ("address",)))
+POOL_OPEN = metrics.registry.register(metrics.Gauge(
+    "mongodb_pool_connections_open", "Pooled connections open.", ("address",)))
+
+RECENT_WAITS = 1000
+
+def _percentile_ms(sorted_seconds, fraction):
+    if not sorted_seconds:
+        return 0.0
+    index = min(len(sorted_seconds) - 1, int(len(sorted_seconds) * fraction))
+    return round(sorted_seconds[index] * 1000, 3)
+
+class _ServerPool:
+    def __init__(self):
+        self.open = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.cleared = 0
+        self.max_wait = 0.0
+        self.waits = deque(maxlen=RECENT_WAITS)
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    def __init__(self):
+        self._pools: Dict[str, _ServerPool] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _pool(self, address) -> _ServerPool:
+        key = f"{address[0]}:{address[1]}"
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = _ServerPool()
+        return pool
+
+    # ---- pool events ----
+
+    def pool_created(self, event):
+        with self._lock:
+            self._pool(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._pool(event.address).cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    # ---- connection events ----
+
+    def connection_created(self, event):
+        with self._lock:
+            self._pool(event.address).open += 1
+        POOL_OPEN.inc(address=f"{event.address[0]}:{event.address[1]}")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._pool(event.address).open -= 1
+        POOL_OPEN.dec(address=f"{event.address[0]}:{event.address[1]}")
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        self._local.started = None
+        with self._lock:
+            self._pool(event.address).checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        waited = time.perf_counter() - started if started is not None else 0.0
+        with self._lock:
+            pool = self._pool(event.address)
+            pool.in_use += 1
+            pool.checkouts += 1
+            pool.waits.append(waited)
+            pool.max_wait = max(pool.max_wait, waited)
+        POOL_WAIT.observe(waited)
+        POOL_IN_USE.inc(address=f"{event.address[0]}:{event.address[1]}")
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._pool(event.address).in_use -= 1
+        POOL_IN_USE.dec(address=f"{event.address[0]}:{event.address[1]}")
+
+    # ---- reporting ----
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Per-server pool state; wait percentiles cover the last RECENT_WAITS checkouts"""
+        with self._lock:
+            pools = {address: (pool, sorted(pool.waits)) for address, pool in self._pools.items()}
+        report = {}
+        for address, (pool, waits) in pools.items():
+            report[address] = {
+                "open": pool.open,
+                "in_use": pool.in_use,
+                "available": max(pool.open - pool.in_use, 0),
+                "checkouts": pool.checkouts,
+                "checkout_failures": pool.checkout_failures,
+                "cleared": pool.cleared,
+                "wait_ms": {
+                    "p50": _percentile_ms(waits, 0.50),
+                    "p95": _percentile_ms(waits, 0.95),
+                    "max": round(pool.max_wait * 1000, 3),
+                },
+            }
+        return report
@@ -0,0 +1,84 @@
+"""
+Per-route read preferences for anonymous, read-only traffic.
+
+Public routes (blog pages, SEO settings, sitemap, robots.txt) may read from
+secondaries with a bounded `maxStalenessSeconds`, so crawler load stays off
+the primary. Admin routes keep using the primary.
+
+Reads that fill the cache or the site snapshot right after a write must not
+pick up a lagging secondary, or stale content would be cached. So for
+`max_staleness` seconds after a namespace is invalidated (on any worker, via
+the invalidation bus), routes reading that namespace go to the primary; a
+secondary within the staleness bound has the write after that window. Writes
+made before this worker started are unknown, so the first window after
+startup reads from the primary too.
+"""
+import os
+import time
+from typing import Dict, Iterable, Optional
+
+from pymongo.read_preferences import (
+    Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred,
+)
+
+PUBLIC_READ_PREFERENCE = os.environ.get("PUBLIC_READ_PREFERENCE", "secondaryPreferred")
+# MongoDB rejects values below 90 seconds
+READ_MAX_STALENESS_SECONDS = int(os.environ.get("READ_MAX_STALENESS_SECONDS", "90"))
+# Per-route overrides, e.g. "get_blog=primary,sitemap_xml=nearest"
+READ_PREFERENCE_ROUTES = os.environ.get("READ_PREFERENCE_ROUTES", "")
+
+MODES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+def make_read_preference(mode: str, max_staleness: int):
+    if mode not in MODES:
+        raise ValueError(f"Unknown read preference {mode!r}; use one of {', '.join(MODES)}")
+    if mode == "primary":
+        return Primary()
+    return MODES[mode](max_staleness=max_staleness)
+
+def parse_routes(spec: str) -> Dict[str, str]:
+    routes = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        route, _, mode = item.partition("=")
+        routes[route.strip()] = mode.strip()
+    return routes
+
+class ReadRouter:
+    def __init__(self, public_mode: str = PUBLIC_READ_PREFERENCE,
+                 max_staleness: int = READ_MAX_STALENESS_SECONDS, routes: str = READ_PREFERENCE_ROUTES):
+        self.max_staleness = max_staleness
+        self.public = make_read_preference(public_mode, max_staleness)
+        self.routes = {
+            route: make_read_preference(mode, max_staleness) for route, mode in parse_routes(routes).items()
+        }
+        self._written: Dict[str, float] = {}
+        self._started = time.monotonic()
+
+    def note_write(self, namespace, key=None):
+        """Bus listener: remember when each cache namespace last changed"""
+        self._written[namespace] = time.monotonic()
+
+    def recently_written(self, namespaces: Iterable[str]) -> bool:
+        horizon = time.monotonic() - self.max_staleness
+        if self._started > horizon:
+            return True
+        return any(self._written.get(namespace, float("-inf")) > horizon for namespace in namespaces)
+
+    def preference(self, route: str, namespaces: Iterable[str] = ()) -> Optional[object]:
+        """Read preference for a public route, or None to use the database default (primary)"""
+        if self.recently_written(namespaces):
+            return None
+        preference = self.routes.get(route, self.public)
+        return None if isinstance(preference, Primary) else preference
+
+    def collection(self, db, name: str, route: str, namespaces: Iterable[str] = ()):
+        preference = self.preference(route, namespaces)
+        if preference is None:
+            return db[name]
+        return db.get_collection(name, read_preference=preference)
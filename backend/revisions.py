@@ -0,0 +1,175 @@
+"""
+Blog revision history, stored as reverse deltas.
+
+The `blogs` document always holds the current version and, in `revision`,
+the number of the newest stored revision. Each update records the version
+it replaced as revision N in `blog_revisions`, encoded as a diff against
+revision N+1 (the version that replaced it, or the current blog for the
+newest revision). Stored revisions never change after they are written.
+
+Every `REVISION_FULL_EVERY`-th revision is stored in full instead, so
+rebuilding any revision applies at most that many deltas, starting from the
+nearest full revision above it or from the current blog. Content deltas work
+on tag/word/whitespace tokens: a list of `[start, end]` token ranges copied
+from the newer version and literal strings for text that differs. Revision
+payloads are zlib-compressed JSON.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import uuid
+import zlib
+from datetime import datetime, timezone
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional
+
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+REVISION_FULL_EVERY = int(os.environ.get("REVISION_FULL_EVERY", "10"))
+REVISIONS_COLLECTION = "blog_revisions"
+
+# Fields a revision captures; derived fields (toc, word_count, ...) are
+# recomputed from content when a revision is restored
+REVISION_FIELDS = (
+    "title", "excerpt", "content", "keywords", "meta_description", "author", "published", "featured_image",
+)
+TOKEN = re.compile(r"<[^>]*>|[^<\s]+|\s+|<")
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text)
+
+def diff_content(old: str, new: str) -> List[Any]:
+    """Ops that rebuild `old` from `new`: [start, end] copies new's tokens, strings are literal"""
+    new_tokens, old_tokens = tokenize(new), tokenize(old)
+    # Edits are usually local: match the common prefix and suffix directly,
+    # and only run the (quadratic worst case) matcher on what lies between
+    limit = min(len(new_tokens), len(old_tokens))
+    head = 0
+    while head < limit and new_tokens[head] == old_tokens[head]:
+        head += 1
+    tail = 0
+    while tail < limit - head and new_tokens[-1 - tail] == old_tokens[-1 - tail]:
+        tail += 1
+    ops: List[Any] = [[0, head]] if head else []
+    matcher = SequenceMatcher(
+        None, new_tokens[head:len(new_tokens) - tail], old_tokens[head:len(old_tokens) - tail], autojunk=False
+    )
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([head + i1, head + i2])
+        elif j2 > j1:
+            literal = "".join(old_tokens[head + j1:head + j2])
+            if ops and isinstance(ops[-1], str):
+                ops[-1] += literal
+            else:
+                ops.append(literal)
+    if tail:
+        ops.append([len(new_tokens) - tail, len(new_tokens)])
+    return ops
+
+def patch_content(new: str, ops: List[Any]) -> str:
+    tokens = tokenize(new)
+    return "".join(op if isinstance(op, str) else "".join(tokens[op[0]:op[1]]) for op in ops)
+
+def encode(payload: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode(), 9)
+
+def decode(data: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(data))
+
+def blog_key(blog: Dict[str, Any]) -> str:
+    """Revisions belong to a blog's id; seeded blogs without one fall back to the slug"""
+    return blog.get("id") or blog["slug"]
+
+def snapshot_fields(blog: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: blog.get(field) for field in REVISION_FIELDS}
+
+def make_delta(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Payload that rebuilds `old` from `new`: changed plain fields verbatim, content as ops"""
+    delta = {"fields": {f: old[f] for f in REVISION_FIELDS if f != "content" and old[f] != new[f]}}
+    if old["content"] != new["content"]:
+        delta["content"] = diff_content(old["content"] or "", new["content"] or "")
+    return delta
+
+def apply_delta(new: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    old = {**new, **delta["fields"]}
+    if "content" in delta:
+        old["content"] = patch_content(new["content"] or "", delta["content"])
+    return old
+
+class RevisionStore:
+    def __init__(self, collection: str = REVISIONS_COLLECTION, full_every: int = REVISION_FULL_EVERY):
+        self.collection_name = collection
+        self.full_every = max(1, full_every)
+        self.db = None
+
+    @property
+    def collection(self):
+        return self.db[self.collection_name]
+
+    async def start(self, db):
+        self.db = db
+        try:
+            await self.collection.create_index([("blog_id", 1), ("revision", -1)], unique=True)
+        except PyMongoError as e:
+            logger.warning(f"Could not index {self.collection_name}: {str(e)}")
+
+    async def record(self, revision: int, previous: Dict[str, Any], current: Dict[str, Any],
+                     created_by: Optional[str] = None) -> Dict[str, Any]:
+        """Store `previous` as `revision`, as a delta against `current` (its successor)"""
+        old, new = snapshot_fields(previous), snapshot_fields(current)
+        if revision % self.full_every == 0:
+            kind, payload = "full", {"fields": old}
+        else:
+            # Diffing a long post takes tens of milliseconds; keep it off the event loop
+            kind, payload = "delta", await asyncio.to_thread(make_delta, old, new)
+        data = encode(payload)
+        doc = {
+            "id": str(uuid.uuid4()),
+            "blog_id": blog_key(previous),
+            "revision": revision,
+            "kind": kind,
+            "data": data,
+            "size": len(data),
+            "changed": sorted(f for f in REVISION_FIELDS if old[f] != new[f]),
+            "created_by": created_by,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        await self.collection.insert_one(doc)
+        return doc
+
+    async def list(self, current: Dict[str, Any], limit: int = 100) -> List[Dict[str, Any]]:
+        return await self.collection.find(
+            {"blog_id": blog_key(current)}, {"_id": 0, "data": 0}
+        ).sort("revision", -1).limit(limit).to_list(limit)
+
+    async def reconstruct(self, current: Dict[str, Any], revision: int) -> Optional[Dict[str, Any]]:
+        """Fields of `revision` of the blog whose current document is `current`, or None"""
+        if not 1 <= revision <= current.get("revision", 0):
+            return None
+        blog_id = blog_key(current)
+        base = await self.collection.find_one(
+            {"blog_id": blog_id, "kind": "full", "revision": {"$gte": revision}},
+            {"_id": 0}, sort=[("revision", 1)],
+        )
+        query = {"blog_id": blog_id, "revision": {"$gte": revision}}
+        if base is not None:
+            if base["revision"] == revision:
+                return decode(base["data"])["fields"]
+            query["revision"]["$lt"] = base["revision"]
+        deltas = await self.collection.find(query, {"_id": 0}).sort("revision", -1).to_list(None)
+        # The chain must be unbroken from its starting point down to `revision`
+        top = base["revision"] - 1 if base is not None else current.get("revision", 0)
+        if [doc["revision"] for doc in deltas] != list(range(top, revision - 1, -1)):
+            return None
+        fields = decode(base["data"])["fields"] if base is not None else snapshot_fields(current)
+        for doc in deltas:
+            fields = apply_delta(fields, decode(doc["data"]))
+        return fields
+
+    async def delete(self, current: Dict[str, Any]):
+        await self.collection.delete_many({"blog_id": blog_key(current)})
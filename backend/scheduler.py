@@ -0,0 +1,146 @@
+"""
+Scheduled publishing: blogs with a `publish_at` or `unpublish_at` time flip
+`published` when it comes due.
+
+Each worker keeps the next `SCHEDULE_BATCH` upcoming transitions in a
+min-heap, loaded with indexed range queries, and sleeps until the earliest
+one. It does not poll: the heap is reloaded when a blog write arrives on the
+invalidation bus (from any worker, including the transitions themselves),
+and at most `SCHEDULER_MAX_SLEEP_SECONDS` apart as a safety net for a
+missed message. A transition that fails goes back on the heap and is
+retried `SCHEDULER_RETRY_SECONDS` later.
+
+Every worker wakes for the same transition, but applying it is a conditional
+update on the scheduled time still being set, so exactly one worker's write
+matches; that worker alone publishes the cache and sitemap invalidations.
+"""
+import asyncio
+import heapq
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_BATCH = int(os.environ.get("SCHEDULE_BATCH", "100"))
+SCHEDULER_MAX_SLEEP_SECONDS = float(os.environ.get("SCHEDULER_MAX_SLEEP_SECONDS", "3600"))
+SCHEDULER_RETRY_SECONDS = float(os.environ.get("SCHEDULER_RETRY_SECONDS", "30"))
+SCHEDULE_FIELDS = ("publish_at", "unpublish_at")
+# Bus namespaces that every blog write publishes
+WATCHED_NAMESPACES = {"blog_list"}
+
+def to_utc(value: datetime) -> datetime:
+    """Schedule times without a zone are taken as UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def resolve_schedule(fields: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """Apply schedule times in `fields` that are already due and hold back
+    `published` until a future publish_at. Times are normalized to UTC."""
+    for field in SCHEDULE_FIELDS:
+        if fields.get(field) is not None:
+            fields[field] = to_utc(fields[field])
+    publish_at, unpublish_at = fields.get("publish_at"), fields.get("unpublish_at")
+    if publish_at is not None:
+        if publish_at <= now:
+            fields["published"], fields["publish_at"] = True, None
+        else:
+            fields["published"] = False
+    if unpublish_at is not None and unpublish_at <= now:
+        fields["published"], fields["unpublish_at"] = False, None
+    return fields
+
+class PublishScheduler:
+    def __init__(self, apply: Callable[[str, str, str], Awaitable[bool]],
+                 batch: int = SCHEDULE_BATCH, max_sleep: float = SCHEDULER_MAX_SLEEP_SECONDS,
+                 retry: float = SCHEDULER_RETRY_SECONDS):
+        """`apply(slug, field, due)` performs one transition; `due` is the stored
+        value, so the update can be made conditional on it"""
+        self.apply = apply
+        self.batch = batch
+        self.max_sleep = max_sleep
+        self.retry = retry
+        self.db = None
+        self._heap: List[Tuple[datetime, str, str, str]] = []
+        self._reload = True
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, db):
+        self.db = db
+        for field in SCHEDULE_FIELDS:
+            try:
+                await db.blogs.create_index(field, sparse=True)
+            except PyMongoError as e:
+                logger.warning(f"Could not index blogs.{field}: {str(e)}")
+        self._reload = True
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def on_invalidate(self, namespace, key):
+        """Bus listener: a blog changed somewhere, so the schedule may have too"""
+        if namespace in WATCHED_NAMESPACES:
+            self._reload = True
+            self._wake.set()
+
+    def next_due(self) -> Optional[datetime]:
+        return self._heap[0][0] if self._heap else None
+
+    async def load(self):
+        """Rebuild the heap from the earliest `batch` pending times of each kind"""
+        heap = []
+        for field in SCHEDULE_FIELDS:
+            # `$gt: ""` matches set (string) times only and uses the sparse index
+            docs = await self.db.blogs.find(
+                {field: {"$gt": ""}}, {"_id": 0, "slug": 1, field: 1}
+            ).sort(field, 1).limit(self.batch).to_list(self.batch)
+            heap.extend((to_utc(datetime.fromisoformat(doc[field])), doc["slug"], field, doc[field]) for doc in docs)
+        heapq.heapify(heap)
+        self._heap = heap
+
+    async def run_due(self, now: datetime) -> int:
+        applied = 0
+        while self._heap and self._heap[0][0] <= now:
+            _, slug, field, due = heapq.heappop(self._heap)
+            try:
+                if await self.apply(slug, field, due):
+                    applied += 1
+            except Exception as e:
+                logger.error(f"Scheduled {field} for blog {slug} failed, retrying in {self.retry:g}s: {str(e)}")
+                # Back on the heap, later, so one failing blog cannot stall the rest
+                heapq.heappush(self._heap, (now + timedelta(seconds=self.retry), slug, field, due))
+        return applied
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                if self._reload:
+                    self._reload = False
+                    await self.load()
+                await self.run_due(datetime.now(timezone.utc))
+            except PyMongoError as e:
+                logger.warning(f"Publish scheduler could not load the schedule: {str(e)}")
+                self._reload = True
+            due = self.next_due()
+            delay = self.max_sleep
+            if due is not None:
+                delay = min(max((due - datetime.now(timezone.utc)).total_seconds(), 0), self.max_sleep)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                if due is None or delay >= self.max_sleep:
+                    self._reload = True
@@ -1,42 +1,151 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File
-from fastapi.responses import Response, PlainTextResponse, FileResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Request, Query
+from fastapi.responses import Response, PlainTextResponse, FileResponse, JSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, TypeAdapter
+from typing import List, Optional, Dict, Any, Literal
 import uuid
 from datetime import datetime, timezone, timedelta
-from passlib.context import CryptContext
-from jose import JWTError, jwt
-import aiosmtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import aiohttp
 import json
-import shutil
+import asyncio
+import base64
+import hashlib
+from email.utils import format_datetime, parsedate_to_datetime
+from pymongo import IndexModel, ReturnDocument
+from pymongo.errors import PyMongoError
+import multiprocessing
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+import logo_assets
+import blog_content
+import exports
+from cache import LocalCache, InvalidationBus, SingleFlight
+from snapshot import SnapshotManager, default_snapshot_dir
+import metrics
+from slow_queries import SlowQueryLog
+from revisions import RevisionStore
+from scheduler import PublishScheduler, resolve_schedule
+from pool_stats import PoolStats
+from spam_filter import ContactScreen
+from read_routing import ReadRouter
+import timing
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Opened by connect_db() when the app starts, not at import. Tests and
+# benchmarks may assign their own client/db before startup.
+slow_query_log = SlowQueryLog()
+revision_store = RevisionStore()
+contact_screen = ContactScreen()
+pool_stats = PoolStats()
+client = None
+db = None
 
-app = FastAPI()
-api_router = APIRouter(prefix="/api")
+# Per-worker read cache, kept coherent across uvicorn workers by the bus
+cache = LocalCache()
+cache_bus = InvalidationBus(None, cache)
+# Concurrent misses for the same entry share one database read and render
+flights = SingleFlight(cache)
+
+# Public read-only routes may read from secondaries, except shortly after writes
+read_router = ReadRouter()
+cache_bus.add_listener(read_router.note_write)
+
+# Published content shared by all workers through one mmap'd file
+SNAPSHOT_DIR = Path(os.environ.get("SNAPSHOT_DIR", str(default_snapshot_dir())))
+
+# Connection pool and timeouts, per worker process. Fail fast instead of the
+# driver's 30s server selection wait when MongoDB is unreachable.
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", "2"))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get("MONGO_SOCKET_TIMEOUT_MS", "20000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+READY_TIMEOUT_SECONDS = float(os.environ.get("READY_TIMEOUT_SECONDS", "2"))
+
+def mongo_client_options() -> Dict[str, Any]:
+    return {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    }
+
+def public_reads(name: str, route: str, *namespaces: str):
+    """Collection for a public route's reads of the given cache namespaces"""
+    return read_router.collection(db, name, route, namespaces)
+
+def connect_db():
+    """Create the Motor client on first use"""
+    global client, db
+    if db is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        client = AsyncIOMotorClient(
+            os.environ['MONGO_URL'],
+            event_listeners=[metrics.MongoCommandMetrics(), slow_query_log, timing.MongoTimingListener(), pool_stats],
+            **mongo_client_options()
+        )
+        db = client[os.environ['DB_NAME']]
+    cache_bus.db = db
+    return db
+
+api_router = APIRouter(prefix="/api", route_class=timing.TimedRoute)
+site_router = APIRouter(route_class=timing.TimedRoute)
 
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 SECRET_KEY = os.environ.get("SECRET_KEY", "techresona-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+FRONTEND_PUBLIC_DIR = ROOT_DIR.parent / "frontend" / "public"
+MAX_LOGO_BYTES = int(os.environ.get("MAX_LOGO_BYTES", str(5 * 1024 * 1024)))
+# Room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+# Content-hashed logo assets, served with an immutable Cache-Control
+LOGO_ASSET_DIR = FRONTEND_PUBLIC_DIR / "logos"
+LOGO_ASSET_URL = "/api/logo/assets"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+LOGO_POOL_WORKERS = int(os.environ.get("LOGO_POOL_WORKERS", "1"))
+_logo_pool: Optional[ProcessPoolExecutor] = None
+_pwd_context = None
+
+def get_pwd_context():
+    """bcrypt context, built on first login so passlib stays off the import path"""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
+def get_logo_pool() -> ProcessPoolExecutor:
+    """Process pool for image resizing, created on first upload.
+
+    Uses spawn so workers only import logo_assets, not this module.
+    """
+    global _logo_pool
+    if _logo_pool is None:
+        _logo_pool = ProcessPoolExecutor(
+            max_workers=LOGO_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _logo_pool
+
 class Admin(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -79,11 +188,17 @@ class RobotsTxt(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     content: str
+    version: int = 0
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class RobotsTxtCreate(BaseModel):
     content: str
 
+class TocEntry(BaseModel):
+    id: str
+    text: str
+    level: int
+
 class Blog(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -96,9 +211,26 @@ class Blog(BaseModel):
     author: str = "TechResona Team"
     published: bool = True
     featured_image: Optional[str] = None
+    revision: int = 0
+    # Scheduled transitions, cleared once applied (scheduler.py)
+    publish_at: Optional[datetime] = None
+    unpublish_at: Optional[datetime] = None
+    # Derived from content at write time (blog_content.py)
+    toc: List[TocEntry] = []
+    word_count: int = 0
+    reading_time_minutes: int = 0
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class BlogRevision(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    revision: int
+    kind: str
+    size: int
+    changed: List[str] = []
+    created_by: Optional[str] = None
+    created_at: datetime
+
 class BlogCreate(BaseModel):
     slug: str
     title: str
@@ -109,6 +241,8 @@ class BlogCreate(BaseModel):
     author: Optional[str] = "TechResona Team"
     published: Optional[bool] = True
     featured_image: Optional[str] = None
+    publish_at: Optional[datetime] = None
+    unpublish_at: Optional[datetime] = None
 
 class BlogUpdate(BaseModel):
     title: Optional[str] = None
@@ -118,6 +252,9 @@ class BlogUpdate(BaseModel):
     meta_description: Optional[str] = None
     published: Optional[bool] = None
     featured_image: Optional[str] = None
+    # Sent as null to cancel a pending transition
+    publish_at: Optional[datetime] = None
+    unpublish_at: Optional[datetime] = None
 
 class Keyword(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -146,6 +283,23 @@ class ContactSubmission(BaseModel):
     message: str
     submitted_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     status: str = "new"  # new, contacted, closed
+    status_updated_at: Optional[datetime] = None
+    status_updated_by: Optional[str] = None
+    ip: Optional[str] = None
+    flags: List[str] = []  # duplicate, links, rate; flagged submissions are not notified
+    duplicate_of: Optional[str] = None
+
+# Screening results stay out of the public submit response
+CONTACT_PRIVATE_FIELDS = {"ip", "flags", "duplicate_of"}
+
+ContactStatus = Literal["new", "contacted", "closed"]
+
+class ContactSubmissionPage(BaseModel):
+    items: List[ContactSubmission]
+    next_cursor: Optional[str] = None
+
+class ContactStatusUpdate(BaseModel):
+    status: ContactStatus
 
 class ContactSubmissionCreate(BaseModel):
     name: str
@@ -154,6 +308,13 @@ class ContactSubmissionCreate(BaseModel):
     phone: Optional[str] = None
     message: str
 
+class PageBundle(BaseModel):
+    page: str
+    seo: Optional[SEOSettings] = None
+    blogs: Optional[List[Blog]] = None
+    blog: Optional[Blog] = None
+    logo: Dict[str, Any]
+
 class AnalyticsData(BaseModel):
     total_pages: int
     total_blogs: int
@@ -161,12 +322,14 @@ class AnalyticsData(BaseModel):
     recent_updates: List[str]
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict):
+    from jose import jwt
+
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
@@ -175,6 +338,10 @@ def create_access_token(data: dict):
 
 async def send_email(to_email: str, subject: str, body: str):
     """Send email using SMTP"""
+    import aiosmtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+
     try:
         smtp_host = os.environ.get("SMTP_HOST", "smtp.gmail.com")
         smtp_port = int(os.environ.get("SMTP_PORT", "587"))
@@ -189,14 +356,15 @@ async def send_email(to_email: str, subject: str, body: str):
         html_part = MIMEText(body, "html")
         message.attach(html_part)
         
-        await aiosmtplib.send(
-            message,
-            hostname=smtp_host,
-            port=smtp_port,
-            username=smtp_user,
-            password=smtp_password,
-            start_tls=True,
-        )
+        with timing.phase("smtp"):
+            await aiosmtplib.send(
+                message,
+                hostname=smtp_host,
+                port=smtp_port,
+                username=smtp_user,
+                password=smtp_password,
+                start_tls=True,
+            )
         logger.info(f"Email sent successfully to {to_email}")
         return True
     except Exception as e:
@@ -219,32 +387,125 @@ async def send_slack_notification(message: str):
             "icon_emoji": ":email:"
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(webhook_url, json=payload) as response:
-                if response.status == 200:
-                    logger.info("Slack notification sent successfully")
-                    return True
-                else:
-                    logger.error(f"Slack notification failed with status {response.status}")
-                    return False
+        import aiohttp
+
+        with timing.phase("slack"):
+            async with aiohttp.ClientSession() as session:
+                async with session.post(webhook_url, json=payload) as response:
+                    if response.status == 200:
+                        logger.info("Slack notification sent successfully")
+                        return True
+                    else:
+                        logger.error(f"Slack notification failed with status {response.status}")
+                        return False
     except Exception as e:
         logger.error(f"Failed to send Slack notification: {str(e)}")
         return False
 
-async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
+class UploadTooLarge(Exception):
+    pass
+
+class UploadLimitMiddleware:
+    """Refuses request bodies over a route's limit before the app reads them.
+
+    UploadFile parameters are only filled once the multipart parser has
+    spooled the whole body, so a cap in the endpoint comes too late. A
+    Content-Length over the limit gets a 413 without reading anything; bodies
+    without one are counted as they arrive and cut off at the limit.
+    `limits` maps a path to a function returning its limit in bytes.
+    """
+
+    def __init__(self, app, limits):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        max_bytes = limit()
+        too_large = HTTPException(status_code=413, detail=f"Request body must be at most {max_bytes // 1024} KB")
+        try:
+            declared = int(dict(scope.get("headers", [])).get(b"content-length", b""))
+        except ValueError:
+            declared = None
+        if declared is not None and declared > max_bytes:
+            response = JSONResponse(status_code=too_large.status_code, content={"detail": too_large.detail})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing as-is
+                    raise too_large
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+async def save_upload_atomic(upload: UploadFile, dest: Path, max_bytes: int):
+    """Stream an upload to `dest` without blocking the event loop.
+
+    Chunks are written to a temp file in the destination directory, hashed on
+    the way through, then fsynced and renamed over `dest`, so readers only ever
+    see the old file or the complete new one. Returns (size, sha256 hexdigest).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    tmp = await asyncio.to_thread(
+        tempfile.NamedTemporaryFile, dir=dest.parent, prefix=f".{dest.name}.", suffix=".tmp", delete=False
+    )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+        while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge()
+            digest.update(chunk)
+            await asyncio.to_thread(tmp.write, chunk)
+        await asyncio.to_thread(_finalize_temp, tmp)
+        await asyncio.to_thread(os.replace, tmp.name, dest)
+    except BaseException:
+        await asyncio.to_thread(_discard_temp, tmp)
+        raise
+    return size, digest.hexdigest()
+
+def _finalize_temp(f):
+    f.flush()
+    os.fsync(f.fileno())
+    f.close()
+    # NamedTemporaryFile is created 0600; the served file must be world-readable
+    os.chmod(f.name, 0o644)
+
+def _discard_temp(f):
+    f.close()
+    try:
+        os.unlink(f.name)
+    except FileNotFoundError:
+        pass
+
+async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    from jose import JWTError, jwt
+
+    with timing.phase("auth"):
+        token = credentials.credentials
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            email: str = payload.get("sub")
+            if email is None:
+                raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+        except JWTError:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    
-    admin = await db.admins.find_one({"email": email}, {"_id": 0})
-    if admin is None:
-        raise HTTPException(status_code=401, detail="Admin not found")
-    return admin
+        
+        admin = await db.admins.find_one({"email": email}, {"_id": 0})
+        if admin is None:
+            raise HTTPException(status_code=401, detail="Admin not found")
+        return admin
 
 @api_router.post("/auth/register", response_model=TokenResponse)
 async def register_admin(admin_data: AdminCreate):
@@ -271,22 +532,53 @@ async def login_admin(login_data: AdminLogin):
     access_token = create_access_token(data={"sub": admin['email']})
     return TokenResponse(access_token=access_token, token_type="bearer")
 
+async def invalidate(*entries):
+    """Publish cache invalidations for (namespace, key) pairs to every worker"""
+    await asyncio.gather(*(cache_bus.publish(namespace, key) for namespace, key in entries))
+
+def snapshot_response(section: str, key: str, media_type: str = "application/json") -> Optional[Response]:
+    """Serve a pre-rendered body from the shared site snapshot, if current"""
+    body = site_snapshot.get(section, key)
+    if body is None:
+        return None
+    return Response(content=body, media_type=media_type)
+
 @api_router.get("/seo", response_model=List[SEOSettings])
 async def get_all_seo_settings():
-    settings = await db.seo_settings.find({}, {"_id": 0}).to_list(1000)
+    cached = snapshot_response("seo_list", "all")
+    if cached is not None:
+        return cached
+    settings = cache.get("seo_list")
+    if settings is not None:
+        return settings
+    return await flights.do("seo_list", None, load_all_seo_settings)
+
+async def load_all_seo_settings():
+    generation = cache.generation("seo_list")
+    settings = await public_reads("seo_settings", "get_all_seo_settings", "seo_list").find({}, {"_id": 0}).to_list(1000)
     for s in settings:
         if isinstance(s.get('updated_at'), str):
             s['updated_at'] = datetime.fromisoformat(s['updated_at'])
-    return settings
+    return cache.set("seo_list", None, settings, generation)
 
 @api_router.get("/seo/{page}", response_model=SEOSettings)
 async def get_seo_settings(page: str):
-    setting = await db.seo_settings.find_one({"page": page}, {"_id": 0})
+    cached = snapshot_response("seo", page)
+    if cached is not None:
+        return cached
+    setting = cache.get("seo", page)
+    if setting is not None:
+        return setting
+    return await flights.do("seo", page, lambda: load_seo_settings(page))
+
+async def load_seo_settings(page: str):
+    generation = cache.generation("seo", page)
+    setting = await public_reads("seo_settings", "get_seo_settings", "seo").find_one({"page": page}, {"_id": 0})
     if not setting:
         raise HTTPException(status_code=404, detail="SEO settings not found")
     if isinstance(setting.get('updated_at'), str):
         setting['updated_at'] = datetime.fromisoformat(setting['updated_at'])
-    return setting
+    return cache.set("seo", page, setting, generation)
 
 @api_router.post("/seo", response_model=SEOSettings)
 async def create_seo_settings(seo_data: SEOSettingsCreate, admin: dict = Depends(get_current_admin)):
@@ -298,6 +590,7 @@ async def create_seo_settings(seo_data: SEOSettingsCreate, admin: dict = Depends
     doc = seo.model_dump()
     doc['updated_at'] = doc['updated_at'].isoformat()
     await db.seo_settings.insert_one(doc)
+    await invalidate(("seo", seo.page), ("seo_list", None), ("page_bundle", None))
     return seo
 
 @api_router.put("/seo/{page}", response_model=SEOSettings)
@@ -313,47 +606,185 @@ async def update_seo_settings(page: str, seo_data: SEOSettingsCreate, admin: dic
         {"$set": doc},
         upsert=True
     )
+    await invalidate(("seo", page), ("seo_list", None), ("page_bundle", None))
     return seo
 
+# robots.txt is stored as append-only versions in `robots_txt`; the active
+# one is named by a pointer document in `site_pointers`, swapped atomically.
+ROBOTS_POINTER_ID = "robots_txt"
+
+def robots_entry(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """In-memory form of a robots.txt version, with its validators"""
+    updated = doc.get('updated_at')
+    if isinstance(updated, str):
+        updated = datetime.fromisoformat(updated)
+    if updated is not None and updated.tzinfo is None:
+        updated = updated.replace(tzinfo=timezone.utc)
+    version = doc.get('version', 0)
+    digest = hashlib.sha256(doc['content'].encode()).hexdigest()[:16]
+    return {
+        "content": doc['content'],
+        "version": version,
+        "updated_at": updated,
+        "etag": f'"{version}-{digest}"',
+        "last_modified": format_datetime(updated.astimezone(timezone.utc), usegmt=True) if updated else None,
+    }
+
+async def load_active_robots(primary: bool = False) -> Optional[Dict[str, Any]]:
+    """Active robots.txt from memory, loading it through the pointer on a miss"""
+    robots = cache.get("robots")
+    if robots is not None:
+        return robots or None
+    return await flights.do("robots", primary, lambda: load_robots(primary))
+
+async def load_robots(primary: bool) -> Optional[Dict[str, Any]]:
+    generation = cache.generation("robots")
+    pointers = db.site_pointers if primary else public_reads("site_pointers", "robots_txt", "robots")
+    versions = db.robots_txt if primary else public_reads("robots_txt", "robots_txt", "robots")
+    pointer = await pointers.find_one({"_id": ROBOTS_POINTER_ID})
+    if pointer and pointer.get('active_version'):
+        doc = await versions.find_one({"version": pointer['active_version']}, {"_id": 0})
+    else:
+        # Saved before versioning (or by seed_data.py): newest document wins
+        doc = await versions.find_one({}, {"_id": 0}, sort=[("updated_at", -1)])
+    # An empty dict caches "nothing stored" so defaults don't hit the database
+    return cache.set("robots", None, robots_entry(doc) if doc else {}, generation) or None
+
+def robots_headers(robots: Dict[str, Any]) -> Dict[str, str]:
+    headers = {"ETag": robots['etag']}
+    if robots['last_modified']:
+        headers["Last-Modified"] = robots['last_modified']
+    return headers
+
+def not_modified(request: Request, robots: Dict[str, Any]) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or robots['etag'] in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and robots['updated_at']:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return robots['updated_at'].replace(microsecond=0) <= since
+    return False
+
 @api_router.get("/robots-txt")
 async def get_robots_txt():
-    robots = await db.robots_txt.find_one({}, {"_id": 0}, sort=[("updated_at", -1)])
+    robots = await load_active_robots(primary=True)
     if not robots:
         default_content = "User-agent: *\nAllow: /\nSitemap: https://crawler-friendly-web.preview.emergentagent.com/sitemap.xml"
-        return {"content": default_content}
-    return {"content": robots['content']}
+        return {"content": default_content, "version": 0}
+    return JSONResponse(
+        content={"content": robots['content'], "version": robots['version']},
+        headers=robots_headers(robots),
+    )
 
 @api_router.put("/robots-txt", response_model=RobotsTxt)
 async def update_robots_txt(robots_data: RobotsTxtCreate, admin: dict = Depends(get_current_admin)):
-    robots = RobotsTxt(content=robots_data.content)
+    return await publish_robots(robots_data.content)
+
+async def publish_robots(content: str) -> RobotsTxt:
+    """Store `content` as the next version and make it the active one"""
+    pointer = await db.site_pointers.find_one_and_update(
+        {"_id": ROBOTS_POINTER_ID},
+        # updated_at on every change, so incremental backups see it
+        {"$inc": {"last_version": 1}, "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    robots = RobotsTxt(content=content, version=pointer['last_version'])
     doc = robots.model_dump()
     doc['updated_at'] = doc['updated_at'].isoformat()
-    
-    await db.robots_txt.delete_many({})
     await db.robots_txt.insert_one(doc)
+    
+    # Readers see the old version or the new one, never nothing; a slower
+    # concurrent update cannot move the pointer back to an older version
+    swapped = await db.site_pointers.update_one(
+        {
+            "_id": ROBOTS_POINTER_ID,
+            "$or": [{"active_version": {"$exists": False}}, {"active_version": {"$lt": robots.version}}],
+        },
+        {"$set": {"active_version": robots.version, "updated_at": doc['updated_at']}},
+    )
+    await invalidate(("robots", None))
+    current = cache.get("robots")
+    if swapped.modified_count and not (current and current['version'] > robots.version):
+        # Write-through for this worker, unless a newer concurrent update
+        # already cached its version; the others reload on the invalidation
+        cache.set("robots", None, robots_entry(doc))
     return robots
 
+@api_router.get("/robots-txt/versions", response_model=List[RobotsTxt])
+async def get_robots_txt_versions(limit: int = 20, admin: dict = Depends(get_current_admin)):
+    """Stored robots.txt versions, newest first (admin only)"""
+    versions = await db.robots_txt.find({}, {"_id": 0}).sort("version", -1).limit(min(limit, 100)).to_list(100)
+    for version in versions:
+        if isinstance(version.get('updated_at'), str):
+            version['updated_at'] = datetime.fromisoformat(version['updated_at'])
+    return versions
+
+@api_router.post("/robots-txt/versions/{version}/restore", response_model=RobotsTxt)
+async def restore_robots_txt_version(version: int, admin: dict = Depends(get_current_admin)):
+    """Roll back to `version`'s content. It is published as a new version, so
+    the active version only ever moves forward and validators change."""
+    doc = await db.robots_txt.find_one({"version": version}, {"_id": 0, "content": 1})
+    if not doc:
+        raise HTTPException(status_code=404, detail="robots.txt version not found")
+    logger.info(f"robots.txt restored to version {version} by {admin.get('email')}")
+    return await publish_robots(doc['content'])
+
 @api_router.get("/blogs", response_model=List[Blog])
 async def get_all_blogs(published_only: bool = True):
+    if published_only:
+        cached = snapshot_response("blog_list", "published")
+        if cached is not None:
+            return cached
+    blogs = cache.get("blog_list", published_only)
+    if blogs is not None:
+        return blogs
+    return await flights.do("blog_list", published_only, lambda: load_blogs(published_only))
+
+async def load_blogs(published_only: bool):
+    generation = cache.generation("blog_list", published_only)
     query = {"published": True} if published_only else {}
-    blogs = await db.blogs.find(query, {"_id": 0}).sort("created_at", -1).to_list(1000)
+    # Drafts are listed for admins, who expect to see their own writes
+    blogs_collection = public_reads("blogs", "get_all_blogs", "blog_list") if published_only else db.blogs
+    blogs = await blogs_collection.find(query, {"_id": 0}).sort("created_at", -1).to_list(1000)
     for blog in blogs:
         if isinstance(blog.get('created_at'), str):
             blog['created_at'] = datetime.fromisoformat(blog['created_at'])
         if isinstance(blog.get('updated_at'), str):
             blog['updated_at'] = datetime.fromisoformat(blog['updated_at'])
-    return blogs
+    return cache.set("blog_list", published_only, blogs, generation)
 
 @api_router.get("/blogs/{slug}", response_model=Blog)
 async def get_blog(slug: str):
-    blog = await db.blogs.find_one({"slug": slug}, {"_id": 0})
+    cached = snapshot_response("blog", slug)
+    if cached is not None:
+        return cached
+    blog = cache.get("blog", slug)
+    if blog is not None:
+        return blog
+    return await flights.do("blog", slug, lambda: load_blog(slug))
+
+async def load_blog(slug: str):
+    generation = cache.generation("blog", slug)
+    blog = await public_reads("blogs", "get_blog", "blog").find_one({"slug": slug}, {"_id": 0})
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
     if isinstance(blog.get('created_at'), str):
         blog['created_at'] = datetime.fromisoformat(blog['created_at'])
     if isinstance(blog.get('updated_at'), str):
         blog['updated_at'] = datetime.fromisoformat(blog['updated_at'])
-    return blog
+    return cache.set("blog", slug, blog, generation)
+
+def blog_invalidations(slug: str):
+    return (("blog", slug), ("blog_list", None), ("sitemap", None), ("page_bundle", None))
 
 @api_router.post("/blogs", response_model=Blog)
 async def create_blog(blog_data: BlogCreate, admin: dict = Depends(get_current_admin)):
@@ -361,23 +792,38 @@ async def create_blog(blog_data: BlogCreate, admin: dict = Depends(get_current_a
     if existing:
         raise HTTPException(status_code=400, detail="Blog with this slug already exists")
     
-    blog = Blog(**blog_data.model_dump())
+    data = resolve_schedule(blog_data.model_dump(), datetime.now(timezone.utc))
+    data.update(blog_content.processed_fields(blog_data.content, blog_data.excerpt))
+    blog = Blog(**data)
     doc = blog.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
+    for field in ('created_at', 'updated_at', 'publish_at', 'unpublish_at'):
+        if doc[field] is not None:
+            doc[field] = doc[field].isoformat()
     await db.blogs.insert_one(doc)
+    await invalidate(*blog_invalidations(blog.slug))
     return blog
 
-@api_router.put("/blogs/{slug}", response_model=Blog)
-async def update_blog(slug: str, blog_data: BlogUpdate, admin: dict = Depends(get_current_admin)):
-    existing = await db.blogs.find_one({"slug": slug}, {"_id": 0})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Blog not found")
-    
-    update_data = {k: v for k, v in blog_data.model_dump().items() if v is not None}
+async def save_blog_update(existing: Dict[str, Any], update_data: Dict[str, Any], admin: dict):
+    """Apply an update, keeping the version it replaces in the revision history"""
+    slug = existing["slug"]
+    if 'content' in update_data:
+        update_data.update(blog_content.processed_fields(update_data['content'], update_data.get('excerpt')))
+    resolve_schedule(update_data, datetime.now(timezone.utc))
+    for field in ('publish_at', 'unpublish_at'):
+        if update_data.get(field) is not None:
+            update_data[field] = update_data[field].isoformat()
     update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    update_data['revision'] = existing.get('revision', 0) + 1
     
-    await db.blogs.update_one({"slug": slug}, {"$set": update_data})
+    # Conditional on the revision we read, so concurrent edits can't both claim the next one
+    result = await db.blogs.update_one(
+        {"slug": slug, "revision": existing.get('revision')},
+        {"$set": update_data}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail="Blog was changed by another edit; reload and try again")
+    await revision_store.record(update_data['revision'], existing, {**existing, **update_data}, admin.get("email"))
+    await invalidate(*blog_invalidations(slug))
     
     updated_blog = await db.blogs.find_one({"slug": slug}, {"_id": 0})
     if isinstance(updated_blog.get('created_at'), str):
@@ -386,23 +832,111 @@ async def update_blog(slug: str, blog_data: BlogUpdate, admin: dict = Depends(ge
         updated_blog['updated_at'] = datetime.fromisoformat(updated_blog['updated_at'])
     return updated_blog
 
+@api_router.put("/blogs/{slug}", response_model=Blog)
+async def update_blog(slug: str, blog_data: BlogUpdate, admin: dict = Depends(get_current_admin)):
+    existing = await db.blogs.find_one({"slug": slug}, {"_id": 0})
+    if not existing:
+        raise HTTPException(status_code=404, detail="Blog not found")
+    
+    update_data = {k: v for k, v in blog_data.model_dump().items() if v is not None}
+    update_data.update(blog_data.model_dump(exclude_unset=True, include={'publish_at', 'unpublish_at'}))
+    return await save_blog_update(existing, update_data, admin)
+
 @api_router.delete("/blogs/{slug}")
 async def delete_blog(slug: str, admin: dict = Depends(get_current_admin)):
-    result = await db.blogs.delete_one({"slug": slug})
-    if result.deleted_count == 0:
+    deleted = await db.blogs.find_one_and_delete({"slug": slug}, {"_id": 0, "id": 1, "slug": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Blog not found")
+    await revision_store.delete(deleted)
+    await invalidate(*blog_invalidations(slug))
     return {"message": "Blog deleted successfully"}
 
-@api_router.post("/contact/submit", response_model=ContactSubmission)
-async def submit_contact_form(contact_data: ContactSubmissionCreate):
+async def apply_scheduled_transition(slug: str, field: str, due: str) -> bool:
+    """Flip `published` for a due publish_at/unpublish_at. Conditional on the
+    stored time, so when every worker fires for it only one update matches."""
+    existing = await db.blogs.find_one({"slug": slug, field: due}, {"_id": 0})
+    if not existing:
+        return False
+    changes = {
+        "published": field == "publish_at",
+        field: None,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "revision": existing.get("revision", 0) + 1,
+    }
+    result = await db.blogs.update_one(
+        {"slug": slug, field: due, "revision": existing.get("revision")},
+        {"$set": changes}
+    )
+    if result.modified_count == 0:
+        return False
+    await revision_store.record(changes["revision"], existing, {**existing, **changes}, "scheduler")
+    await invalidate(*blog_invalidations(slug))
+    logger.info(f"Blog {slug} {'published' if changes['published'] else 'unpublished'} on schedule ({due})")
+    return True
+
+publish_scheduler = PublishScheduler(apply_scheduled_transition)
+cache_bus.add_listener(publish_scheduler.on_invalidate)
+
+@api_router.get("/blogs/{slug}/revisions", response_model=List[BlogRevision])
+async def get_blog_revisions(slug: str, limit: int = 100, admin: dict = Depends(get_current_admin)):
+    """Revision metadata, newest first"""
+    existing = await db.blogs.find_one({"slug": slug}, {"_id": 0, "id": 1, "slug": 1})
+    if not existing:
+        raise HTTPException(status_code=404, detail="Blog not found")
+    revisions = await revision_store.list(existing, min(limit, 100))
+    for revision in revisions:
+        if isinstance(revision.get('created_at'), str):
+            revision['created_at'] = datetime.fromisoformat(revision['created_at'])
+    return revisions
+
+async def load_blog_revision(slug: str, revision: int):
+    existing = await db.blogs.find_one({"slug": slug}, {"_id": 0})
+    if not existing:
+        raise HTTPException(status_code=404, detail="Blog not found")
+    fields = await revision_store.reconstruct(existing, revision)
+    if fields is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return existing, fields
+
+@api_router.get("/blogs/{slug}/revisions/{revision}")
+async def get_blog_revision(slug: str, revision: int, admin: dict = Depends(get_current_admin)):
+    """The blog's fields as they were at `revision`"""
+    _, fields = await load_blog_revision(slug, revision)
+    return {"slug": slug, "revision": revision, **fields}
+
+@api_router.post("/blogs/{slug}/revisions/{revision}/restore", response_model=Blog)
+async def restore_blog_revision(slug: str, revision: int, admin: dict = Depends(get_current_admin)):
+    """Make `revision` current again; the version it replaces becomes a new revision"""
+    existing, fields = await load_blog_revision(slug, revision)
+    logger.info(f"Blog {slug} restored to revision {revision} by {admin.get('email')}")
+    return await save_blog_update(existing, fields, admin)
+
+@api_router.post("/contact/submit", response_model=ContactSubmission, response_model_exclude=CONTACT_PRIVATE_FIELDS)
+async def submit_contact_form(contact_data: ContactSubmissionCreate, request: Request):
     """Handle contact form submission with email and Slack notifications"""
     try:
         # Create contact submission record
-        submission = ContactSubmission(**contact_data.model_dump())
+        submission = ContactSubmission(**contact_data.model_dump(), ip=request.client.host if request.client else None)
+        with timing.phase("spam"):
+            verdict = await contact_screen.screen(
+                db.contact_submissions, submission.message, submission.email, submission.ip, submission.submitted_at
+            )
+        # Remembered before the insert so a burst of resubmissions to this worker is caught in memory
+        contact_screen.remember(verdict, submission.id)
+        submission.flags, submission.duplicate_of = verdict["flags"], verdict["duplicate_of"]
         doc = submission.model_dump()
         doc['submitted_at'] = doc['submitted_at'].isoformat()
+        # Any later change moves updated_at too; incremental backups key on it
+        doc['updated_at'] = doc['submitted_at']
+        doc['fingerprint'], doc['fingerprint_bands'] = verdict['fingerprint'], verdict['fingerprint_bands']
         await db.contact_submissions.insert_one(doc)
         
+        if submission.flags:
+            metrics.CONTACT_SUBMISSIONS.inc(outcome="flagged")
+            logger.info(f"Contact form submission {submission.id} flagged {submission.flags}; notifications skipped")
+            return submission
+        metrics.CONTACT_SUBMISSIONS.inc(outcome="notified")
+        
         # Prepare email content
         email_subject = f"New Contact Form Submission from {contact_data.name}"
         email_body = f"""
@@ -455,33 +989,202 @@ _Submitted at: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}_
         logger.error(f"Error processing contact form: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to process contact form submission")
 
-@api_router.get("/contact/submissions", response_model=List[ContactSubmission])
-async def get_contact_submissions(admin: dict = Depends(get_current_admin)):
-    """Get all contact form submissions (admin only)"""
-    submissions = await db.contact_submissions.find({}, {"_id": 0}).sort("submitted_at", -1).to_list(1000)
+# The inbox filters by status and/or date range and pages newest first on
+# (submitted_at, id); text search goes through the text index
+CONTACT_INDEXES = [
+    IndexModel([("status", 1), ("submitted_at", -1), ("id", -1)], name="status_submitted_at_id"),
+    IndexModel([("submitted_at", -1), ("id", -1)], name="submitted_at_id"),
+    IndexModel([("id", 1)], name="id"),
+    IndexModel([("name", "text"), ("email", "text"), ("company", "text"), ("message", "text")], name="search"),
+    # Spam screening: near-duplicate band lookups and per-sender rate counts
+    IndexModel([("fingerprint_bands", 1), ("submitted_at", -1)], name="fingerprint_bands_submitted_at"),
+    IndexModel([("email", 1), ("submitted_at", -1)], name="email_submitted_at"),
+    IndexModel([("ip", 1), ("submitted_at", -1)], name="ip_submitted_at"),
+]
+CONTACT_PAGE_SIZE = 50
+CONTACT_MAX_PAGE_SIZE = 200
+
+def iso_utc(value: datetime) -> str:
+    """ISO string comparable with stored timestamps; naive values are UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+def encode_cursor(submission: Dict[str, Any]) -> str:
+    raw = json.dumps([submission['submitted_at'], submission['id']], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> List[str]:
+    try:
+        submitted_at, submission_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return [str(submitted_at), str(submission_id)]
+
+def contact_inbox_filters(status_filter: Optional[str], submitted_from: Optional[datetime],
+                          submitted_to: Optional[datetime], q: Optional[str],
+                          flagged: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """Query clauses shared by the inbox listing and its export"""
+    clauses = []
+    if status_filter:
+        clauses.append({"status": status_filter})
+    if flagged is not None:
+        # Also matches submissions from before screening, which have no flags field
+        clauses.append({"flags.0": {"$exists": flagged}})
+    if submitted_from or submitted_to:
+        window = {}
+        if submitted_from:
+            window["$gte"] = iso_utc(submitted_from)
+        if submitted_to:
+            window["$lt"] = iso_utc(submitted_to)
+        clauses.append({"submitted_at": window})
+    if q and q.strip():
+        clauses.append({"$text": {"$search": q.strip()}})
+    return clauses
+
+ExportFormat = Literal["csv", "xlsx"]
+EXPORT_BATCH_SIZE = 500
+CONTACT_EXPORT_FIELDS = (
+    "submitted_at", "status", "name", "email", "company", "phone", "message",
+    "status_updated_at", "status_updated_by", "flags", "duplicate_of", "id",
+)
+KEYWORD_EXPORT_FIELDS = ("keyword", "page", "ranking", "search_volume", "difficulty", "tracked_at", "id")
+
+async def export_rows(cursor, fields):
+    async for doc in cursor:
+        yield [doc.get(field) for field in fields]
+
+def export_response(fmt: str, name: str, fields, cursor) -> StreamingResponse:
+    """Stream a cursor as CSV or XLSX, encoding rows as they arrive"""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return StreamingResponse(
+        exports.stream_export(fmt, list(fields), export_rows(cursor.batch_size(EXPORT_BATCH_SIZE), fields), name),
+        media_type=exports.EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}_{stamp}.{fmt}"'},
+    )
+
+@api_router.get("/contact/submissions/export")
+async def export_contact_submissions(
+    format: ExportFormat = "csv",
+    status_filter: Optional[ContactStatus] = Query(None, alias="status"),
+    submitted_from: Optional[datetime] = None,
+    submitted_to: Optional[datetime] = None,
+    q: Optional[str] = None,
+    flagged: Optional[bool] = None,
+    admin: dict = Depends(get_current_admin)
+):
+    """Every submission matching the inbox filters, newest first (admin only)"""
+    clauses = contact_inbox_filters(status_filter, submitted_from, submitted_to, q, flagged)
+    cursor = db.contact_submissions.find(
+        {"$and": clauses} if clauses else {}, {"_id": 0}
+    ).sort([("submitted_at", -1), ("id", -1)])
+    logger.info(f"Contact submissions exported as {format} by {admin.get('email')}")
+    return export_response(format, "contact_submissions", CONTACT_EXPORT_FIELDS, cursor)
+
+@api_router.get("/contact/submissions", response_model=ContactSubmissionPage)
+async def get_contact_submissions(
+    status_filter: Optional[ContactStatus] = Query(None, alias="status"),
+    submitted_from: Optional[datetime] = None,
+    submitted_to: Optional[datetime] = None,
+    q: Optional[str] = None,
+    flagged: Optional[bool] = None,
+    limit: int = CONTACT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    admin: dict = Depends(get_current_admin)
+):
+    """Contact form submissions, newest first (admin only). Pass the returned
+    `next_cursor` as `cursor` for the next page."""
+    limit = max(1, min(limit, CONTACT_MAX_PAGE_SIZE))
+    clauses = contact_inbox_filters(status_filter, submitted_from, submitted_to, q, flagged)
+    if cursor:
+        submitted_at, submission_id = decode_cursor(cursor)
+        clauses.append({"$or": [
+            {"submitted_at": {"$lt": submitted_at}},
+            {"submitted_at": submitted_at, "id": {"$lt": submission_id}},
+        ]})
+    query = {"$and": clauses} if clauses else {}
+    
+    submissions = await db.contact_submissions.find(query, {"_id": 0}).sort(
+        [("submitted_at", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+    next_cursor = encode_cursor(submissions[limit - 1]) if len(submissions) > limit else None
+    submissions = submissions[:limit]
     for sub in submissions:
-        if isinstance(sub.get('submitted_at'), str):
-            sub['submitted_at'] = datetime.fromisoformat(sub['submitted_at'])
-    return submissions
+        for field in ('submitted_at', 'status_updated_at'):
+            if isinstance(sub.get(field), str):
+                sub[field] = datetime.fromisoformat(sub[field])
+    return ContactSubmissionPage(items=submissions, next_cursor=next_cursor)
+
+@api_router.patch("/contact/submissions/{submission_id}", response_model=ContactSubmission)
+async def update_contact_submission_status(
+    submission_id: str,
+    update: ContactStatusUpdate,
+    admin: dict = Depends(get_current_admin)
+):
+    """Move a submission between new, contacted and closed (admin only)"""
+    now = datetime.now(timezone.utc).isoformat()
+    submission = await db.contact_submissions.find_one_and_update(
+        {"id": submission_id},
+        {"$set": {
+            "status": update.status,
+            "status_updated_at": now,
+            "status_updated_by": admin.get("email"),
+            "updated_at": now,
+        }},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if submission is None:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    return submission
 
 @api_router.post("/logo/upload")
 async def upload_logo(file: UploadFile = File(...), admin: dict = Depends(get_current_admin)):
     """Upload a new logo (admin only)"""
+    staged = None
     try:
         # Validate file type
-        if not file.content_type.startswith('image/'):
+        if not file.content_type or not file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # Define frontend public directory
-        frontend_public_dir = Path(__file__).parent.parent / "frontend" / "public"
-        frontend_public_dir.mkdir(parents=True, exist_ok=True)
+        LOGO_ASSET_DIR.mkdir(parents=True, exist_ok=True)
+        
+        # Stream to a per-upload staging file, hashed while writing
+        staged = LOGO_ASSET_DIR / f".upload-{uuid.uuid4()}"
+        try:
+            size, sha256 = await save_upload_atomic(file, staged, MAX_LOGO_BYTES)
+        except UploadTooLarge:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Logo must be at most {MAX_LOGO_BYTES // 1024} KB"
+            )
         
-        # Save as logo.png
-        logo_path = frontend_public_dir / "logo.png"
+        # The stored format comes from the bytes, not the client's content type
+        suffix = await asyncio.to_thread(logo_assets.detect_format, staged)
+        if suffix is None:
+            raise HTTPException(
+                status_code=415,
+                detail=f"Logo must be one of: {', '.join(sorted(logo_assets.LOGO_FORMATS))}"
+            )
         
-        # Save the file
-        with open(logo_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Rename to logo.<hash> and render size/WebP/favicon variants off the event loop
+        loop = asyncio.get_running_loop()
+        assets = await loop.run_in_executor(
+            get_logo_pool(), logo_assets.generate_derivatives,
+            str(staged), str(LOGO_ASSET_DIR), sha256, suffix
+        )
+        staged = None
+        
+        # Keep /logo.png current for pages that still reference it directly
+        await asyncio.to_thread(
+            logo_assets.publish_copy, LOGO_ASSET_DIR / assets["original"], FRONTEND_PUBLIC_DIR / "logo.png"
+        )
+        
+        path = f"{LOGO_ASSET_URL}/{assets['original']}"
+        variants = {
+            key: {**variant, "path": f"{LOGO_ASSET_URL}/{variant['file']}"}
+            for key, variant in assets["variants"].items()
+        }
         
         # Save logo info to database
         logo_doc = {
@@ -489,29 +1192,93 @@ async def upload_logo(file: UploadFile = File(...), admin: dict = Depends(get_cu
             "filename": file.filename,
             "uploaded_by": admin.get("email"),
             "uploaded_at": datetime.now(timezone.utc).isoformat(),
-            "path": "/logo.png"
+            "path": path,
+            "size": size,
+            "sha256": sha256,
+            "variants": variants
         }
         await db.logos.insert_one(logo_doc)
+        await invalidate(("page_bundle", None))
         
-        logger.info(f"Logo uploaded by {admin.get('email')}: {file.filename}")
+        logger.info(f"Logo uploaded by {admin.get('email')}: {file.filename} ({size} bytes, {len(variants)} variants)")
         
         return {
             "message": "Logo uploaded successfully",
-            "path": "/logo.png",
-            "filename": file.filename
+            "path": path,
+            "filename": file.filename,
+            "variants": variants
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading logo: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to upload logo")
+    finally:
+        if staged is not None:
+            staged.unlink(missing_ok=True)
 
-@api_router.get("/logo/current")
-async def get_current_logo():
-    """Get current logo information"""
-    logo = await db.logos.find_one({}, {"_id": 0}, sort=[("uploaded_at", -1)])
+async def load_current_logo(logos) -> Dict[str, Any]:
+    logo = await logos.find_one({}, {"_id": 0}, sort=[("uploaded_at", -1)])
     if logo:
         return logo
     return {"path": "/logo.png", "filename": "logo.png"}
 
+@api_router.get("/logo/current")
+async def get_current_logo():
+    """Get current logo information"""
+    return await load_current_logo(db.logos)
+
+@api_router.get("/logo/assets/{filename}")
+async def get_logo_asset(filename: str):
+    """Serve a content-hashed logo asset; the name changes whenever the bytes do"""
+    path = LOGO_ASSET_DIR / filename
+    if Path(filename).name != filename or filename.startswith(".") or not path.is_file():
+        raise HTTPException(status_code=404, detail="Logo asset not found")
+    return FileResponse(path, headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+
+async def load_page_content(blogs, page: str, slug: Optional[str]):
+    """The content slice a page renders: one blog by slug, the published list for /blog"""
+    if slug:
+        blog = await blogs.find_one({"slug": slug}, {"_id": 0})
+        if not blog:
+            raise HTTPException(status_code=404, detail="Blog not found")
+        return {"blog": blog}
+    if page == "blog":
+        return {"blogs": await blogs.find({"published": True}, {"_id": 0}).sort("created_at", -1).to_list(1000)}
+    return {}
+
+async def build_page_bundle(page: str, slug: Optional[str]) -> PageBundle:
+    def reads(name):
+        return public_reads(name, "get_page_bundle", "page_bundle")
+    
+    seo, content, logo = await asyncio.gather(
+        reads("seo_settings").find_one({"page": page}, {"_id": 0}),
+        load_page_content(reads("blogs"), page, slug),
+        load_current_logo(reads("logos")),
+    )
+    return PageBundle(page=page, seo=seo, logo=logo, **content)
+
+# Public pages the frontend requests bundles for; only "blog" takes a slug
+PAGE_BUNDLE_PAGES = {"home", "about", "services", "contact", "blog"}
+
+@api_router.get("/page-bundle/{page}", response_model=PageBundle)
+async def get_page_bundle(page: str, slug: Optional[str] = None):
+    """Everything a public page needs for first paint: SEO settings, its
+    content slice (the published blog list, or one blog by `slug`) and the
+    current logo, cached pre-serialized until any of them is written"""
+    if page not in PAGE_BUNDLE_PAGES or (slug is not None and page != "blog"):
+        raise HTTPException(status_code=404, detail="Page not found")
+    body = cache.get("page_bundle", (page, slug))
+    if body is None:
+        body = await flights.do("page_bundle", (page, slug), lambda: render_page_bundle(page, slug))
+    return Response(content=body, media_type="application/json")
+
+async def render_page_bundle(page: str, slug: Optional[str]) -> bytes:
+    generation = cache.generation("page_bundle", (page, slug))
+    bundle = await build_page_bundle(page, slug)
+    # Keys are bounded: pages are validated and unknown slugs 404 before this
+    return cache.set("page_bundle", (page, slug), bundle.model_dump_json().encode(), generation)
+
 @api_router.get("/logo/history")
 async def get_logo_history(admin: dict = Depends(get_current_admin)):
     """Get logo upload history (admin only)"""
@@ -526,6 +1293,16 @@ async def get_all_keywords(admin: dict = Depends(get_current_admin)):
             kw['tracked_at'] = datetime.fromisoformat(kw['tracked_at'])
     return keywords
 
+@api_router.get("/keywords/export")
+async def export_keywords(
+    format: ExportFormat = "csv",
+    page: Optional[str] = None,
+    admin: dict = Depends(get_current_admin)
+):
+    """All tracked keywords, optionally for one page (admin only)"""
+    cursor = db.keywords.find({"page": page} if page else {}, {"_id": 0}).sort([("page", 1), ("keyword", 1)])
+    return export_response(format, "keywords", KEYWORD_EXPORT_FIELDS, cursor)
+
 @api_router.post("/keywords", response_model=Keyword)
 async def create_keyword(keyword_data: KeywordCreate, admin: dict = Depends(get_current_admin)):
     keyword = Keyword(**keyword_data.model_dump())
@@ -557,10 +1334,7 @@ async def get_analytics(admin: dict = Depends(get_current_admin)):
         recent_updates=recent_updates
     )
 
-@api_router.get("/sitemap/generate")
-async def generate_sitemap():
-    blogs = await db.blogs.find({"published": True}, {"_id": 0, "slug": 1, "updated_at": 1}).to_list(1000)
-    
+def render_sitemap(blogs: List[dict]) -> str:
     base_url = "https://techresona.com"
     
     sitemap = '<?xml version="1.0" encoding="UTF-8"?>\n'
@@ -596,18 +1370,59 @@ async def generate_sitemap():
         sitemap += f'  </url>\n'
     
     sitemap += '</urlset>'
-    
-    return Response(content=sitemap, media_type="application/xml")
+    return sitemap
 
-app.include_router(api_router)
+async def build_sitemap() -> str:
+    """Render sitemap.xml, cached until a blog is created, updated or deleted"""
+    sitemap = cache.get("sitemap")
+    if sitemap is not None:
+        return sitemap
+    return await flights.do("sitemap", None, load_sitemap)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+async def load_sitemap() -> str:
+    generation = cache.generation("sitemap")
+    blogs = await public_reads("blogs", "sitemap_xml", "sitemap").find(
+        {"published": True}, {"_id": 0, "slug": 1, "updated_at": 1}
+    ).to_list(1000)
+    return cache.set("sitemap", None, render_sitemap(blogs), generation)
+
+async def build_site_snapshot() -> Dict[str, Dict[str, bytes]]:
+    """Pre-serialize every published blog, SEO settings and the sitemap"""
+    blogs, settings = await asyncio.gather(
+        db.blogs.find({"published": True}, {"_id": 0}).sort("created_at", -1).to_list(None),
+        db.seo_settings.find({}, {"_id": 0}).to_list(1000),
+    )
+    blog_models = [Blog(**blog) for blog in blogs]
+    seo_models = [SEOSettings(**setting) for setting in settings]
+    return {
+        "blog": {blog.slug: blog.model_dump_json().encode() for blog in blog_models},
+        "blog_list": {"published": TypeAdapter(List[Blog]).dump_json(blog_models)},
+        "seo": {seo.page: seo.model_dump_json().encode() for seo in seo_models},
+        "seo_list": {"all": TypeAdapter(List[SEOSettings]).dump_json(seo_models)},
+        "sitemap": {"xml": render_sitemap(blogs).encode()},
+    }
+
+@api_router.get("/admin/slow-queries")
+async def get_slow_queries(
+    sort: str = "total_ms",
+    limit: int = 50,
+    admin: dict = Depends(get_current_admin)
+):
+    """Slow query shapes ranked by total, worst-case or count (admin only)"""
+    if sort not in ("total_ms", "max_ms", "count", "last_seen"):
+        raise HTTPException(status_code=400, detail="sort must be total_ms, max_ms, count or last_seen")
+    shapes = await db.slow_queries.find({}, {"_id": 0}).sort(sort, -1).limit(min(limit, 500)).to_list(500)
+    for shape in shapes:
+        shape['avg_ms'] = round(shape.get('total_ms', 0) / max(shape.get('count', 1), 1), 2)
+    return shapes
+
+@api_router.get("/sitemap/generate")
+async def generate_sitemap():
+    cached = snapshot_response("sitemap", "xml", "application/xml")
+    if cached is not None:
+        return cached
+    sitemap = await build_sitemap()
+    return Response(content=sitemap, media_type="application/xml")
 
 logging.basicConfig(
     level=logging.INFO,
@@ -615,13 +1430,58 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+async def warm_pool(size: int):
+    """Open `size` connections up front so the first requests don't pay for them"""
+    if size <= 0:
+        return
+    results = await asyncio.gather(*(db.command("ping") for _ in range(size)), return_exceptions=True)
+    errors = [r for r in results if isinstance(r, Exception)]
+    if errors:
+        logger.error(f"MongoDB pool warm-up failed: {str(errors[0])}")
+    else:
+        logger.info(f"MongoDB pool warmed with {size} connections")
 
-@app.get("/robots.txt", response_class=PlainTextResponse)
-async def robots_txt():
-    robots = await db.robots_txt.find_one({}, {"_id": 0}, sort=[("updated_at", -1)])
+def pool_report() -> Dict[str, Any]:
+    return {
+        "max_pool_size": MONGO_MAX_POOL_SIZE,
+        "min_pool_size": MONGO_MIN_POOL_SIZE,
+        "servers": pool_stats.snapshot(),
+    }
+
+@site_router.get("/health", include_in_schema=False)
+async def health():
+    """Liveness: the worker is serving; includes pool stats for sizing"""
+    return {"status": "ok", "pid": os.getpid(), "pool": pool_report()}
+
+@site_router.get("/ready", include_in_schema=False)
+async def ready():
+    """Readiness: MongoDB answers a ping within READY_TIMEOUT_SECONDS"""
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(db.command("ping"), READY_TIMEOUT_SECONDS)
+    except Exception as e:
+        return JSONResponse(status_code=503, content={
+            "status": "unavailable",
+            "error": str(e) or type(e).__name__,
+            "pool": pool_report(),
+        })
+    return {
+        "status": "ready",
+        "ping_ms": round((time.perf_counter() - started) * 1000, 2),
+        "pool": pool_report(),
+    }
+
+# Path is set at startup from DB_NAME unless a caller chose one already
+site_snapshot = SnapshotManager(None, build_site_snapshot, cache_bus)
+
+@site_router.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus scrape endpoint (per worker process)"""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@site_router.get("/robots.txt", response_class=PlainTextResponse)
+async def robots_txt(request: Request):
+    robots = await load_active_robots()
     if not robots:
         default_content = """User-agent: *
 Allow: /
@@ -634,46 +1494,71 @@ Crawl-delay: 1
 # Sitemap
 Sitemap: https://techresona.com/sitemap.xml"""
         return default_content
-    return robots['content']
+    headers = robots_headers(robots)
+    if not_modified(request, robots):
+        return Response(status_code=304, headers=headers)
+    return PlainTextResponse(robots['content'], headers=headers)
 
-@app.get("/sitemap.xml", response_class=Response)
+@site_router.get("/sitemap.xml", response_class=Response)
 async def sitemap_xml():
-    blogs = await db.blogs.find({"published": True}, {"_id": 0, "slug": 1, "updated_at": 1}).to_list(1000)
-    
-    base_url = "https://techresona.com"
-    
-    sitemap = '<?xml version="1.0" encoding="UTF-8"?>\n'
-    sitemap += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-    
-    static_pages = [
-        {"loc": "/", "priority": "1.0", "changefreq": "weekly"},
-        {"loc": "/about", "priority": "0.8", "changefreq": "monthly"},
-        {"loc": "/services", "priority": "0.9", "changefreq": "weekly"},
-        {"loc": "/contact", "priority": "0.7", "changefreq": "monthly"},
-        {"loc": "/blog", "priority": "0.8", "changefreq": "daily"},
-    ]
-    
-    for page in static_pages:
-        sitemap += f'  <url>\n'
-        sitemap += f'    <loc>{base_url}{page["loc"]}</loc>\n'
-        sitemap += f'    <changefreq>{page["changefreq"]}</changefreq>\n'
-        sitemap += f'    <priority>{page["priority"]}</priority>\n'
-        sitemap += f'  </url>\n'
-    
-    for blog in blogs:
-        updated = blog.get('updated_at')
-        if isinstance(updated, str):
-            lastmod = updated.split('T')[0]
-        else:
-            lastmod = datetime.now(timezone.utc).strftime('%Y-%m-%d')
-        
-        sitemap += f'  <url>\n'
-        sitemap += f'    <loc>{base_url}/blog/{blog["slug"]}</loc>\n'
-        sitemap += f'    <lastmod>{lastmod}</lastmod>\n'
-        sitemap += f'    <changefreq>monthly</changefreq>\n'
-        sitemap += f'    <priority>0.6</priority>\n'
-        sitemap += f'  </url>\n'
-    
-    sitemap += '</urlset>'
-    
-    return Response(content=sitemap, media_type="application/xml", headers={"Content-Type": "application/xml"})
\ No newline at end of file
+    cached = snapshot_response("sitemap", "xml", "application/xml")
+    if cached is not None:
+        return cached
+    sitemap = await build_sitemap()
+    return Response(content=sitemap, media_type="application/xml", headers={"Content-Type": "application/xml"})
+
+async def ensure_indexes():
+    try:
+        await db.contact_submissions.create_indexes(CONTACT_INDEXES)
+    except PyMongoError as e:
+        logger.warning(f"Could not index contact_submissions: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global client, db, _logo_pool
+    connect_db()
+    if site_snapshot.path is None:
+        site_snapshot.path = SNAPSHOT_DIR / f"techresona-{os.environ['DB_NAME']}.snapshot"
+    await warm_pool(MONGO_MIN_POOL_SIZE)
+    await slow_query_log.start(db)
+    await revision_store.start(db)
+    await ensure_indexes()
+    await cache_bus.start()
+    await site_snapshot.start()
+    await publish_scheduler.start(db)
+    try:
+        yield
+    finally:
+        await publish_scheduler.stop()
+        await site_snapshot.stop()
+        await cache_bus.stop()
+        await slow_query_log.stop()
+        client.close()
+        client = db = None
+        if _logo_pool is not None:
+            _logo_pool.shutdown(wait=False, cancel_futures=True)
+            _logo_pool = None
+
+def create_app() -> FastAPI:
+    """Assemble the ASGI app; the database and background tasks open in its lifespan"""
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(api_router)
+    app.include_router(site_router)
+
+    app.add_middleware(UploadLimitMiddleware, limits={
+        "/api/logo/upload": lambda: MAX_LOGO_BYTES + MULTIPART_OVERHEAD_BYTES,
+    })
+    cors_origins = os.environ.get('CORS_ORIGINS', '*').split(',')
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=cors_origins,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.add_middleware(timing.ServerTimingMiddleware, allow_origins=[o for o in cors_origins if o])
+    return app
+
+# For `uvicorn server:app`; `uvicorn server:create_app --factory` also works
+app = create_app()
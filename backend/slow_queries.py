@@ -0,0 +1,214 @@
+"""
+Slow-query log for Motor/pymongo commands.
+
+A CommandListener times every command; anything slower than SLOW_QUERY_MS is
+logged with its collection, duration and filter shape (values replaced by type
+placeholders), and aggregated per shape in the `slow_queries` collection. The
+first time a shape is seen its query plan can be captured with `explain`.
+Shapes, sorts and plans are stored as JSON strings: their operator keys
+(`$in`, `$eq`, ...) are not valid field names in a stored document.
+
+Listener callbacks run on driver threads, so they only push onto a thread-safe
+queue and wake an asyncio task on the app's loop, which does the logging and
+database writes.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import monitoring
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "true").lower() in ("1", "true", "yes")
+SLOW_QUERY_COLLECTION = "slow_queries"
+
+# Where each command keeps its filter, and which commands explain() accepts
+FILTER_FIELDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "aggregate": "pipeline",
+}
+EXPLAINABLE = {"find", "count", "distinct", "aggregate", "findAndModify", "update", "delete"}
+# Session/cluster fields the driver adds that explain must not receive
+DRIVER_FIELDS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "readConcern", "writeConcern"}
+IGNORED_COMMANDS = {"explain", "getMore", "killCursors", "endSessions", "hello", "isMaster", "ping", "saslStart", "saslContinue"}
+
+def query_shape(value: Any) -> Any:
+    """Replace literal values with type names, keeping keys and operators"""
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        # Keep pipelines' stage order; collapse $in-style value lists
+        if value and all(isinstance(v, dict) for v in value):
+            return [query_shape(v) for v in value]
+        return ["?"] if value else []
+    return f"<{type(value).__name__}>"
+
+def to_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+def command_filter(command_name: str, command: Dict[str, Any]) -> Any:
+    if command_name in ("update", "delete"):
+        statements = command.get("updates" if command_name == "update" else "deletes") or [{}]
+        return statements[0].get("q", {})
+    return command.get(FILTER_FIELDS.get(command_name, "filter"), {})
+
+class SlowQueryLog(monitoring.CommandListener):
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, explain: bool = SLOW_QUERY_EXPLAIN,
+                 collection: str = SLOW_QUERY_COLLECTION):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.collection_name = collection
+        self.db = None
+        self._pending: Dict[Tuple, Tuple[str, str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake = asyncio.Event()
+        self._explained = set()
+
+    # ---- driver thread side ----
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str) or collection == self.collection_name:
+            return
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (
+                event.database_name, collection, event.command
+            )
+
+    def _finish(self, event, failed: bool):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms >= self.threshold_ms:
+            database, collection, command = pending
+            self._queue.put((database, collection, event.command_name, command, duration_ms, failed))
+            loop = self._loop
+            if loop is not None:
+                try:
+                    loop.call_soon_threadsafe(self._wake.set)
+                except RuntimeError:
+                    # Loop already closed during shutdown
+                    pass
+
+    def succeeded(self, event):
+        self._finish(event, False)
+
+    def failed(self, event):
+        self._finish(event, True)
+
+    # ---- event loop side ----
+
+    async def start(self, db):
+        self.db = db
+        try:
+            await db[self.collection_name].create_index("shape_id", unique=True)
+        except PyMongoError as e:
+            logger.warning(f"Could not index {self.collection_name}: {str(e)}")
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._drain())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+
+    async def _drain(self):
+        while True:
+            # Cleared before emptying the queue, so a put racing the last
+            # get_nowait still sets it and the wait below returns at once
+            self._wake.clear()
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    await self._record(*item)
+                except PyMongoError as e:
+                    logger.error(f"Failed to record slow query: {str(e)}")
+            await self._wake.wait()
+
+    async def _record(self, database, collection, command_name, command, duration_ms, failed):
+        shape = query_shape(command_filter(command_name, command))
+        sort = command.get("sort")
+        shape_key = to_json({"c": collection, "cmd": command_name, "q": shape, "s": query_shape(sort) if sort else None})
+        shape_json = to_json(shape)
+        sort_shape = to_json(query_shape(sort)) if sort else None
+        shape_id = hashlib.sha1(shape_key.encode()).hexdigest()[:16]
+        logger.warning(
+            f"Slow query {duration_ms:.1f}ms {command_name} {collection} "
+            f"filter={shape_json}{' (failed)' if failed else ''}"
+        )
+
+        now = datetime.now(timezone.utc).isoformat()
+        result = await self.db[self.collection_name].update_one(
+            {"shape_id": shape_id},
+            {
+                "$setOnInsert": {
+                    "shape_id": shape_id,
+                    "database": database,
+                    "collection": collection,
+                    "command": command_name,
+                    "shape": shape_json,
+                    "sort": sort_shape,
+                    "first_seen": now,
+                },
+                "$inc": {"count": 1, "total_ms": duration_ms, "failures": int(failed)},
+                "$max": {"max_ms": duration_ms},
+                "$set": {"last_ms": duration_ms, "last_seen": now},
+            },
+            upsert=True,
+        )
+
+        if self.explain and result.upserted_id is not None and command_name in EXPLAINABLE \
+                and shape_id not in self._explained:
+            self._explained.add(shape_id)
+            await self._explain(database, shape_id, command)
+
+    async def _explain(self, database, shape_id, command):
+        explainable = {k: v for k, v in command.items() if k not in DRIVER_FIELDS}
+        try:
+            plan = await self.db.client[database].command(
+                {"explain": explainable, "verbosity": "executionStats"}
+            )
+        except PyMongoError as e:
+            logger.warning(f"Explain failed for slow query {shape_id}: {str(e)}")
+            return
+        stats = plan.get("executionStats", {})
+        await self.db[self.collection_name].update_one(
+            {"shape_id": shape_id},
+            {"$set": {
+                "explain": {
+                    "winning_plan": to_json(plan.get("queryPlanner", {}).get("winningPlan")),
+                    "docs_examined": stats.get("totalDocsExamined"),
+                    "keys_examined": stats.get("totalKeysExamined"),
+                    "returned": stats.get("nReturned"),
+                    "execution_ms": stats.get("executionTimeMillis"),
+                },
+            }},
+        )
@@ -0,0 +1,239 @@
+"""
+Shared, read-only snapshot of the published site for multi-worker deployments.
+
+One worker (the leader, elected with an flock on a lock file) renders every
+published blog, the blog list, SEO settings and the sitemap into pre-serialized
+blobs, writes them to a single file next to an index by section and key, and
+atomically renames it into place. Every worker mmaps the current file and
+serves slices of it, so the page cache holds one copy of the site no matter
+how many workers run.
+
+The snapshot is also refreshed every `SNAPSHOT_MAX_AGE_SECONDS`, so writes
+made outside the API (seed scripts, restores) are picked up without one.
+
+File layout: MAGIC | u64 generation | u32 index length | index JSON | blobs.
+The generation is the wall-clock time (ns) the build began reading, so a
+worker can tell whether a snapshot was built after its last invalidation.
+The index maps section -> key -> [offset, length], offsets relative to the
+start of the blob area.
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAX_AGE_SECONDS = float(os.environ.get("SNAPSHOT_MAX_AGE_SECONDS", "300"))
+MAGIC = b"TRSNAP01"
+HEADER = struct.Struct("<QI")
+
+def default_snapshot_dir() -> Path:
+    shm = Path("/dev/shm")
+    return shm if shm.is_dir() else Path(tempfile.gettempdir())
+
+def write_snapshot(path: Path, generation: int, sections: Dict[str, Dict[str, bytes]]):
+    """Write a snapshot to a temp file and rename it over `path`"""
+    index, blobs, offset = {}, [], 0
+    for section, entries in sections.items():
+        index[section] = {}
+        for key, blob in entries.items():
+            index[section][key] = [offset, len(blob)]
+            blobs.append(blob)
+            offset += len(blob)
+    index_bytes = json.dumps(index, separators=(",", ":")).encode()
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(HEADER.pack(generation, len(index_bytes)))
+            f.write(index_bytes)
+            for blob in blobs:
+                f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+class Snapshot:
+    """A mapped snapshot file. Renaming a newer file over the path does not
+    affect an open Snapshot; it keeps serving the old inode until closed."""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a site snapshot")
+        self.generation, index_len = HEADER.unpack_from(self._mm, len(MAGIC))
+        index_start = len(MAGIC) + HEADER.size
+        self._index = json.loads(self._mm[index_start:index_start + index_len])
+        self._base = index_start + index_len
+
+    def get(self, section: str, key: str) -> Optional[bytes]:
+        """A copy of the blob. A memoryview would save the copy, but the
+        response still needs bytes, and a live view keeps the mapping from
+        being closed when a newer snapshot replaces it."""
+        entry = self._index.get(section, {}).get(key)
+        if entry is None:
+            return None
+        start = self._base + entry[0]
+        return self._mm[start:start + entry[1]]
+
+    def close(self):
+        self._mm.close()
+
+class SnapshotManager:
+    """Keeps this worker's view of the shared snapshot current.
+
+    Any invalidation of a watched namespace marks the snapshot stale, so reads
+    fall back to the database until the leader publishes a rebuilt snapshot
+    (namespace "snapshot") over the invalidation bus whose build began after
+    that invalidation; an earlier build may not have seen the write.
+    """
+
+    def __init__(self, path: Optional[Path], build: Callable[[], Awaitable[Dict[str, Dict[str, bytes]]]],
+                 bus, watched=("blog", "blog_list", "seo", "seo_list", "sitemap"),
+                 max_age: float = SNAPSHOT_MAX_AGE_SECONDS):
+        self.path = Path(path) if path is not None else None
+        self.build = build
+        self.bus = bus
+        self.watched = set(watched)
+        self.snapshot: Optional[Snapshot] = None
+        self.stale = True
+        self._lock_fd: Optional[int] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+        self._rebuild_pending = False
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._invalidations = 0
+        self._invalidated_at = 0
+        self.max_age = max_age
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_fd is not None
+
+    async def start(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.bus.add_listener(self._on_invalidate)
+        if self.max_age > 0:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+        if not self._try_lead():
+            self._load()
+            return
+        try:
+            await self.rebuild()
+        except Exception as e:
+            # Serving falls back to the database until the next rebuild
+            logger.error(f"Failed to build site snapshot: {str(e)}")
+
+    async def stop(self):
+        self.bus.remove_listener(self._on_invalidate)
+        for task in (self._rebuild_task, self._refresh_task):
+            if task is not None:
+                task.cancel()
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def get(self, section: str, key: str) -> Optional[bytes]:
+        if self.stale or self.snapshot is None:
+            return None
+        return self.snapshot.get(section, key)
+
+    async def rebuild(self):
+        """Build, write and publish a snapshot. A build that a write raced may
+        hold pre-write data, so it is redone; nothing is published (and
+        readers keep falling back) until one completes with no write in between."""
+        while True:
+            seen = self._invalidations
+            generation = time.time_ns()
+            sections = await self.build()
+            if self._invalidations != seen:
+                continue
+            await asyncio.to_thread(write_snapshot, self.path, generation, sections)
+            if self._invalidations == seen:
+                break
+        self._load()
+        logger.info(f"Site snapshot {generation} written to {self.path}")
+        # Namespace-only: followers read the generation from the file, and a
+        # per-generation key would leave a LocalCache entry behind every rebuild
+        await self.bus.publish("snapshot")
+
+    def _try_lead(self) -> bool:
+        if self._lock_fd is not None:
+            return True
+        fd = os.open(f"{self.path}.lock", os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _load(self):
+        try:
+            snapshot = Snapshot(self.path)
+        except (FileNotFoundError, ValueError):
+            return
+        if self.snapshot is not None and snapshot.generation <= self.snapshot.generation:
+            snapshot.close()
+        else:
+            if self.snapshot is not None:
+                self.snapshot.close()
+            self.snapshot = snapshot
+        if self.snapshot.generation >= self._invalidated_at:
+            self.stale = False
+
+    def _on_invalidate(self, namespace, key):
+        if namespace == "snapshot":
+            self._load()
+            return
+        if namespace not in self.watched:
+            return
+        self._invalidations += 1
+        self._invalidated_at = time.time_ns()
+        self.stale = True
+        # The leader may have exited; whoever grabs the lock takes over
+        if self._try_lead():
+            self._schedule_rebuild()
+
+    def _schedule_rebuild(self):
+        if self._rebuild_task is not None and not self._rebuild_task.done():
+            self._rebuild_pending = True
+            return
+        self._rebuild_task = asyncio.get_running_loop().create_task(self._rebuild_loop())
+
+    async def _refresh_loop(self):
+        """Rebuild (leader) or reload (followers) at least every `max_age` seconds"""
+        while True:
+            await asyncio.sleep(self.max_age)
+            if self._try_lead():
+                self._schedule_rebuild()
+            else:
+                self._load()
+
+    async def _rebuild_loop(self):
+        while True:
+            self._rebuild_pending = False
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.error(f"Failed to rebuild site snapshot: {str(e)}")
+            if not self._rebuild_pending:
+                return
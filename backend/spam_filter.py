@@ -0,0 +1,138 @@
+"""
+Near-duplicate and spam screening for contact form submissions, run before
+the email and Slack notifications go out.
+
+Each submission gets a 64-bit SimHash over the words of its normalized
+message. Two submissions within `SIMHASH_MAX_DISTANCE` bits of each other in
+the last `SPAM_WINDOW_HOURS` are near-duplicates, as long as the message has
+at least `SPAM_MIN_DUPLICATE_WORDS` words. Only the message text is hashed:
+the sender's email and IP are used for the rate flag below and nothing else,
+since in a short message they would outweigh the text, and colleagues behind
+one company domain or NAT would look like duplicates.
+
+Lookups check an in-memory ring of this worker's recent fingerprints first,
+then MongoDB: the hash is split into eight 8-bit bands stored in an indexed
+array, and by pigeonhole any hash within 7 bits shares at least one band
+exactly.
+
+Submissions are also flagged for too many links, or for too many submissions
+from one email or IP in the window. Flagged submissions are stored as usual;
+the caller skips notifications for them.
+"""
+import hashlib
+import os
+import re
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+SPAM_WINDOW_HOURS = float(os.environ.get("SPAM_WINDOW_HOURS", "24"))
+SIMHASH_MAX_DISTANCE = int(os.environ.get("SIMHASH_MAX_DISTANCE", "7"))
+SPAM_MAX_LINKS = int(os.environ.get("SPAM_MAX_LINKS", "3"))
+SPAM_MAX_PER_SENDER = int(os.environ.get("SPAM_MAX_PER_SENDER", "5"))
+SPAM_MEMORY_SIZE = int(os.environ.get("SPAM_MEMORY_SIZE", "5000"))
+# Shorter messages ("Please call me back") are too generic to call duplicates
+SPAM_MIN_DUPLICATE_WORDS = int(os.environ.get("SPAM_MIN_DUPLICATE_WORDS", "8"))
+
+BANDS = 8
+BAND_BITS = 64 // BANDS
+# Band lookups only find hashes within BANDS - 1 bits
+MAX_INDEXED_DISTANCE = BANDS - 1
+MAX_CANDIDATES = 500
+URL = re.compile(r"https?://|www\.", re.IGNORECASE)
+WORD = re.compile(r"[a-z0-9]+")
+
+def normalize(message: str) -> List[str]:
+    """Lowercased words, with links reduced to a placeholder so rotated URLs still match"""
+    return WORD.findall(URL.sub(" link ", message.lower()))
+
+def feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+
+def simhash(words: List[str]) -> int:
+    # Single words rather than shingles: contact messages are short, and one
+    # edited word would otherwise change several features
+    weights: Dict[str, int] = {}
+    for feature in words:
+        weights[feature] = weights.get(feature, 0) + 1
+    totals = [0] * 64
+    for feature, weight in weights.items():
+        h = feature_hash(feature)
+        for bit in range(64):
+            totals[bit] += weight if h >> bit & 1 else -weight
+    return sum(1 << bit for bit, total in enumerate(totals) if total > 0)
+
+def bands(fingerprint: int) -> List[str]:
+    mask = (1 << BAND_BITS) - 1
+    return [f"{i}:{fingerprint >> (i * BAND_BITS) & mask:02x}" for i in range(BANDS)]
+
+def distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+class ContactScreen:
+    def __init__(self, window_hours: float = SPAM_WINDOW_HOURS, max_distance: int = SIMHASH_MAX_DISTANCE,
+                 max_links: int = SPAM_MAX_LINKS, max_per_sender: int = SPAM_MAX_PER_SENDER,
+                 memory_size: int = SPAM_MEMORY_SIZE, min_duplicate_words: int = SPAM_MIN_DUPLICATE_WORDS):
+        self.window = timedelta(hours=window_hours)
+        self.max_distance = min(max_distance, MAX_INDEXED_DISTANCE)
+        self.max_links = max_links
+        self.max_per_sender = max_per_sender
+        self.min_duplicate_words = min_duplicate_words
+        # (monotonic time, fingerprint, submission id), oldest first
+        self._recent = deque(maxlen=memory_size)
+
+    def _recent_match(self, fingerprint: int) -> Optional[str]:
+        horizon = time.monotonic() - self.window.total_seconds()
+        while self._recent and self._recent[0][0] < horizon:
+            self._recent.popleft()
+        for _, seen, submission_id in self._recent:
+            if distance(fingerprint, seen) <= self.max_distance:
+                return submission_id
+        return None
+
+    async def _stored_match(self, collection, fingerprint: int, since: str) -> Optional[str]:
+        candidates = await collection.find(
+            {"fingerprint_bands": {"$in": bands(fingerprint)}, "submitted_at": {"$gte": since}},
+            {"_id": 0, "id": 1, "fingerprint": 1},
+        ).sort("submitted_at", -1).limit(MAX_CANDIDATES).to_list(MAX_CANDIDATES)
+        for candidate in candidates:
+            if distance(fingerprint, int(candidate["fingerprint"], 16)) <= self.max_distance:
+                return candidate["id"]
+        return None
+
+    async def screen(self, collection, message: str, email: str, ip: Optional[str],
+                     now: datetime) -> Dict[str, Any]:
+        """Fingerprint a submission and decide which flags it gets; an empty
+        `flags` list means it should be notified"""
+        words = normalize(message)
+        fingerprint = simhash(words)
+        since = (now - self.window).isoformat()
+        flags = []
+        duplicate_of = None
+        if len(words) >= self.min_duplicate_words:
+            duplicate_of = self._recent_match(fingerprint)
+            if duplicate_of is None:
+                duplicate_of = await self._stored_match(collection, fingerprint, since)
+        if duplicate_of is not None:
+            flags.append("duplicate")
+        if len(URL.findall(message)) >= self.max_links:
+            flags.append("links")
+        if not flags:
+            senders = [{"email": email}] + ([{"ip": ip}] if ip else [])
+            for sender in senders:
+                recent = await collection.count_documents(
+                    {**sender, "submitted_at": {"$gte": since}}, limit=self.max_per_sender
+                )
+                if recent >= self.max_per_sender:
+                    flags.append("rate")
+                    break
+        return {
+            "fingerprint": f"{fingerprint:016x}",
+            "fingerprint_bands": bands(fingerprint),
+            "flags": flags,
+            "duplicate_of": duplicate_of,
+        }
+
+    def remember(self, verdict: Dict[str, Any], submission_id: str):
+        self._recent.append((time.monotonic(), int(verdict["fingerprint"], 16), submission_id))
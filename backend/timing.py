@@ -0,0 +1,147 @@
+"""
+Per-request phase timing, reported in the `Server-Timing` response header.
+
+A contextvar holds the timings of the request being handled. Code marks its
+phases with `with phase("auth"):`; MongoDB time is added by a CommandListener
+(Motor runs driver calls with a copy of the caller's context, so the listener
+sees the same request); serialization is measured by TimedRoute as the time
+between the endpoint returning and the response being ready. Phases
+exclude the MongoDB time spent inside them (an `auth` phase that looks up
+the admin reports only the token check; the lookup is under `db`), so the
+phases other than `app` don't overlap.
+
+Example header: auth;dur=0.4, db;dur=3.1;desc="2 calls", serialize;dur=0.2, app;dur=4.9
+"""
+import asyncio
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from fastapi.routing import APIRoute
+from pymongo import monitoring
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.endpoint_done: Optional[float] = None
+        self._durations: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self._durations[name] = self._durations.get(name, 0.0) + seconds
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def total(self, name: str) -> float:
+        with self._lock:
+            return self._durations.get(name, 0.0)
+
+    def header(self) -> str:
+        with self._lock:
+            items = list(self._durations.items())
+            counts = dict(self._counts)
+        parts = []
+        for name, seconds in items:
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if counts[name] > 1:
+                entry += f';desc="{counts[name]} calls"'
+            parts.append(entry)
+        parts.append(f"app;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+@contextmanager
+def phase(name: str):
+    """Add the wall time of the block, less the MongoDB time inside it, to
+    the current request's `name` phase"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    db_before = timings.total("db")
+    try:
+        yield
+    finally:
+        db_inside = timings.total("db") - db_before
+        timings.add(name, max(time.perf_counter() - started - db_inside, 0.0))
+
+class ServerTimingMiddleware:
+    """Installs a RequestTimings for each HTTP request and emits the header"""
+
+    def __init__(self, app, allow_origins=()):
+        self.app = app
+        # Browsers only show Server-Timing cross-origin when this header allows it
+        self.timing_allow_origin = ", ".join(allow_origins).encode("latin-1") if allow_origins else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.header().encode("latin-1")))
+                if self.timing_allow_origin:
+                    headers.append((b"timing-allow-origin", self.timing_allow_origin))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+
+class TimedRoute(APIRoute):
+    """APIRoute that records response serialization as its own phase"""
+
+    def get_route_handler(self):
+        endpoint = self.dependant.call
+        if asyncio.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def timed_endpoint(*args, **kwargs):
+                try:
+                    return await endpoint(*args, **kwargs)
+                finally:
+                    timings = _current.get()
+                    if timings is not None:
+                        timings.endpoint_done = time.perf_counter()
+
+            self.dependant.call = timed_endpoint
+
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timings = _current.get()
+            if timings is not None and timings.endpoint_done is not None:
+                timings.add("serialize", time.perf_counter() - timings.endpoint_done)
+            return response
+
+        return timed_handler
+
+class MongoTimingListener(monitoring.CommandListener):
+    """Adds each command's server round-trip time to the request's `db` phase"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        timings = _current.get()
+        if timings is not None:
+            timings.add("db", event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self.succeeded(event)
@@ -1,19 +1,36 @@
-import requests
-import sys
+import argparse
+import asyncio
+import httpx
 import json
-from datetime import datetime
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+REPORTS_DIR = ROOT_DIR / "test_reports"
+REMOTE_BASE_URL = "https://crawler-friendly-web.preview.emergentagent.com"
+IN_PROCESS_BASE_URL = "http://techresona.test"
 
 class TechResonaAPITester:
-    def __init__(self, base_url="https://crawler-friendly-web.preview.emergentagent.com"):
+    def __init__(self, client, base_url=REMOTE_BASE_URL, admin_email="admin@techresona.com", admin_password="admin123"):
+        self.client = client
         self.base_url = base_url
         self.api_url = f"{base_url}/api"
+        self.admin_email = admin_email
+        self.admin_password = admin_password
         self.token = None
         self.tests_run = 0
         self.tests_passed = 0
         self.failed_tests = []
+        self.timings = []
 
-    def run_test(self, name, method, endpoint, expected_status, data=None, headers=None):
-        """Run a single API test"""
+    async def run_test(self, name, method, endpoint, expected_status, data=None, headers=None):
+        """Run a single API test and record its latency"""
         url = f"{self.api_url}/{endpoint}" if not endpoint.startswith('http') else endpoint
         test_headers = {'Content-Type': 'application/json'}
         
@@ -23,29 +40,23 @@ class TechResonaAPITester:
             test_headers.update(headers)
 
         self.tests_run += 1
-        print(f"\n🔍 Testing {name}...")
-        print(f"   URL: {url}")
+        started = time.perf_counter()
         
         try:
-            if method == 'GET':
-                response = requests.get(url, headers=test_headers, timeout=30)
-            elif method == 'POST':
-                response = requests.post(url, json=data, headers=test_headers, timeout=30)
-            elif method == 'PUT':
-                response = requests.put(url, json=data, headers=test_headers, timeout=30)
-            elif method == 'DELETE':
-                response = requests.delete(url, headers=test_headers, timeout=30)
+            response = await self.client.request(method, url, json=data, headers=test_headers, timeout=30)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.timings.append({'test': name, 'ms': round(elapsed_ms, 2), 'status': response.status_code})
 
             success = response.status_code == expected_status
             if success:
                 self.tests_passed += 1
-                print(f"✅ Passed - Status: {response.status_code}")
+                print(f"✅ {name} - Status: {response.status_code} ({elapsed_ms:.1f} ms)")
                 try:
                     return success, response.json() if response.content else {}
                 except:
                     return success, {}
             else:
-                print(f"❌ Failed - Expected {expected_status}, got {response.status_code}")
+                print(f"❌ {name} - Expected {expected_status}, got {response.status_code} ({elapsed_ms:.1f} ms)")
                 print(f"   Response: {response.text[:200]}")
                 self.failed_tests.append({
                     'test': name,
@@ -56,19 +67,21 @@ class TechResonaAPITester:
                 return False, {}
 
         except Exception as e:
-            print(f"❌ Failed - Error: {str(e)}")
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.timings.append({'test': name, 'ms': round(elapsed_ms, 2), 'status': None})
+            print(f"❌ {name} - Error: {str(e)}")
             self.failed_tests.append({
                 'test': name,
                 'error': str(e)
             })
             return False, {}
 
-    def test_seo_endpoints(self):
+    async def test_seo_endpoints(self):
         """Test SEO verification endpoints"""
         print("\n📋 Testing SEO Endpoints...")
         
         # Test robots.txt
-        robots_success, _ = self.run_test(
+        robots_success, _ = await self.run_test(
             "robots.txt endpoint",
             "GET",
             f"{self.base_url}/robots.txt",
@@ -76,7 +89,7 @@ class TechResonaAPITester:
         )
         
         # Test sitemap.xml
-        sitemap_success, _ = self.run_test(
+        sitemap_success, _ = await self.run_test(
             "sitemap.xml endpoint",
             "GET", 
             f"{self.base_url}/sitemap.xml",
@@ -85,17 +98,17 @@ class TechResonaAPITester:
         
         return robots_success and sitemap_success
 
-    def test_authentication(self):
+    async def test_authentication(self):
         """Test admin authentication"""
         print("\n🔐 Testing Authentication...")
         
         # Test login with correct credentials
-        success, response = self.run_test(
+        success, response = await self.run_test(
             "Admin Login",
             "POST",
             "auth/login",
             200,
-            data={"email": "admin@techresona.com", "password": "admin123"}
+            data={"email": self.admin_email, "password": self.admin_password}
         )
         
         if success and 'access_token' in response:
@@ -106,12 +119,12 @@ class TechResonaAPITester:
             print("❌ Failed to get authentication token")
             return False
 
-    def test_public_endpoints(self):
+    async def test_public_endpoints(self):
         """Test public endpoints that don't require authentication"""
         print("\n🌐 Testing Public Endpoints...")
         
         # Test get all blogs (public)
-        blogs_success, blogs_response = self.run_test(
+        blogs_success, blogs_response = await self.run_test(
             "Get Public Blogs",
             "GET",
             "blogs",
@@ -122,7 +135,7 @@ class TechResonaAPITester:
         if blogs_success and blogs_response and len(blogs_response) > 0:
             # Test get specific blog
             first_blog_slug = blogs_response[0]['slug']
-            blog_detail_success, _ = self.run_test(
+            blog_detail_success, _ = await self.run_test(
                 f"Get Blog Detail ({first_blog_slug})",
                 "GET",
                 f"blogs/{first_blog_slug}",
@@ -130,7 +143,7 @@ class TechResonaAPITester:
             )
         
         # Test get SEO settings (public)
-        seo_success, _ = self.run_test(
+        seo_success, _ = await self.run_test(
             "Get SEO Settings",
             "GET",
             "seo",
@@ -139,7 +152,7 @@ class TechResonaAPITester:
         
         return blogs_success and blog_detail_success and seo_success
 
-    def test_admin_endpoints(self):
+    async def test_admin_endpoints(self):
         """Test admin-only endpoints"""
         if not self.token:
             print("❌ No authentication token available for admin tests")
@@ -148,7 +161,7 @@ class TechResonaAPITester:
         print("\n👨‍💼 Testing Admin Endpoints...")
         
         # Test analytics
-        analytics_success, analytics_data = self.run_test(
+        analytics_success, analytics_data = await self.run_test(
             "Get Analytics",
             "GET",
             "analytics",
@@ -156,7 +169,7 @@ class TechResonaAPITester:
         )
         
         # Test keywords
-        keywords_success, _ = self.run_test(
+        keywords_success, _ = await self.run_test(
             "Get Keywords",
             "GET",
             "keywords",
@@ -164,7 +177,7 @@ class TechResonaAPITester:
         )
         
         # Test robots.txt management
-        robots_get_success, robots_data = self.run_test(
+        robots_get_success, robots_data = await self.run_test(
             "Get robots.txt content",
             "GET",
             "robots-txt",
@@ -172,7 +185,7 @@ class TechResonaAPITester:
         )
         
         # Test sitemap generation
-        sitemap_gen_success, _ = self.run_test(
+        sitemap_gen_success, _ = await self.run_test(
             "Generate Sitemap",
             "GET",
             "sitemap/generate",
@@ -181,7 +194,7 @@ class TechResonaAPITester:
         
         return analytics_success and keywords_success and robots_get_success and sitemap_gen_success
 
-    def test_seo_management(self):
+    async def test_seo_management(self):
         """Test SEO management functionality"""
         if not self.token:
             print("❌ No authentication token available for SEO tests")
@@ -198,7 +211,7 @@ class TechResonaAPITester:
             "og_image": "https://example.com/test.jpg"
         }
         
-        seo_create_success, _ = self.run_test(
+        seo_create_success, _ = await self.run_test(
             "Create SEO Settings",
             "PUT",
             "seo/test-page",
@@ -207,7 +220,7 @@ class TechResonaAPITester:
         )
         
         # Test get specific SEO settings
-        seo_get_success, _ = self.run_test(
+        seo_get_success, _ = await self.run_test(
             "Get Specific SEO Settings",
             "GET",
             "seo/test-page",
@@ -216,7 +229,7 @@ class TechResonaAPITester:
         
         return seo_create_success and seo_get_success
 
-    def test_blog_management(self):
+    async def test_blog_management(self):
         """Test blog management functionality"""
         if not self.token:
             print("❌ No authentication token available for blog tests")
@@ -224,9 +237,10 @@ class TechResonaAPITester:
             
         print("\n📝 Testing Blog Management...")
         
-        # Test create blog
+        # Test create blog (unique slug: the fixtures already hold test-blog-post)
+        slug = f"test-blog-post-{uuid.uuid4().hex[:8]}"
         blog_data = {
-            "slug": "test-blog-post",
+            "slug": slug,
             "title": "Test Blog Post",
             "excerpt": "This is a test blog post excerpt",
             "content": "This is the full content of the test blog post.",
@@ -236,11 +250,11 @@ class TechResonaAPITester:
             "published": True
         }
         
-        blog_create_success, _ = self.run_test(
+        blog_create_success, _ = await self.run_test(
             "Create Blog Post",
             "POST",
             "blogs",
-            201,
+            200,
             data=blog_data
         )
         
@@ -251,19 +265,19 @@ class TechResonaAPITester:
                 "content": "Updated content for the test blog post."
             }
             
-            blog_update_success, _ = self.run_test(
+            blog_update_success, _ = await self.run_test(
                 "Update Blog Post",
                 "PUT",
-                "blogs/test-blog-post",
+                f"blogs/{slug}",
                 200,
                 data=update_data
             )
             
             # Test delete blog
-            blog_delete_success, _ = self.run_test(
+            blog_delete_success, _ = await self.run_test(
                 "Delete Blog Post",
                 "DELETE",
-                "blogs/test-blog-post",
+                f"blogs/{slug}",
                 200
             )
             
@@ -271,7 +285,7 @@ class TechResonaAPITester:
         
         return False
 
-    def test_keyword_tracking(self):
+    async def test_keyword_tracking(self):
         """Test keyword tracking functionality"""
         if not self.token:
             print("❌ No authentication token available for keyword tests")
@@ -288,7 +302,7 @@ class TechResonaAPITester:
             "difficulty": "Low"
         }
         
-        keyword_create_success, keyword_response = self.run_test(
+        keyword_create_success, keyword_response = await self.run_test(
             "Add Keyword",
             "POST",
             "keywords",
@@ -299,7 +313,7 @@ class TechResonaAPITester:
         # Test delete keyword
         if keyword_create_success and keyword_response and 'id' in keyword_response:
             keyword_id = keyword_response['id']
-            keyword_delete_success, _ = self.run_test(
+            keyword_delete_success, _ = await self.run_test(
                 "Delete Keyword",
                 "DELETE",
                 f"keywords/{keyword_id}",
@@ -309,7 +323,7 @@ class TechResonaAPITester:
         
         return False
 
-    def test_contact_form_api(self):
+    async def test_contact_form_api(self):
         """Test contact form submission API with email notifications"""
         print("\n📧 Testing Contact Form API...")
         
@@ -322,7 +336,7 @@ class TechResonaAPITester:
             "message": "Testing email and Slack notifications after configuration update"
         }
         
-        contact_success, contact_response = self.run_test(
+        contact_success, contact_response = await self.run_test(
             "Contact Form Submission",
             "POST",
             "contact/submit",
@@ -352,7 +366,7 @@ class TechResonaAPITester:
             "company": "Test Company"
         }
         
-        validation_success, _ = self.run_test(
+        validation_success, _ = await self.run_test(
             "Contact Form Validation (Missing Fields)",
             "POST",
             "contact/submit",
@@ -367,7 +381,7 @@ class TechResonaAPITester:
             "message": "Test message"
         }
         
-        email_validation_success, _ = self.run_test(
+        email_validation_success, _ = await self.run_test(
             "Contact Form Validation (Invalid Email)",
             "POST",
             "contact/submit",
@@ -377,7 +391,7 @@ class TechResonaAPITester:
         
         return contact_success and validation_success and email_validation_success
 
-    def test_contact_submissions_admin(self):
+    async def test_contact_submissions_admin(self):
         """Test admin access to contact submissions"""
         if not self.token:
             print("❌ No authentication token available for contact submissions test")
@@ -385,41 +399,107 @@ class TechResonaAPITester:
             
         print("\n👨‍💼 Testing Contact Submissions (Admin)...")
         
-        # Test get all contact submissions (admin only)
-        submissions_success, submissions_response = self.run_test(
-            "Get Contact Submissions (Admin)",
-            "GET",
-            "contact/submissions",
-            200
-        )
-        
-        if submissions_success and isinstance(submissions_response, list):
-            print(f"✅ Retrieved {len(submissions_response)} contact submissions")
-            return True
-        elif submissions_success:
-            print("✅ Contact submissions endpoint accessible (empty list)")
-            return True
-        
-        return False
+        # Page through the inbox (small pages, so next_cursor is exercised)
+        seen = []
+        cursor = None
+        for page in range(1, 51):
+            endpoint = "contact/submissions?limit=2" + (f"&cursor={cursor}" if cursor else "")
+            success, response = await self.run_test(
+                f"Get Contact Submissions (Admin) page {page}",
+                "GET",
+                endpoint,
+                200
+            )
+            if not success:
+                return False
+            if not isinstance(response, dict) or not isinstance(response.get('items'), list) or 'next_cursor' not in response:
+                print(f"❌ Unexpected inbox response shape: {str(response)[:200]}")
+                return False
+            seen.extend(response['items'])
+            cursor = response['next_cursor']
+            if not cursor:
+                break
+        
+        ids = [item['id'] for item in seen]
+        if len(ids) != len(set(ids)):
+            print("❌ Contact submissions repeated across pages")
+            return False
+        order = [(item['submitted_at'], item['id']) for item in seen]
+        if order != sorted(order, reverse=True):
+            print("❌ Contact submissions not ordered newest first")
+            return False
+        print(f"✅ Retrieved {len(seen)} contact submissions across {page} page(s)")
+        return True
+
+# Groups within a stage touch independent data and run concurrently; the admin
+# stage needs the token obtained by `authentication`.
+TEST_STAGES = [
+    ['seo_endpoints', 'public_endpoints', 'contact_form_api', 'authentication'],
+    ['admin_endpoints', 'contact_submissions_admin', 'seo_management', 'blog_management', 'keyword_tracking'],
+]
+
+async def run_suite(tester):
+    test_results, group_ms = {}, {}
+
+    async def run_group(name):
+        started = time.perf_counter()
+        test_results[name] = await getattr(tester, f"test_{name}")()
+        group_ms[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    for stage in TEST_STAGES:
+        await asyncio.gather(*(run_group(name) for name in stage))
+    order = [name for stage in TEST_STAGES for name in stage]
+    return {name: test_results[name] for name in order}, group_ms
+
+@asynccontextmanager
+async def in_process_client(args):
+    """An httpx client wired to server.app, with fixtures loaded into mongomock or a local mongod"""
+    sys.path.insert(0, str(ROOT_DIR / "backend"))
+    import benchmark
 
-def main():
-    print("🚀 Starting TechResona API Testing...")
+    bench_args = benchmark.parse_args(["--mongo", args.mongo, "--mongo-url", args.mongo_url, "--db", args.db])
+    benchmark.configure_environment(bench_args)
+    snapshot_dir = tempfile.mkdtemp(prefix="techresona-api-test-")
+    server = benchmark.prepare_server(bench_args, snapshot_dir, benchmark.CallCounter())
+    try:
+        async with server.app.router.lifespan_context(server.app):
+            await benchmark.load_data(server, 1, cold=False)
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app)) as client:
+                yield client, benchmark.BENCH_ADMIN_EMAIL, benchmark.BENCH_ADMIN_PASSWORD
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+@asynccontextmanager
+async def remote_client(args):
+    async with httpx.AsyncClient() as client:
+        yield client, "admin@techresona.com", "admin123"
+
+async def run(args):
+    started = time.perf_counter()
+    connect = remote_client if args.base_url else in_process_client
+    async with connect(args) as (client, email, password):
+        tester = TechResonaAPITester(client, args.base_url or IN_PROCESS_BASE_URL, email, password)
+        test_results, group_ms = await run_suite(tester)
+    return tester, test_results, group_ms, time.perf_counter() - started
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="TechResona API tests (in-process by default)")
+    parser.add_argument("--base-url", help=f"Test a running deployment instead, e.g. {REMOTE_BASE_URL}")
+    parser.add_argument("--mongo", choices=["mock", "local"], default="mock",
+                        help="In-process database: mongomock-motor or a local mongod")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="techresona_api_test", help="In-process database name (overwritten)")
+    parser.add_argument("--report", nargs="?", const="",
+                        help="Write a JSON report (default path: test_reports/api_test_<timestamp>.json)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    target = args.base_url or f"in-process app ({args.mongo})"
+    print(f"🚀 Starting TechResona API Testing against {target}...")
     print("=" * 50)
     
-    tester = TechResonaAPITester()
-    
-    # Test sequence
-    test_results = {
-        'seo_endpoints': tester.test_seo_endpoints(),
-        'public_endpoints': tester.test_public_endpoints(),
-        'contact_form_api': tester.test_contact_form_api(),
-        'authentication': tester.test_authentication(),
-        'admin_endpoints': tester.test_admin_endpoints(),
-        'contact_submissions_admin': tester.test_contact_submissions_admin(),
-        'seo_management': tester.test_seo_management(),
-        'blog_management': tester.test_blog_management(),
-        'keyword_tracking': tester.test_keyword_tracking()
-    }
+    tester, test_results, group_ms, elapsed = asyncio.run(run(args))
     
     # Print summary
     print("\n" + "=" * 50)
@@ -429,11 +509,16 @@ def main():
     print(f"Tests passed: {tester.tests_passed}")
     print(f"Tests failed: {tester.tests_run - tester.tests_passed}")
     print(f"Success rate: {(tester.tests_passed / tester.tests_run * 100):.1f}%")
+    print(f"Wall time: {elapsed:.2f}s")
     
     print("\n📋 Test Categories:")
     for category, result in test_results.items():
         status = "✅ PASS" if result else "❌ FAIL"
-        print(f"  {category}: {status}")
+        print(f"  {category}: {status} ({group_ms[category]:.1f} ms)")
+    
+    print("\n🐢 Slowest Tests:")
+    for timing in sorted(tester.timings, key=lambda t: t['ms'], reverse=True)[:5]:
+        print(f"  {timing['ms']:>9.1f} ms  {timing['test']}")
     
     if tester.failed_tests:
         print("\n❌ Failed Tests Details:")
@@ -444,8 +529,24 @@ def main():
             else:
                 print(f"     Expected: {failure.get('expected')}, Got: {failure.get('actual')}")
     
+    if args.report is not None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        path = Path(args.report or REPORTS_DIR / f"api_test_{stamp}.json")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            'target': target,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'seconds': round(elapsed, 3),
+            'tests_run': tester.tests_run,
+            'tests_passed': tester.tests_passed,
+            'categories': {name: {'passed': result, 'ms': group_ms[name]} for name, result in test_results.items()},
+            'tests': tester.timings,
+            'failed_tests': tester.failed_tests,
+        }, indent=2) + "\n")
+        print(f"\n📝 Report written to {path}")
+    
     # Return exit code
     return 0 if tester.tests_passed == tester.tests_run else 1
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
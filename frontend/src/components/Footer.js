@@ -1,8 +1,10 @@
 import React from 'react';
 import { Link } from 'react-router-dom';
 import { Mail, Phone, MapPin, Linkedin, Twitter, Facebook, MessageCircle } from 'lucide-react';
+import { useLogo } from '@/hooks/use-logo';
 
 const Footer = () => {
+  const logo = useLogo(48);
   return (
     <footer className="bg-slate-900 text-white">
       <div className="max-w-7xl mx-auto px-6 lg:px-12 py-16">
@@ -10,7 +12,8 @@ const Footer = () => {
           <div className="md:col-span-4">
             <Link to="/" className="flex items-center space-x-3 mb-6">
               <img 
-                src="/logo.png" 
+                src={logo.src}
+                srcSet={logo.srcSet} 
                 alt="TechResona Logo" 
                 className="h-12 w-auto"
                 onError={(e) => {
@@ -1,10 +1,12 @@
 import React from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { Menu, X } from 'lucide-react';
+import { useLogo } from '@/hooks/use-logo';
 
 const Navbar = () => {
   const [isOpen, setIsOpen] = React.useState(false);
   const navigate = useNavigate();
+  const logo = useLogo(48);
 
   return (
     <nav className="fixed top-0 left-0 right-0 z-50 glass-panel">
@@ -12,7 +14,8 @@ const Navbar = () => {
         <div className="flex items-center justify-between h-20">
           <Link to="/" className="flex items-center space-x-3" data-testid="logo-link">
             <img 
-              src="/logo.png" 
+              src={logo.src}
+              srcSet={logo.srcSet} 
               alt="TechResona Logo" 
               className="h-12 w-auto"
               onError={(e) => {
@@ -0,0 +1,63 @@
+import * as React from "react"
+import axios from "axios"
+
+import { pendingPageBundle } from "@/hooks/use-page-bundle"
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || ""
+const FALLBACK_LOGO = "/logo.png"
+
+// One request per page load, shared by every component that shows the logo
+let logoRequest = null
+
+function requestLogo() {
+  return axios
+    .get(`${BACKEND_URL}/api/logo/current`)
+    .then((res) => res.data)
+    .catch(() => null)
+}
+
+function fetchLogo() {
+  if (!logoRequest) {
+    // Navbar and Footer effects run before their page's, so wait for the rest
+    // of the commit: pages using usePageBundle then have the logo on the way
+    logoRequest = Promise.resolve().then(() => {
+      const bundle = pendingPageBundle()
+      return bundle ? bundle.then((data) => data?.logo || requestLogo()) : requestLogo()
+    })
+  }
+  return logoRequest
+}
+
+function assetUrl(path) {
+  return path && path.startsWith("/api/") ? `${BACKEND_URL}${path}` : path
+}
+
+// Returns {src, srcSet} for the content-hashed logo rendered at `height` CSS px.
+// Hashed URLs are cached forever by the browser; a new upload changes the URL.
+function useLogo(height = 48) {
+  const [logo, setLogo] = React.useState(null)
+
+  React.useEffect(() => {
+    let active = true
+    fetchLogo().then((data) => {
+      if (active) setLogo(data)
+    })
+    return () => {
+      active = false
+    }
+  }, [])
+
+  const variants = logo?.variants || {}
+  const x1 = variants[`h${height}_webp`] || variants[`h${height}_png`]
+  const x2 = variants[`h${height * 2}_webp`] || variants[`h${height * 2}_png`]
+  if (!x1 && !x2) {
+    return { src: assetUrl(logo?.path) || FALLBACK_LOGO, srcSet: undefined }
+  }
+  const base = x1 || x2
+  return {
+    src: assetUrl(base.path),
+    srcSet: x1 && x2 ? `${assetUrl(x1.path)} 1x, ${assetUrl(x2.path)} 2x` : undefined,
+  }
+}
+
+export { useLogo }
@@ -0,0 +1,50 @@
+import * as React from "react"
+import axios from "axios"
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || ""
+
+// In-flight bundle requests by page/slug, dropped once settled so a later
+// visit fetches fresh content. useLogo takes the logo from one of them instead
+// of making its own round-trip.
+const bundleRequests = new Map()
+
+function fetchPageBundle(page, slug) {
+  const key = slug ? `${page}/${slug}` : page
+  if (!bundleRequests.has(key)) {
+    const request = axios
+      .get(`${BACKEND_URL}/api/page-bundle/${page}`, { params: slug ? { slug } : undefined })
+      .then((res) => res.data)
+      .catch(() => null)
+      .finally(() => bundleRequests.delete(key))
+    bundleRequests.set(key, request)
+  }
+  return bundleRequests.get(key)
+}
+
+function pendingPageBundle() {
+  const pending = Array.from(bundleRequests.values())
+  return pending.length ? pending[pending.length - 1] : null
+}
+
+// Returns {bundle, loading} for a public page: bundle is {seo, blogs | blog, logo},
+// or null if the request failed. The request starts in an effect; useLogo
+// looks for it once the whole commit's effects have run.
+function usePageBundle(page, slug) {
+  const key = slug ? `${page}/${slug}` : page
+  const [result, setResult] = React.useState({ key: null, bundle: null })
+
+  React.useEffect(() => {
+    let active = true
+    fetchPageBundle(page, slug).then((bundle) => {
+      if (active) setResult({ key, bundle })
+    })
+    return () => {
+      active = false
+    }
+  }, [page, slug, key])
+
+  const loading = result.key !== key
+  return { bundle: loading ? null : result.bundle, loading }
+}
+
+export { usePageBundle, pendingPageBundle }
@@ -1,20 +1,14 @@
-import React, { useEffect, useState } from 'react';
+import React from 'react';
 import { motion } from 'framer-motion';
 import { Target, Users, Globe, Award } from 'lucide-react';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
 import SEOHead from '../components/SEOHead';
-import axios from 'axios';
-
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
+import { usePageBundle } from '@/hooks/use-page-bundle';
 
 const AboutPage = () => {
-  const [seoData, setSeoData] = useState(null);
-
-  useEffect(() => {
-    axios.get(`${API}/seo/about`).then(res => setSeoData(res.data)).catch(() => {});
-  }, []);
+  const { bundle } = usePageBundle('about');
+  const seoData = bundle?.seo;
 
   return (
     <>
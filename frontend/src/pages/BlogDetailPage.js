@@ -1,34 +1,17 @@
-import React, { useEffect, useState } from 'react';
+import React from 'react';
 import { motion } from 'framer-motion';
-import { Calendar, User, ArrowLeft } from 'lucide-react';
+import { Calendar, User, ArrowLeft, Clock } from 'lucide-react';
 import { useParams, useNavigate } from 'react-router-dom';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
 import SEOHead from '../components/SEOHead';
-import axios from 'axios';
-
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
+import { usePageBundle } from '@/hooks/use-page-bundle';
 
 const BlogDetailPage = () => {
   const { slug } = useParams();
   const navigate = useNavigate();
-  const [blog, setBlog] = useState(null);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    const fetchBlog = async () => {
-      try {
-        const response = await axios.get(`${API}/blogs/${slug}`);
-        setBlog(response.data);
-      } catch (error) {
-        console.error('Error fetching blog:', error);
-      } finally {
-        setLoading(false);
-      }
-    };
-    fetchBlog();
-  }, [slug]);
+  const { bundle, loading } = usePageBundle('blog', slug);
+  const blog = bundle?.blog;
 
   const formatDate = (dateStr) => {
     try {
@@ -140,12 +123,33 @@ const BlogDetailPage = () => {
                   <User size={20} />
                   <span>{blog.author}</span>
                 </div>
+                {blog.reading_time_minutes > 0 && (
+                  <div className="flex items-center space-x-2" data-testid="blog-reading-time">
+                    <Clock size={20} />
+                    <span>{blog.reading_time_minutes} min read</span>
+                  </div>
+                )}
               </div>
 
               <h1 className="text-4xl sm:text-5xl lg:text-6xl font-bold text-slate-900 mb-6 font-heading" data-testid="blog-detail-title">
                 {blog.title}
               </h1>
 
+              {blog.toc?.length > 2 && (
+                <nav className="mb-10 p-6 bg-slate-50 rounded-2xl" aria-label="Table of contents" data-testid="blog-toc">
+                  <p className="font-semibold text-slate-900 mb-3">In this article</p>
+                  <ul className="space-y-2">
+                    {blog.toc.map((entry) => (
+                      <li key={entry.id} className={entry.level > 2 ? 'ml-4' : ''}>
+                        <a href={`#${entry.id}`} className="text-indigo-700 hover:text-indigo-800">
+                          {entry.text}
+                        </a>
+                      </li>
+                    ))}
+                  </ul>
+                </nav>
+              )}
+
               <div 
                 className="prose prose-lg max-w-none blog-content" 
                 data-testid="blog-detail-content"
@@ -1,39 +1,18 @@
-import React, { useEffect, useState } from 'react';
+import React from 'react';
 import { motion } from 'framer-motion';
 import { Calendar, User, ArrowRight } from 'lucide-react';
 import { useNavigate } from 'react-router-dom';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
 import SEOHead from '../components/SEOHead';
-import axios from 'axios';
-
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
+import { usePageBundle } from '@/hooks/use-page-bundle';
 
 const BlogListPage = () => {
-  const [blogs, setBlogs] = useState([]);
-  const [seoData, setSeoData] = useState(null);
-  const [loading, setLoading] = useState(true);
+  const { bundle, loading } = usePageBundle('blog');
+  const blogs = bundle?.blogs || [];
+  const seoData = bundle?.seo;
   const navigate = useNavigate();
 
-  useEffect(() => {
-    const fetchData = async () => {
-      try {
-        const [blogsRes, seoRes] = await Promise.all([
-          axios.get(`${API}/blogs`),
-          axios.get(`${API}/seo/blog`).catch(() => ({}))
-        ]);
-        setBlogs(blogsRes.data);
-        if (seoRes.data) setSeoData(seoRes.data);
-      } catch (error) {
-        console.error('Error fetching blogs:', error);
-      } finally {
-        setLoading(false);
-      }
-    };
-    fetchData();
-  }, []);
-
   const formatDate = (dateStr) => {
     try {
       return new Date(dateStr).toLocaleDateString('en-US', { year: 'numeric', month: 'long', day: 'numeric' });
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { motion } from 'framer-motion';
 import { Mail, Phone, MapPin, Send, MessageCircle } from 'lucide-react';
 import Navbar from '../components/Navbar';
@@ -6,12 +6,14 @@ import Footer from '../components/Footer';
 import SEOHead from '../components/SEOHead';
 import { toast } from 'sonner';
 import axios from 'axios';
+import { usePageBundle } from '@/hooks/use-page-bundle';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
 const ContactPage = () => {
-  const [seoData, setSeoData] = useState(null);
+  const { bundle } = usePageBundle('contact');
+  const seoData = bundle?.seo;
   const [formData, setFormData] = useState({
     name: '',
     email: '',
@@ -21,10 +23,6 @@ const ContactPage = () => {
   });
   const [isSubmitting, setIsSubmitting] = useState(false);
 
-  useEffect(() => {
-    axios.get(`${API}/seo/contact`).then(res => setSeoData(res.data)).catch(() => {});
-  }, []);
-
   const handleSubmit = async (e) => {
     e.preventDefault();
     setIsSubmitting(true);
@@ -1,22 +1,16 @@
-import React, { useEffect, useState } from 'react';
+import React from 'react';
 import { motion } from 'framer-motion';
 import { ArrowRight, Cloud, Shield, Zap, Users, TrendingUp, Award } from 'lucide-react';
 import { useNavigate } from 'react-router-dom';
 import Navbar from '../components/Navbar';
 import Footer from '../components/Footer';
 import SEOHead from '../components/SEOHead';
-import axios from 'axios';
-
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
+import { usePageBundle } from '@/hooks/use-page-bundle';
 
 const HomePage = () => {
   const navigate = useNavigate();
-  const [seoData, setSeoData] = useState(null);
-
-  useEffect(() => {
-    axios.get(`${API}/seo/home`).then(res => setSeoData(res.data)).catch(() => {});
-  }, []);
+  const { bundle } = usePageBundle('home');
+  const seoData = bundle?.seo;
 
   // Organization Schema for SEO
   const organizationSchema = {
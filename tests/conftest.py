@@ -0,0 +1,46 @@
+"""
+Shared test setup. Backend modules import each other by name (the server
+runs from backend/), so that directory goes on sys.path. Tests that need
+MongoDB get an in-memory mongomock database.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def mock_db():
+    from mongomock_motor import AsyncMongoMockClient
+
+    return AsyncMongoMockClient()["test_database"]
+
+@pytest.fixture
+def api(mock_db, tmp_path):
+    """In-process API client on the mock database, with an admin token.
+    Yields (client, auth headers); `client.portal.call` runs coroutines on
+    the app's event loop."""
+    from fastapi.testclient import TestClient
+
+    import server
+
+    server.client, server.db = mock_db.client, mock_db
+    server.cache.clear()
+    server.cache_bus.mode = "off"
+    server.cache_bus.db = mock_db
+    server.site_snapshot.path = tmp_path / "site.snapshot"
+    server.contact_screen._recent.clear()
+    with TestClient(server.app) as client:
+        client.portal.call(mock_db.admins.insert_one, {
+            "email": "admin@test", "password_hash": server.get_password_hash("secret"),
+        })
+        yield client, {"Authorization": f"Bearer {server.create_access_token({'sub': 'admin@test'})}"}
@@ -0,0 +1,134 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import backup_manager
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def stamp(seconds):
+    return (T0 + timedelta(seconds=seconds)).isoformat()
+
+def blog(slug, seconds, title="t"):
+    return {"_id": slug, "slug": slug, "title": title, "updated_at": stamp(seconds)}
+
+@pytest.fixture
+def backup_db(mock_db, monkeypatch):
+    monkeypatch.setattr(backup_manager, "client", mock_db.client)
+    monkeypatch.setattr(backup_manager, "db", mock_db)
+    monkeypatch.setattr(backup_manager, "db_name", mock_db.name)
+    return mock_db
+
+async def backup(tmp_path, **kwargs):
+    return await backup_manager.run_backup(tmp_path / "backups", fmt="ndjson", **kwargs)
+
+async def restore(tmp_path, **kwargs):
+    return await backup_manager.run_restore(tmp_path / "backups", "restored", **kwargs)
+
+@pytest.mark.anyio
+async def test_full_then_incremental_then_restore(backup_db, tmp_path):
+    await backup_db.blogs.insert_many([blog("a", 0), blog("b", 10)])
+    await backup_db.seo_settings.insert_one({"_id": "home", "page": "home", "updated_at": stamp(5)})
+    first = await backup(tmp_path)
+    assert first["mode"] == "full" and first["complete"]
+    assert first["collections"]["blogs"]["count"] == 2
+
+    await backup_db.blogs.replace_one({"_id": "a"}, blog("a", 3600, "edited"))
+    await backup_db.blogs.insert_one(blog("c", 3700))
+    second = await backup(tmp_path)
+    assert second["mode"] == "incremental"
+    # "b" sits at the checkpoint and is re-read; "a" and "c" changed after it
+    assert second["collections"]["blogs"]["count"] == 3
+    assert second["collections"]["seo_settings"]["count"] == 1
+
+    result = await restore(tmp_path)
+    assert result["runs"] == [first["id"], second["id"]]
+    restored = {doc["_id"]: doc async for doc in backup_db.client["restored"].blogs.find()}
+    assert sorted(restored) == ["a", "b", "c"]
+    assert restored["a"]["title"] == "edited"
+    assert await backup_db.client["restored"].seo_settings.count_documents({}) == 1
+    assert not (tmp_path / "backups" / backup_manager.RESTORE_STATE_NAME).exists()
+
+@pytest.mark.anyio
+async def test_incremental_rereads_writes_stamped_before_the_checkpoint(backup_db, tmp_path):
+    await backup_db.blogs.insert_one(blog("a", 600))
+    await backup(tmp_path)
+    # Stamped before the checkpoint, committed after the full run read past it
+    await backup_db.blogs.insert_one(blog("late", 590))
+    await backup_db.blogs.insert_one(blog("old", 600 - 2 * backup_manager.CHECKPOINT_OVERLAP.total_seconds()))
+    run = await backup(tmp_path)
+    assert run["collections"]["blogs"]["count"] == 2
+    await restore(tmp_path)
+    slugs = {doc["slug"] async for doc in backup_db.client["restored"].blogs.find()}
+    assert "late" in slugs and "old" not in slugs
+
+@pytest.mark.anyio
+async def test_interrupted_restore_resumes_only_with_the_same_parameters(backup_db, tmp_path, monkeypatch):
+    await backup_db.blogs.insert_many([blog("a", 0), blog("b", 10)])
+    await backup_db.keywords.insert_one({"_id": "k", "keyword": "k", "tracked_at": stamp(0)})
+    await backup(tmp_path)
+    state_path = tmp_path / "backups" / backup_manager.RESTORE_STATE_NAME
+
+    restore_file = backup_manager.restore_file
+    calls, failing = [], {"keywords"}
+
+    async def flaky_restore_file(target_db, name, *args):
+        calls.append(name)
+        if name in failing:
+            raise RuntimeError("connection lost")
+        return await restore_file(target_db, name, *args)
+
+    monkeypatch.setattr(backup_manager, "restore_file", flaky_restore_file)
+    with pytest.raises(RuntimeError):
+        await restore(tmp_path)
+    done = json.loads(state_path.read_text())["done"]
+    assert [key.rsplit("/", 1)[1] for key in done] == ["blogs.ndjson.gz"]
+
+    # A partial restore does not inherit the full restore's progress...
+    calls.clear()
+    await restore(tmp_path, collections=["blogs"])
+    assert calls == ["blogs"]
+    assert not state_path.exists()
+
+    # ...nor does a full restore skip files a partial one finished
+    state_path.write_text(json.dumps({
+        "params": {"database": "restored", "until": None, "collections": ["blogs"]}, "done": done,
+    }))
+    calls.clear()
+    with pytest.raises(RuntimeError):
+        await restore(tmp_path)
+    assert sorted(calls) == ["blogs", "keywords"]
+
+    # Re-running the interrupted full restore skips what it already finished
+    calls.clear()
+    failing.clear()
+    result = await restore(tmp_path)
+    assert calls == ["keywords"]
+    assert result["restored"] == {"keywords": 1}
+    assert not state_path.exists()
+
+@pytest.mark.anyio
+async def test_cli_reports_failures_in_its_summary_and_exit_code(backup_db, tmp_path, monkeypatch, capsys):
+    await backup_db.blogs.insert_one(blog("a", 0))
+    args = backup_manager.build_parser().parse_args(["--dir", str(tmp_path / "backups"), "restore"])
+    # Nothing backed up yet
+    assert await backup_manager.run_command(args) == 1
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["ok"] is False and summary["errors"]["type"] == "FileNotFoundError"
+
+    export_collection = backup_manager.export_collection
+
+    async def broken_export(name, *args):
+        raise RuntimeError("cursor killed")
+
+    monkeypatch.setattr(backup_manager, "export_collection", broken_export)
+    args = backup_manager.build_parser().parse_args(["--dir", str(tmp_path / "backups"), "backup", "--format", "ndjson"])
+    assert await backup_manager.run_command(args) == 1
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["ok"] is False and summary["result"]["complete"] is False
+    assert summary["errors"]["blogs"] == "cursor killed"
+
+    monkeypatch.setattr(backup_manager, "export_collection", export_collection)
+    assert await backup_manager.run_command(args) == 0
+    assert json.loads(capsys.readouterr().out)["ok"] is True
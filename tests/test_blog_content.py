@@ -0,0 +1,97 @@
+import pytest
+
+from blog_content import excerpt_from, process_blog_html, processed_fields
+
+def clean(html):
+    return process_blog_html(html)["content"]
+
+@pytest.mark.parametrize("href", [
+    "javascript:alert(1)",
+    "JaVaScRiPt:alert(1)",
+    " javascript:alert(1)",
+    "jav&#x09;ascript:alert(1)",
+    "jav&#9;ascript:alert(1)",
+    "java&#x0A;script:alert(1)",
+    "java\nscript:alert(1)",
+    "java\tscript:alert(1)",
+    "&#x01;javascript:alert(1)",
+    "javascript&colon;alert(1)",
+    "&#106;avascript:alert(1)",
+    "vbscript:msgbox(1)",
+    "data:text/html,<script>alert(1)</script>",
+])
+def test_unsafe_link_schemes_are_dropped(href):
+    html = clean(f'<p><a href="{href}">x</a></p>')
+    assert "href" not in html
+    assert html == "<p><a>x</a></p>"
+
+@pytest.mark.parametrize("href", [
+    "https://techresona.com/blog", "HTTP://example.com", "mailto:info@techresona.com",
+    "tel:+917517402788", "/services", "#section", "page.html?a=b:c",
+])
+def test_safe_links_are_kept(href):
+    assert f'href="{href}"' in clean(f'<a href="{href}">x</a>')
+
+def test_unsafe_image_source_is_dropped():
+    assert clean('<img src="jav&#x0D;ascript:alert(1)" alt="a">') == '<img alt="a" loading="lazy">'
+
+def test_event_handler_attributes_are_dropped():
+    html = clean('<p onclick="alert(1)" onmouseover="x()">a<img src="/a.png" onerror="alert(1)"></p>')
+    assert "on" not in html.replace("loading", "")
+    assert html == '<p>a<img src="/a.png" loading="lazy"></p>'
+
+def test_script_and_style_bodies_are_removed():
+    html = clean('<p>a</p><script>alert("<p>x</p>")</script><style>p{color:red}</style><p>b</p>')
+    assert html == "<p>a</p><p>b</p>"
+
+def test_srcset_is_dropped():
+    html = clean('<img src="/a.png" srcset="javascript:alert(1) 1x, /b.png 2x">')
+    assert "srcset" not in html
+
+@pytest.mark.parametrize("style", [
+    "background:url(javascript:alert(1))",
+    "background: URL ( 'x' )",
+    "width: expression(alert(1))",
+    "background:u\\72l(javascript:alert(1))",
+    "background:u/**/rl(x)",
+    "behavior:url(x.htc)",
+    "-moz-binding:url(x)",
+])
+def test_unsafe_styles_are_dropped(style):
+    assert "style" not in clean(f'<p style="{style}">a</p>')
+
+def test_safe_style_is_kept():
+    assert clean('<p style="color: red">a</p>') == '<p style="color: red">a</p>'
+
+def test_blank_target_gets_noopener():
+    html = clean('<a href="/x" target="_blank" rel="opener">x</a>')
+    assert html == '<a href="/x" target="_blank" rel="noopener noreferrer">x</a>'
+
+def test_whitespace_is_minified_but_pre_is_kept():
+    html = clean("<div>\n  <p>  a   b  </p>\n  <pre>  x\n    y  </pre>\n</div>")
+    assert html == "<div><p>a b</p><pre>  x\n    y  </pre></div>"
+
+def test_unclosed_tags_are_closed_and_stray_end_tags_dropped():
+    assert clean("<p><b>a</p></i><ul><li>b") == "<p><b>a</b></p><ul><li>b</li></ul>"
+
+def test_headings_get_ids_and_toc():
+    result = process_blog_html("<h2>Intro</h2><p>x</p><h3>Intro</h3><h2 id='own'>Next</h2>")
+    assert result["content"].startswith('<h2 id="intro">Intro</h2>')
+    assert result["toc"] == [
+        {"id": "intro", "text": "Intro", "level": 2},
+        {"id": "intro-2", "text": "Intro", "level": 3},
+        {"id": "own", "text": "Next", "level": 2},
+    ]
+
+def test_word_count_and_reading_time():
+    result = process_blog_html("<p>" + "word " * 401 + "</p>")
+    assert result["word_count"] == 401
+    assert result["reading_time_minutes"] == 3
+    assert process_blog_html("")["reading_time_minutes"] == 0
+
+def test_blank_excerpt_is_filled_and_given_one_is_kept():
+    assert processed_fields("<p>Hello <b>world</b></p>", "")["excerpt"] == "Hello world"
+    assert "excerpt" not in processed_fields("<p>Hello</p>", "Mine")
+
+def test_excerpt_cuts_at_word_boundary():
+    assert excerpt_from("alpha beta gamma", limit=12) == "alpha beta…"
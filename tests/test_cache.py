@@ -0,0 +1,319 @@
+import asyncio
+
+import pytest
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+import cache as cache_module
+from cache import InvalidationBus, LocalCache, SingleFlight
+
+def test_set_and_get():
+    cache = LocalCache()
+    cache.set("blog", "a", {"title": "A"})
+    assert cache.get("blog", "a") == {"title": "A"}
+    assert cache.get("blog", "b") is None
+
+def test_invalidate_key_and_namespace():
+    cache = LocalCache()
+    cache.set("blog", "a", 1)
+    cache.set("blog", "b", 2)
+    cache.invalidate("blog", "a")
+    assert cache.get("blog", "a") is None
+    assert cache.get("blog", "b") == 2
+    cache.invalidate("blog")
+    assert cache.get("blog", "b") is None
+
+def test_set_with_current_generation_stores():
+    cache = LocalCache()
+    generation = cache.generation("blog", "a")
+    cache.set("blog", "a", "fresh", generation)
+    assert cache.get("blog", "a") == "fresh"
+
+def test_key_invalidation_during_load_skips_set():
+    cache = LocalCache()
+    generation = cache.generation("blog", "a")
+    cache.invalidate("blog", "a")
+    assert cache.set("blog", "a", "stale", generation) == "stale"
+    assert cache.get("blog", "a") is None
+
+def test_namespace_invalidation_during_load_skips_set():
+    cache = LocalCache()
+    generation = cache.generation("blog", "a")
+    cache.invalidate("blog")
+    cache.set("blog", "a", "stale", generation)
+    assert cache.get("blog", "a") is None
+
+def test_other_keys_do_not_outdate_a_load():
+    cache = LocalCache()
+    generation = cache.generation("blog", "a")
+    cache.invalidate("blog", "b")
+    cache.invalidate("seo")
+    cache.set("blog", "a", "fresh", generation)
+    assert cache.get("blog", "a") == "fresh"
+
+def test_clear_outdates_loads():
+    cache = LocalCache()
+    generation = cache.generation("sitemap")
+    cache.clear()
+    cache.set("sitemap", None, "stale", generation)
+    assert cache.get("sitemap") is None
+
+def test_expired_entries_are_dropped():
+    cache = LocalCache(ttl=-1)
+    cache.set("blog", "a", 1)
+    assert cache.get("blog", "a") is None
+
+class Source:
+    """A value read by gated loads, each waiting on its own event to finish"""
+
+    def __init__(self, cache, value):
+        self.cache = cache
+        self.value = value
+        self.gates = []
+
+    async def load(self):
+        generation = self.cache.generation("blog", "a")
+        value = self.value
+        gate = asyncio.Event()
+        self.gates.append(gate)
+        await gate.wait()
+        return self.cache.set("blog", "a", value, generation)
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+@pytest.mark.anyio
+async def test_concurrent_misses_share_one_load():
+    cache = LocalCache()
+    flights, source = SingleFlight(cache), Source(cache, "v1")
+    waiters = [asyncio.ensure_future(flights.do("blog", "a", source.load)) for _ in range(3)]
+    await settle()
+    assert len(source.gates) == 1
+    source.gates[0].set()
+    assert await asyncio.gather(*waiters) == ["v1"] * 3
+    assert cache.get("blog", "a") == "v1"
+
+@pytest.mark.anyio
+async def test_write_during_coalesced_miss():
+    cache = LocalCache()
+    flights, source = SingleFlight(cache), Source(cache, "old")
+    early = [asyncio.ensure_future(flights.do("blog", "a", source.load)) for _ in range(2)]
+    await settle()
+
+    # A write lands while the coalesced load is still reading
+    source.value = "new"
+    cache.invalidate("blog", "a")
+    late = asyncio.ensure_future(flights.do("blog", "a", source.load))
+    await settle()
+    assert len(source.gates) == 2
+
+    # The fresh load finishes first, then the stale one lands on top of it
+    source.gates[1].set()
+    assert await late == "new"
+    source.gates[0].set()
+    assert await asyncio.gather(*early) == ["old", "old"]
+    assert cache.get("blog", "a") == "new"
+
+def test_blog_write_during_coalesced_read(api, monkeypatch):
+    import server
+
+    client, headers = api
+    client.post("/api/blogs", json={
+        "title": "Old", "slug": "post", "excerpt": "e", "content": "<p>x</p>",
+        "keywords": "k", "meta_description": "m", "author": "a", "published": False,
+    }, headers=headers)
+    gates = []
+
+    class GatedBlogs:
+        async def find_one(self, *args, **kwargs):
+            doc = await server.db.blogs.find_one(*args, **kwargs)
+            gate = asyncio.Event()
+            gates.append(gate)
+            await gate.wait()
+            return doc
+
+    monkeypatch.setattr(server, "public_reads", lambda *args: GatedBlogs())
+
+    async def scenario():
+        early = [asyncio.ensure_future(server.get_blog("post")) for _ in range(2)]
+        await settle()
+        await server.save_blog_update(
+            await server.db.blogs.find_one({"slug": "post"}, {"_id": 0}), {"title": "New"}, {"email": "admin@test"}
+        )
+        late = asyncio.ensure_future(server.get_blog("post"))
+        await settle()
+        assert len(gates) == 2
+        for gate in reversed(gates):
+            gate.set()
+        return [blog["title"] for blog in await asyncio.gather(*early, late)]
+
+    assert client.portal.call(scenario) == ["Old", "Old", "New"]
+    assert server.cache.get("blog", "post")["title"] == "New"
+    assert client.get("/api/blogs/post").json()["title"] == "New"
+
+class BusDb:
+    """The capped bus collection, shared by every bus on it (mongomock has no
+    capped collections, tailable cursors or change streams). Open cursors and
+    streams see later inserts; `kill()` makes them die as a dropped cursor does."""
+
+    def __init__(self, replica_set=False):
+        self.replica_set = replica_set
+        self.docs, self.resumed_after = [], []
+        self.created = False
+        self.epoch, self.error = 0, None
+        self.changed = asyncio.Event()
+
+    def __getitem__(self, name):
+        return self
+
+    async def create_collection(self, name, capped, size):
+        if self.created:
+            raise CollectionInvalid(f"collection {name} already exists")
+        self.created = True
+
+    async def command(self, name):
+        return {"setName": "rs0"} if self.replica_set else {}
+
+    async def insert_one(self, doc):
+        # Stored the way MongoDB returns it: naive UTC
+        self.docs.append({**doc, "at": doc["at"].replace(tzinfo=None)})
+        self._notify()
+
+    def kill(self, error=None):
+        self.epoch, self.error = self.epoch + 1, error
+        self._notify()
+
+    def _notify(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    async def next_doc(self, cursor):
+        while True:
+            if cursor.epoch != self.epoch:
+                cursor.alive = False
+                if self.error is not None:
+                    raise self.error
+                raise StopAsyncIteration
+            if cursor.position < len(self.docs):
+                cursor.position += 1
+                return self.docs[cursor.position - 1]
+            await self.changed.wait()
+
+    def find(self, query, cursor_type):
+        return TailCursor(self, query["at"]["$gte"].replace(tzinfo=None))
+
+    def watch(self, pipeline, resume_after):
+        self.resumed_after.append(resume_after)
+        return ChangeStream(self, len(self.docs) if resume_after is None else resume_after)
+
+class TailCursor:
+    def __init__(self, db, since):
+        self.db, self.since = db, since
+        self.epoch, self.position, self.alive = db.epoch, 0, True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            doc = await self.db.next_doc(self)
+            if doc["at"] >= self.since:
+                return doc
+
+    async def close(self):
+        pass
+
+class ChangeStream(TailCursor):
+    def __init__(self, db, position):
+        super().__init__(db, None)
+        self.position = position
+
+    @property
+    def resume_token(self):
+        return self.position
+
+    async def __anext__(self):
+        return {"fullDocument": await self.db.next_doc(self)}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+async def eventually(predicate):
+    for _ in range(100):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+@pytest.fixture
+async def buses(request, monkeypatch):
+    monkeypatch.setattr(cache_module, "RETRY_SECONDS", 0)
+    db = BusDb(replica_set=request.param == "changestream")
+    started = []
+    for _ in range(2):
+        bus = InvalidationBus(db, LocalCache(), mode="auto")
+        bus.seen = []
+        bus.add_listener(lambda namespace, key, seen=bus.seen: seen.append((namespace, key)))
+        await bus.start()
+        started.append(bus)
+    await settle()
+    yield db, *started
+    for bus in started:
+        await bus.stop()
+
+async def prepared_mode(db):
+    bus = InvalidationBus(db, LocalCache(), mode="auto")
+    await bus.prepare()
+    return bus.mode
+
+@pytest.mark.anyio
+async def test_auto_mode_falls_back_to_capped_without_a_replica_set():
+    assert await prepared_mode(BusDb(replica_set=True)) == "changestream"
+    db = BusDb()
+    assert await prepared_mode(db) == "capped"
+    # The seed document keeps a tail on the empty collection alive
+    assert [doc["origin"] for doc in db.docs] == ["init"]
+    # A second worker finds the collection already there
+    assert await prepared_mode(db) == "capped" and len(db.docs) == 1
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("buses", ["capped", "changestream"], indirect=True)
+async def test_publish_evicts_other_workers_but_is_not_reapplied_by_its_publisher(buses):
+    db, publisher, follower = buses
+    assert publisher.mode == follower.mode == ("changestream" if db.replica_set else "capped")
+    for bus in (publisher, follower):
+        bus.cache.set("blog", "post", "old")
+        bus.cache.set("blog", "other", "kept")
+
+    await publisher.publish("blog", "post")
+    await eventually(lambda: follower.seen == [("blog", "post")])
+    assert follower.cache.get("blog", "post") is None
+    assert follower.cache.get("blog", "other") == "kept"
+    await settle()
+    assert publisher.seen == [("blog", "post")]
+
+CURSOR_NOT_FOUND = OperationFailure("cursor id not found", code=43)
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("buses, error", [
+    ("capped", None),  # tail fell off the end of the capped collection
+    ("capped", CURSOR_NOT_FOUND),
+    ("changestream", CURSOR_NOT_FOUND),
+], indirect=["buses"])
+async def test_messages_sent_while_the_cursor_was_dead_are_applied_on_resume(buses, error):
+    db, publisher, follower = buses
+    await publisher.publish("blog", "before")
+    await eventually(lambda: ("blog", "before") in follower.seen)
+    seen_through = len(db.docs)
+
+    db.kill(error)
+    follower.cache.set("blog", "during", "old")
+    await publisher.publish("blog", "during")
+    await eventually(lambda: ("blog", "during") in follower.seen)
+    assert follower.cache.get("blog", "during") is None
+    if db.replica_set:
+        # Both workers reopened after the last change they had seen
+        assert db.resumed_after == [None, None, seen_through, seen_through]
@@ -0,0 +1,91 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def submission(minute, status="new", **fields):
+    return {
+        "id": str(uuid.uuid4()), "name": "n", "email": "n@example.com", "message": "m",
+        "status": status, "submitted_at": (BASE + timedelta(minutes=minute)).isoformat(), **fields,
+    }
+
+def test_cursor_round_trips():
+    doc = submission(3)
+    cursor = server.encode_cursor(doc)
+    assert "=" not in cursor
+    assert server.decode_cursor(cursor) == [doc["submitted_at"], doc["id"]]
+
+@pytest.mark.parametrize("cursor", ["zz", "bm90IGpzb24", server.encode_cursor({"submitted_at": 1, "id": 2})[:-2]])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        server.decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+def test_filters_combine():
+    clauses = server.contact_inbox_filters(
+        "new", datetime(2026, 1, 1), datetime(2026, 2, 1, tzinfo=timezone.utc), " azure ", flagged=True
+    )
+    assert clauses == [
+        {"status": "new"},
+        {"flags.0": {"$exists": True}},
+        {"submitted_at": {"$gte": "2026-01-01T00:00:00+00:00", "$lt": "2026-02-01T00:00:00+00:00"}},
+        {"$text": {"$search": "azure"}},
+    ]
+    assert server.contact_inbox_filters(None, None, None, "  ") == []
+
+def insert(client, docs):
+    client.portal.call(server.db.contact_submissions.insert_many, [dict(doc) for doc in docs])
+
+def page_through(client, headers, **params):
+    seen, cursor = [], None
+    while True:
+        query = {**params, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/contact/submissions", params=query, headers=headers).json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return seen
+
+def test_pages_break_ties_on_id(api):
+    client, headers = api
+    # Three submissions per minute, so page boundaries fall inside ties
+    docs = [submission(i // 3) for i in range(10)]
+    insert(client, docs)
+    expected = [d["id"] for d in sorted(docs, key=lambda d: (d["submitted_at"], d["id"]), reverse=True)]
+    for limit in (1, 2, 4, 10, 200):
+        assert page_through(client, headers, limit=limit) == expected
+
+def test_status_date_and_flag_filters(api):
+    client, headers = api
+    docs = [
+        submission(0, "new"), submission(5, "closed"), submission(10, "new", flags=["duplicate"]),
+        submission(15, "new"), submission(20, "contacted"),
+    ]
+    insert(client, docs)
+    window = {"submitted_from": (BASE + timedelta(minutes=5)).isoformat(),
+              "submitted_to": (BASE + timedelta(minutes=20)).isoformat()}
+    assert page_through(client, headers, status="new", **window) == [docs[3]["id"], docs[2]["id"]]
+    assert page_through(client, headers, status="new", flagged="false", **window) == [docs[3]["id"]]
+    assert page_through(client, headers, flagged="true") == [docs[2]["id"]]
+    assert page_through(client, headers, status="new", limit=1) == [docs[3]["id"], docs[2]["id"], docs[0]["id"]]
+    assert client.get("/api/contact/submissions", params={"status": "bogus"}, headers=headers).status_code == 422
+
+def test_status_update_moves_updated_at(api):
+    client, headers = api
+    doc = submission(0, updated_at=submission(0)["submitted_at"])
+    insert(client, [doc])
+    response = client.patch(f"/api/contact/submissions/{doc['id']}", json={"status": "contacted"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "contacted"
+    stored = client.portal.call(server.db.contact_submissions.find_one, {"id": doc["id"]})
+    assert stored["updated_at"] == stored["status_updated_at"] > doc["submitted_at"]
+    assert client.patch("/api/contact/submissions/missing", json={"status": "closed"}, headers=headers).status_code == 404
+
+def test_inbox_requires_admin(api):
+    client, _ = api
+    assert client.get("/api/contact/submissions").status_code in (401, 403)
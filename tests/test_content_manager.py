@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import pytest
+
+import content_manager
+import server
+
+@pytest.fixture
+def cm_db(api, monkeypatch):
+    """The content manager on its own mock database, beside the API's"""
+    client, _ = api
+    db = server.db.client["content_manager_test"]
+    monkeypatch.setattr(content_manager, "client", server.db.client)
+    monkeypatch.setattr(content_manager, "db", db)
+    return client, db
+
+def command(name, *args):
+    return content_manager.build_parser().parse_args([name, "--indent", "0", *args])
+
+@pytest.mark.anyio
+async def test_gather_bounded_caps_concurrency_and_returns_failures_in_place():
+    running, peak = 0, 0
+
+    async def work(i):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if i == 2:
+            raise ValueError("bad item")
+        return i
+
+    outcomes = await content_manager.gather_bounded((work(i) for i in range(6)), workers=2)
+    assert peak == 2
+    assert outcomes[:2] == [0, 1] and outcomes[3:] == [3, 4, 5]
+    assert isinstance(outcomes[2], ValueError)
+
+def test_failed_items_are_reported_with_exit_status_1(cm_db, monkeypatch, capsys):
+    client, db = cm_db
+    insert = content_manager._insert_keyword_if_missing
+    broken = content_manager.SAMPLE_KEYWORDS[1]["keyword"]
+
+    async def flaky_insert(kw_data):
+        if kw_data["keyword"] == broken:
+            raise RuntimeError("write concern timeout")
+        return await insert(kw_data)
+
+    monkeypatch.setattr(content_manager, "_insert_keyword_if_missing", flaky_insert)
+    assert client.portal.call(content_manager.run_command, command("keywords")) == 1
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["ok"] is False
+    assert summary["errors"] == {broken: "RuntimeError: write concern timeout"}
+    assert summary["result"][content_manager.SAMPLE_KEYWORDS[0]["keyword"]] == "created"
+    assert client.portal.call(db.keywords.count_documents, {}) == len(content_manager.SAMPLE_KEYWORDS) - 1
+
+    # Re-running fills in the missing item and succeeds
+    monkeypatch.setattr(content_manager, "_insert_keyword_if_missing", insert)
+    assert client.portal.call(content_manager.run_command, command("keywords")) == 0
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["ok"] is True and "errors" not in summary
+    assert summary["result"][broken] == "created"
+
+def test_api_writes_use_the_script_database_and_restore_the_server(cm_db, capsys):
+    client, db = cm_db
+    api_db, bus_db, mode, revisions_db = server.db, server.cache_bus.db, server.cache_bus.mode, server.revision_store.db
+    client.portal.call(db.blogs.insert_one, {"slug": "post", "title": "T", "content": "<h2>Intro</h2><p>one two</p>"})
+
+    assert client.portal.call(content_manager.run_command, command("reprocess-blogs")) == 0
+    assert json.loads(capsys.readouterr().out)["result"] == {
+        "post": {"word_count": 3, "reading_time_minutes": 1, "headings": 1, "revision": 1},
+    }
+    # The edit went through the API write path on the script's database...
+    assert client.portal.call(db.blog_revisions.count_documents, {}) == 1
+    assert client.portal.call(api_db.blog_revisions.count_documents, {}) == 0
+    # ...and the server module is left as it was
+    assert server.db is api_db and server.cache_bus.db is bus_db
+    assert server.cache_bus.mode == mode and server.revision_store.db is revisions_db
@@ -0,0 +1,131 @@
+import csv
+import io
+from datetime import datetime, timezone
+
+import openpyxl
+import pytest
+
+import exports
+import server
+
+COLUMNS = ["name", "message", "count"]
+ROWS = [
+    ["Smith, Jane", 'Said "hi"\nthen left', 3],
+    ["=HYPERLINK(\"http://evil\")", "+1 555", -2],
+    ["@SUM(A1)", "-10", None],
+    ["\tTabbed", ["a", "b"], True],
+]
+
+async def rows_of(items):
+    for item in items:
+        yield item
+
+async def collect(stream):
+    return b"".join([chunk async for chunk in stream])
+
+@pytest.mark.parametrize("value,expected", [
+    (None, ""),
+    ("plain", "plain"),
+    ("=1+1", "=1+1"),
+    (-2, "-2"),
+    (["=a", "b"], "=a, b"),
+    (datetime(2026, 1, 2, tzinfo=timezone.utc), "2026-01-02T00:00:00+00:00"),
+])
+def test_cell_text(value, expected):
+    assert exports.cell_text(value) == expected
+
+@pytest.mark.parametrize("value,expected", [
+    (None, ""),
+    ("plain", "plain"),
+    ("=1+1", "'=1+1"),
+    ("+cmd", "'+cmd"),
+    ("-cmd", "'-cmd"),
+    ("@cmd", "'@cmd"),
+    ("\rcmd", "'\rcmd"),
+    (["=a", "b"], "'=a, b"),
+    (-2, "-2"),
+    (-1.5, "-1.5"),
+])
+def test_csv_cell(value, expected):
+    assert exports.csv_cell(value) == expected
+
+@pytest.mark.anyio
+async def test_csv_escapes_and_neutralizes_formulas():
+    body = (await collect(exports.stream_csv(COLUMNS, rows_of(ROWS)))).decode()
+    assert body.startswith("\ufeff")
+    parsed = list(csv.reader(io.StringIO(body[1:])))
+    assert parsed == [
+        COLUMNS,
+        ["Smith, Jane", 'Said "hi"\nthen left', "3"],
+        ["'=HYPERLINK(\"http://evil\")", "'+1 555", "-2"],
+        ["'@SUM(A1)", "'-10", ""],
+        ["'\tTabbed", "a, b", "True"],
+    ]
+
+@pytest.mark.anyio
+async def test_csv_flushes_in_chunks(monkeypatch):
+    monkeypatch.setattr(exports, "CHUNK_ROWS", 2)
+    chunks = [chunk async for chunk in exports.stream_csv(["n"], rows_of([[i] for i in range(5)]))]
+    assert len(chunks) == 3
+    assert b"".join(chunks).decode().split() == ["\ufeffn", "0", "1", "2", "3", "4"]
+
+def open_workbook(data):
+    return openpyxl.load_workbook(io.BytesIO(data))
+
+@pytest.mark.anyio
+async def test_xlsx_opens_in_openpyxl(monkeypatch):
+    monkeypatch.setattr(exports, "CHUNK_ROWS", 2)
+    rows = ROWS + [["Bell\x07 <b>&</b>", 1.5, False]]
+    chunks = [chunk async for chunk in exports.stream_xlsx(COLUMNS, rows_of(rows), "Inbox: [all]")]
+    assert len(chunks) > 1
+    book = open_workbook(b"".join(chunks))
+    assert book.sheetnames == ["Inbox_ _all_"]
+    sheet = book.active
+    assert sheet.freeze_panes == "A2"
+    assert [list(row) for row in sheet.iter_rows(values_only=True)] == [
+        COLUMNS,
+        ["Smith, Jane", 'Said "hi"\nthen left', 3],
+        ["=HYPERLINK(\"http://evil\")", "+1 555", -2],
+        ["@SUM(A1)", "-10", None],
+        ["\tTabbed", "a, b", True],
+        ["Bell <b>&</b>", 1.5, False],
+    ]
+    # Strings are stored inline, never as formulas
+    assert all(cell.data_type != "f" for row in sheet.iter_rows() for cell in row)
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("fmt", ["csv", "xlsx"])
+async def test_empty_result_has_only_the_header(fmt):
+    data = await collect(exports.stream_export(fmt, COLUMNS, rows_of([])))
+    if fmt == "csv":
+        assert data.decode() == "\ufeffname,message,count\r\n"
+    else:
+        assert [list(row) for row in open_workbook(data).active.iter_rows(values_only=True)] == [COLUMNS]
+
+@pytest.mark.parametrize("fmt", ["csv", "xlsx"])
+def test_export_endpoint_streams_empty_inbox(api, fmt):
+    client, headers = api
+    response = client.get("/api/contact/submissions/export", params={"format": fmt}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(exports.EXPORT_FORMATS[fmt].split(";")[0])
+    assert response.headers["content-disposition"].endswith(f'.{fmt}"')
+    if fmt == "csv":
+        assert response.content.decode() == "\ufeff" + ",".join(server.CONTACT_EXPORT_FIELDS) + "\r\n"
+    else:
+        rows = list(open_workbook(response.content).active.iter_rows(values_only=True))
+        assert rows == [server.CONTACT_EXPORT_FIELDS]
+
+def test_export_endpoint_applies_filters(api):
+    client, headers = api
+    docs = [
+        {"id": "a", "name": "=cmd|' /C calc'!A0", "email": "a@x.io", "message": "m", "status": "new",
+         "submitted_at": "2026-01-01T00:00:00+00:00", "flags": []},
+        {"id": "b", "name": "B", "email": "b@x.io", "message": "m", "status": "closed",
+         "submitted_at": "2026-01-02T00:00:00+00:00", "flags": []},
+    ]
+    client.portal.call(server.db.contact_submissions.insert_many, docs)
+    response = client.get("/api/contact/submissions/export", params={"status": "new"}, headers=headers)
+    parsed = list(csv.DictReader(io.StringIO(response.content.decode()[1:])))
+    assert [row["id"] for row in parsed] == ["a"]
+    assert parsed[0]["name"] == "'=cmd|' /C calc'!A0"
+    assert client.get("/api/contact/submissions/export").status_code in (401, 403)
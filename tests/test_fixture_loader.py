@@ -0,0 +1,32 @@
+import pytest
+from bson import json_util
+from pymongo import TEXT
+
+import fixture_loader
+
+def write_metadata(dump_dir, name, indexes):
+    (dump_dir / f"{name}.metadata.json").write_text(
+        json_util.dumps({"indexes": indexes, "collectionName": name}, json_options=json_util.CANONICAL_JSON_OPTIONS)
+    )
+
+def test_text_index_is_rebuilt_from_weights(tmp_path):
+    # As mongodump writes a compound text index
+    write_metadata(tmp_path, "contact_submissions", [
+        {"v": 2, "key": {"_id": 1}, "name": "_id_"},
+        {"v": 2, "key": {"status": 1, "_fts": "text", "_ftsx": 1}, "name": "contact_search",
+         "weights": {"message": 1, "name": 5}, "default_language": "english",
+         "language_override": "language", "textIndexVersion": 3},
+        {"v": 2, "key": {"submitted_at": -1, "id": -1}, "name": "submitted_at_-1_id_-1", "unique": True},
+    ])
+    text, plain = [model.document for model in fixture_loader.read_indexes(tmp_path, "contact_submissions")]
+    assert list(text["key"].items()) == [("status", 1), ("message", TEXT), ("name", TEXT)]
+    assert text["weights"] == {"message": 1, "name": 5}
+    assert text["name"] == "contact_search" and text["textIndexVersion"] == 3
+    assert list(plain["key"].items()) == [("submitted_at", -1), ("id", -1)]
+    assert plain["unique"] is True
+
+@pytest.mark.anyio
+async def test_bundled_dump_loads(mock_db):
+    counts = await fixture_loader.load_fixtures(mock_db, collections=["blogs"])
+    assert counts["blogs"] > 0
+    assert await mock_db.blogs.count_documents({}) == counts["blogs"]
@@ -0,0 +1,35 @@
+import pytest
+
+import import_budget
+
+def test_server_import_stays_lazy():
+    # Timing is left to the CI gate; a loaded test machine would make it flaky here
+    result = import_budget.check(budget_ms=60_000, runs=1)
+    assert result["eager_modules"] == []
+    assert result["passed"] is True
+
+@pytest.fixture
+def fake_server(tmp_path, monkeypatch):
+    """Points the probe's fresh interpreter at a server.py written by the test"""
+    monkeypatch.setattr(import_budget, "ROOT_DIR", tmp_path)
+    return tmp_path / "server.py"
+
+def test_eagerly_imported_guarded_module_fails_the_check(fake_server, capsys):
+    fake_server.write_text("import json\nfrom email.mime.multipart import MIMEMultipart\n")
+    result = import_budget.check(budget_ms=60_000, runs=1)
+    assert result["eager_modules"] == ["email.mime.multipart"]
+    assert result["passed"] is False
+
+    with pytest.raises(SystemExit) as exit_info:
+        import_budget.main(["--budget-ms", "60000", "--runs", "1"])
+    assert exit_info.value.code == 1
+    assert "Imported eagerly: email.mime.multipart" in capsys.readouterr().err
+
+def test_deferred_import_passes(fake_server):
+    fake_server.write_text("def send():\n    from email.mime.multipart import MIMEMultipart\n")
+    assert import_budget.check(budget_ms=60_000, runs=1)["passed"] is True
+
+def test_server_import_error_stops_the_check(fake_server):
+    fake_server.write_text("import no_such_module\n")
+    with pytest.raises(SystemExit, match="import server failed"):
+        import_budget.check(runs=1)
@@ -0,0 +1,145 @@
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from PIL import Image
+from starlette.datastructures import UploadFile
+
+import server
+
+def image_bytes(fmt):
+    buf = io.BytesIO()
+    Image.new("RGB", (200, 100), "red").save(buf, format=fmt)
+    return buf.getvalue()
+
+SVG = b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>'
+
+@pytest.fixture
+def logo_api(api, tmp_path, monkeypatch):
+    public = tmp_path / "public"
+    public.mkdir()
+    monkeypatch.setattr(server, "FRONTEND_PUBLIC_DIR", public)
+    monkeypatch.setattr(server, "LOGO_ASSET_DIR", public / "logos")
+    # Derivatives render in-process; the spawn pool is exercised in production only
+    with ThreadPoolExecutor(1) as pool:
+        monkeypatch.setattr(server, "get_logo_pool", lambda: pool)
+        yield api, public
+
+def upload(client, headers, data, content_type, filename="logo.png"):
+    return client.post("/api/logo/upload", headers=headers, files={"file": (filename, data, content_type)})
+
+def test_extension_comes_from_the_detected_format(logo_api):
+    (client, headers), public = logo_api
+    # Claimed PNG, actually JPEG
+    resp = upload(client, headers, image_bytes("JPEG"), "image/png")
+    assert resp.status_code == 200
+    original = resp.json()["path"].rsplit("/", 1)[1]
+    assert original.endswith(".jpg")
+    assert (public / "logos" / original).is_file()
+    assert resp.json()["variants"]
+
+@pytest.mark.parametrize("data, content_type", [
+    (SVG, "image/svg+xml"),
+    (SVG, "image/png"),
+    (image_bytes("BMP"), "image/bmp"),
+    (b"not an image", "image/png"),
+])
+def test_unsupported_formats_are_refused(logo_api, data, content_type):
+    (client, headers), public = logo_api
+    resp = upload(client, headers, data, content_type)
+    assert resp.status_code == 415
+    assert list((public / "logos").iterdir()) == []
+    assert not (public / "logo.png").exists()
+    assert client.portal.call(server.db.logos.count_documents, {}) == 0
+
+class BrokenUpload:
+    """Yields `chunks`, then fails the way a dropped or cancelled request does"""
+
+    def __init__(self, chunks, error):
+        self.chunks, self.error = list(chunks), error
+
+    async def read(self, size):
+        if self.chunks:
+            return self.chunks.pop(0)
+        raise self.error
+
+@pytest.mark.anyio
+async def test_upload_is_written_atomically(tmp_path):
+    dest = tmp_path / "logo.png"
+    dest.write_bytes(b"old")
+    size, sha256 = await server.save_upload_atomic(UploadFile(io.BytesIO(b"new" * 1000)), dest, 10_000)
+    assert size == 3000 and len(sha256) == 64
+    assert dest.read_bytes() == b"new" * 1000
+    assert list(tmp_path.iterdir()) == [dest]
+
+@pytest.mark.anyio
+async def test_oversized_upload_leaves_nothing_behind(tmp_path):
+    dest = tmp_path / "logo.png"
+    dest.write_bytes(b"old")
+    with pytest.raises(server.UploadTooLarge):
+        await server.save_upload_atomic(UploadFile(io.BytesIO(b"x" * 101)), dest, 100)
+    assert dest.read_bytes() == b"old"
+    assert list(tmp_path.iterdir()) == [dest]
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("error", [ConnectionResetError("client went away"), asyncio.CancelledError()])
+async def test_failed_or_aborted_upload_removes_its_temp_file(tmp_path, error):
+    dest = tmp_path / "logo.png"
+    with pytest.raises(type(error)):
+        await server.save_upload_atomic(BrokenUpload([b"partial"], error), dest, 10_000)
+    assert list(tmp_path.iterdir()) == []
+
+def test_upload_over_the_cap_is_refused_with_413(logo_api, monkeypatch):
+    (client, headers), public = logo_api
+    monkeypatch.setattr(server, "MAX_LOGO_BYTES", 1024)
+    resp = upload(client, headers, b"\x89PNG" + b"\0" * 2048, "image/png")
+    assert resp.status_code == 413
+    assert list((public / "logos").iterdir()) == []
+    assert client.portal.call(server.db.logos.count_documents, {}) == 0
+
+@pytest.mark.anyio
+async def test_declared_oversized_body_is_refused_before_reading():
+    async def app(scope, receive, send):
+        raise AssertionError("the app must not run")
+
+    async def receive():
+        raise AssertionError("the body must not be read")
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = server.UploadLimitMiddleware(app, {"/api/logo/upload": lambda: 1000})
+    scope = {"type": "http", "method": "POST", "path": "/api/logo/upload", "headers": [(b"content-length", b"1001")]}
+    await middleware(scope, receive, send)
+    assert sent[0]["status"] == 413
+
+def test_streamed_oversized_body_is_cut_off_at_the_limit(logo_api, monkeypatch):
+    (client, headers), public = logo_api
+    monkeypatch.setattr(server, "MAX_LOGO_BYTES", 64 * 1024)
+    limit = server.MAX_LOGO_BYTES + server.MULTIPART_OVERHEAD_BYTES
+    chunk, sent = b"\0" * 16 * 1024, []
+
+    async def body():
+        # Chunked (no Content-Length), far larger than the limit
+        yield b'--b\r\nContent-Disposition: form-data; name="file"; filename="logo.png"\r\n'
+        yield b"Content-Type: image/png\r\n\r\n"
+        for _ in range(1000):
+            sent.append(len(chunk))
+            yield chunk
+
+    async def post():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await http.post("/api/logo/upload", content=body(), headers={
+                **headers, "Content-Type": "multipart/form-data; boundary=b",
+            })
+
+    resp = client.portal.call(post)
+    assert resp.status_code == 413
+    assert sum(sent) <= limit + len(chunk)
+    # Refused before the endpoint ran, so not even the asset directory exists
+    assert not (public / "logos").exists()
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import metrics
+
+def test_counter_renders_exposition_format():
+    counter = metrics.Counter("jobs_total", "Jobs run.", ("queue", "outcome"))
+    counter.inc(queue="mail", outcome="ok")
+    counter.inc(2.5, queue='say "hi"\n\\', outcome="ok")
+    assert counter.render() == [
+        "# HELP jobs_total Jobs run.",
+        "# TYPE jobs_total counter",
+        'jobs_total{queue="mail",outcome="ok"} 1',
+        'jobs_total{queue="say \\"hi\\"\\n\\\\",outcome="ok"} 2.5',
+    ]
+
+def test_gauge_goes_up_and_down():
+    gauge = metrics.Gauge("busy", "Busy workers.")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    assert gauge.render()[-1] == "busy 1"
+    assert gauge.render()[1] == "# TYPE busy gauge"
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, route="/a")
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 4.25',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+def test_registry_renders_every_metric():
+    registry = metrics.Registry()
+    registry.register(metrics.Counter("a_total", "A."))
+    registry.register(metrics.Gauge("b", "B.")).inc()
+    assert registry.render() == "# HELP a_total A.\n# TYPE a_total counter\n# HELP b B.\n# TYPE b gauge\nb 1\n"
+
+def test_mongo_listener_labels_by_collection_and_command():
+    listener = metrics.MongoCommandMetrics()
+    before = dict(metrics.MONGO_COMMANDS._values)
+
+    def event(name, command, request_id, **fields):
+        return SimpleNamespace(command_name=name, command=command, connection_id=("db", 1),
+                               request_id=request_id, duration_micros=1500, **fields)
+
+    listener.started(event("find", {"find": "metrics_test"}, 1))
+    listener.succeeded(event("find", {}, 1))
+    listener.started(event("getMore", {"getMore": 7, "collection": "metrics_test"}, 2))
+    listener.failed(event("getMore", {}, 2))
+    after = metrics.MONGO_COMMANDS._values
+    assert after[("metrics_test", "find", "success")] - before.get(("metrics_test", "find", "success"), 0) == 1
+    assert after[("metrics_test", "getMore", "failure")] - before.get(("metrics_test", "getMore", "failure"), 0) == 1
+    assert not listener._pending
+
+def test_metrics_endpoint_labels_requests_by_route(api):
+    client, _ = api
+    assert client.get("/api/blogs/no-such-post").status_code == 404
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    body = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_requests_total{method="GET",route="/api/blogs/{slug}",status="404"}' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/blogs/{slug}",le="+Inf"}' in body
+    assert "no-such-post" not in body
@@ -0,0 +1,68 @@
+import pytest
+
+import server
+
+BLOG = {
+    "slug": "azure-migration", "title": "Azure Migration", "excerpt": "e", "content": "<p>Body</p>",
+    "keywords": "azure", "meta_description": "m",
+}
+
+def bundle(client, page, **params):
+    return client.get(f"/api/page-bundle/{page}", params=params)
+
+def cached_keys():
+    return set(server.cache._data.get("page_bundle", {}))
+
+def test_bundle_contents(api):
+    client, headers = api
+    client.put("/api/seo/blog", json={"page": "blog", "title": "Blog | TechResona"}, headers=headers)
+    client.post("/api/blogs", json=BLOG, headers=headers)
+    client.post("/api/blogs", json={**BLOG, "slug": "draft", "published": False}, headers=headers)
+
+    listing = bundle(client, "blog").json()
+    assert listing["page"] == "blog"
+    assert listing["seo"]["title"] == "Blog | TechResona"
+    assert [blog["slug"] for blog in listing["blogs"]] == ["azure-migration"]
+    assert listing["blog"] is None
+    assert listing["logo"] == {"path": "/logo.png", "filename": "logo.png"}
+
+    detail = bundle(client, "blog", slug="azure-migration").json()
+    assert detail["blog"]["title"] == "Azure Migration" and detail["blogs"] is None
+
+    home = bundle(client, "home").json()
+    assert home["seo"] is None and home["blogs"] is None and home["blog"] is None
+
+@pytest.mark.parametrize("page, params", [
+    ("admin", {}),
+    ("anything-at-all", {}),
+    ("home", {"slug": "azure-migration"}),
+    ("blog", {"slug": "missing"}),
+])
+def test_unknown_pages_and_slugs_are_not_cached(api, page, params):
+    client, headers = api
+    client.post("/api/blogs", json=BLOG, headers=headers)
+    assert bundle(client, page, **params).status_code == 404
+    assert cached_keys() == set()
+
+def test_blog_write_invalidates_bundles(api):
+    client, headers = api
+    client.post("/api/blogs", json=BLOG, headers=headers)
+    assert bundle(client, "blog", slug="azure-migration").json()["blog"]["title"] == "Azure Migration"
+    assert bundle(client, "blog").json()["blogs"][0]["title"] == "Azure Migration"
+    assert cached_keys() == {("blog", "azure-migration"), ("blog", None)}
+
+    client.put("/api/blogs/azure-migration", json={"title": "Moving to Azure"}, headers=headers)
+    assert bundle(client, "blog", slug="azure-migration").json()["blog"]["title"] == "Moving to Azure"
+    assert bundle(client, "blog").json()["blogs"][0]["title"] == "Moving to Azure"
+
+    client.delete("/api/blogs/azure-migration", headers=headers)
+    assert bundle(client, "blog").json()["blogs"] == []
+    assert bundle(client, "blog", slug="azure-migration").status_code == 404
+
+def test_seo_write_invalidates_bundles(api):
+    client, headers = api
+    assert bundle(client, "home").json()["seo"] is None
+    assert ("home", None) in cached_keys()
+
+    client.put("/api/seo/home", json={"page": "home", "title": "TechResona"}, headers=headers)
+    assert bundle(client, "home").json()["seo"]["title"] == "TechResona"
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+import benchmark
+import perf_gate
+from perf_gate import compare
+
+def report(*rows, settings=None):
+    return {"version": benchmark.REPORT_VERSION, "settings": settings or {"requests": 10}, "results": list(rows)}
+
+def row(scenario="blog_detail", copies=1, concurrency=4, **metrics):
+    return {"scenario": scenario, "copies": copies, "concurrency": concurrency, **metrics}
+
+def statuses(findings):
+    return {(f["scenario"], f["metric"]): f["status"] for f in findings}
+
+def test_limits_combine_relative_tolerance_and_absolute_slack():
+    tolerances = {"p95_ms": (0.25, 0.5), "mongo_calls_per_request": (0.0, 0.0)}
+    baseline = report(row(p95_ms=10.0, mongo_calls_per_request=2))
+    # 10 * 1.25 + 0.5: exactly at the limit passes
+    findings = compare(baseline, report(row(p95_ms=13.0, mongo_calls_per_request=2)), tolerances)
+    assert [f["limit"] for f in findings] == [13.0, 2.0]
+    assert statuses(findings) == {("blog_detail", "p95_ms"): "ok", ("blog_detail", "mongo_calls_per_request"): "ok"}
+
+    findings = compare(baseline, report(row(p95_ms=13.01, mongo_calls_per_request=3)), tolerances)
+    assert statuses(findings) == {
+        ("blog_detail", "p95_ms"): "regressed", ("blog_detail", "mongo_calls_per_request"): "regressed",
+    }
+    # Improvements are fine
+    assert set(statuses(compare(baseline, report(row(p95_ms=1.0, mongo_calls_per_request=1)), tolerances)).values()) == {"ok"}
+
+def test_missing_rows_and_metrics_are_reported_not_skipped():
+    tolerances = {"p95_ms": (0.25, 0.5), "alloc_kib_per_request": (0.1, 4.0)}
+    baseline = report(
+        row(p95_ms=5.0, alloc_kib_per_request=100.0),
+        row("blog_list", p95_ms=8.0),  # recorded before allocations were tracked
+    )
+    current = report(row(p95_ms=5.0), row("blog_list", concurrency=8, p95_ms=1.0))
+    assert statuses(compare(baseline, current, tolerances)) == {
+        ("blog_detail", "p95_ms"): "ok",
+        ("blog_detail", "alloc_kib_per_request"): "missing",
+        # Same scenario at another concurrency is a different row
+        ("blog_list", "p95_ms"): "missing",
+    }
+
+class Gate:
+    """perf_gate.main against a synthetic baseline, with the benchmark run
+    replaced by whatever report is passed in; calls return the exit status"""
+
+    def __init__(self, tmp_path):
+        self.tmp_path = tmp_path
+        self.baseline_path = tmp_path / "baseline.json"
+        self.baseline_path.write_text(json.dumps(report(row(p95_ms=10.0, mongo_calls_per_request=2))))
+        self.runs, self.current = [], None
+
+    async def run_benchmarks(self, args):
+        self.runs.append(args)
+        return self.current
+
+    def __call__(self, current, *argv):
+        self.current = current
+        try:
+            perf_gate.main(["--baseline", str(self.baseline_path), "--output", str(self.tmp_path / "run.json"), *argv])
+        except SystemExit as e:
+            return e.code
+        return 0
+
+@pytest.fixture
+def gate(tmp_path, monkeypatch):
+    gate = Gate(tmp_path)
+    monkeypatch.setattr(benchmark, "configure_environment", lambda args: None)
+    monkeypatch.setattr(benchmark, "run_benchmarks", gate.run_benchmarks)
+    return gate
+
+def test_gate_exits_1_on_regression_and_keeps_the_baseline(gate, capsys):
+    before = gate.baseline_path.read_text()
+    assert gate(report(row(p95_ms=20.0, mongo_calls_per_request=2)), "--update-baseline") == 1
+    assert "1 of 2 checks regressed" in capsys.readouterr().out
+    assert gate.baseline_path.read_text() == before
+    # The run repeats the baseline's recorded settings
+    assert gate.runs[0].requests == 10
+
+def test_gate_passes_within_tolerance_and_can_update_the_baseline(gate, capsys):
+    current = report(row(p95_ms=12.0, mongo_calls_per_request=2, alloc_kib_per_request=50.0))
+    assert gate(current, "--p95-tolerance", "0.2") == 0
+    assert "All 2 checks within tolerance" in capsys.readouterr().out
+    # A tighter tolerance fails the same run: 10 * 1.1 + 0.5 < 12
+    assert gate(current, "--p95-tolerance", "0.1") == 1
+    assert gate(current, "--update-baseline") == 0
+    assert json.loads(gate.baseline_path.read_text()) == current
+
+def test_missing_or_outdated_baseline_stops_the_gate(gate, tmp_path):
+    with pytest.raises(SystemExit, match="No baseline"):
+        perf_gate.main(["--baseline", str(tmp_path / "absent.json")])
+    gate.baseline_path.write_text(json.dumps({**report(), "version": benchmark.REPORT_VERSION - 1}))
+    with pytest.raises(SystemExit, match="older benchmark.py"):
+        perf_gate.main(["--baseline", str(gate.baseline_path)])
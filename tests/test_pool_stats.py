@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import metrics
+import server
+from pool_stats import PoolStats
+
+ADDRESS = ("pool-test", 27017)
+
+def event():
+    return SimpleNamespace(address=ADDRESS)
+
+def test_snapshot_tracks_connections_and_checkouts(monkeypatch):
+    clock = iter([10.0, 10.002, 11.0, 11.010, 12.0])
+    monkeypatch.setattr("pool_stats.time", SimpleNamespace(perf_counter=lambda: next(clock)))
+    stats = PoolStats()
+    stats.pool_created(event())
+    for _ in range(3):
+        stats.connection_created(event())
+    for _ in range(2):
+        stats.connection_check_out_started(event())
+        stats.connection_checked_out(event())
+    stats.connection_checked_in(event())
+    stats.connection_check_out_started(event())
+    stats.connection_check_out_failed(event())
+    stats.connection_closed(event())
+    stats.pool_cleared(event())
+
+    assert stats.snapshot() == {"pool-test:27017": {
+        "open": 2, "in_use": 1, "available": 1, "checkouts": 2, "checkout_failures": 1, "cleared": 1,
+        "wait_ms": {"p50": 10.0, "p95": 10.0, "max": 10.0},
+    }}
+
+def test_pool_gauges_are_exported():
+    stats = PoolStats()
+    stats.connection_created(event())
+    stats.connection_check_out_started(event())
+    stats.connection_checked_out(event())
+    body = metrics.registry.render()
+    assert 'mongodb_pool_connections_open{address="pool-test:27017"}' in body
+    assert 'mongodb_pool_connections_in_use{address="pool-test:27017"}' in body
+    assert "# TYPE mongodb_pool_checkout_wait_seconds histogram" in body
+    stats.connection_checked_in(event())
+    stats.connection_closed(event())
+
+def test_health_and_ready_report_the_pool(api, monkeypatch):
+    client, _ = api
+    health = client.get("/health").json()
+    assert health["status"] == "ok"
+    assert health["pool"]["max_pool_size"] == server.MONGO_MAX_POOL_SIZE
+    assert isinstance(health["pool"]["servers"], dict)
+
+    async def unreachable(*args, **kwargs):
+        raise server.PyMongoError("No servers found")
+
+    monkeypatch.setattr(server.db, "command", unreachable)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["error"] == "No servers found"
+    assert "pool" in response.json()
+
+def test_client_options_come_from_settings(monkeypatch):
+    monkeypatch.setattr(server, "MONGO_MAX_POOL_SIZE", 20)
+    monkeypatch.setattr(server, "MONGO_WAIT_QUEUE_TIMEOUT_MS", 250)
+    options = server.mongo_client_options()
+    assert options["maxPoolSize"] == 20
+    assert options["waitQueueTimeoutMS"] == 250
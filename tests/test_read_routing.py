@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import pytest
+from pymongo.read_preferences import Nearest, SecondaryPreferred
+
+import read_routing
+from cache import InvalidationBus, LocalCache
+from read_routing import ReadRouter, parse_routes
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(read_routing, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+class FakeDb:
+    def __getitem__(self, name):
+        return ("primary", name)
+
+    def get_collection(self, name, read_preference):
+        return (read_preference, name)
+
+def test_parse_routes():
+    assert parse_routes(" get_blog=primary, sitemap_xml = nearest,,") == {"get_blog": "primary", "sitemap_xml": "nearest"}
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        ReadRouter("secondaryOnly")
+
+def test_primary_until_a_staleness_window_has_passed_since_startup(clock):
+    router = ReadRouter("secondaryPreferred", max_staleness=90)
+    assert router.preference("get_blog", ["blog"]) is None
+    clock[0] += 90.5
+    preference = router.preference("get_blog", ["blog"])
+    assert isinstance(preference, SecondaryPreferred)
+    assert preference.max_staleness == 90
+
+def test_route_overrides(clock):
+    router = ReadRouter("secondaryPreferred", max_staleness=120, routes="get_blog=primary,sitemap_xml=nearest")
+    clock[0] += 121
+    assert router.preference("get_blog") is None
+    assert isinstance(router.preference("sitemap_xml"), Nearest)
+    assert router.preference("sitemap_xml").max_staleness == 120
+    assert isinstance(router.preference("get_seo_settings"), SecondaryPreferred)
+
+def test_recent_writes_send_their_namespaces_to_the_primary(clock):
+    cache = LocalCache()
+    bus = InvalidationBus(None, cache, mode="off")
+    router = ReadRouter("secondaryPreferred", max_staleness=90)
+    bus.add_listener(router.note_write)
+    clock[0] += 100
+
+    bus._apply("blog", "azure-migration")
+    assert router.collection(FakeDb(), "blogs", "get_blog", ["blog"]) == ("primary", "blogs")
+    preference, name = router.collection(FakeDb(), "seo_settings", "get_seo_settings", ["seo"])
+    assert isinstance(preference, SecondaryPreferred) and name == "seo_settings"
+
+    clock[0] += 91
+    assert isinstance(router.collection(FakeDb(), "blogs", "get_blog", ["blog"])[0], SecondaryPreferred)
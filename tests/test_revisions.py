@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+import revisions
+from revisions import RevisionStore, diff_content, patch_content, tokenize
+
+def test_tokenize_round_trips():
+    for text in ["", "  x  ", "a < b", "<p>x<", "<p class='a'>Hello,  world</p>\n"]:
+        assert "".join(tokenize(text)) == text
+
+def test_content_delta_round_trips_random_edits():
+    rng = random.Random(7)
+    base = tokenize("<h2>Intro</h2><p>" + " ".join(f"word{i}" for i in range(200)) + "</p>")
+    for _ in range(100):
+        old, new = list(base), list(base)
+        for tokens in (old, new):
+            for _ in range(rng.randint(0, 4)):
+                start = rng.randrange(len(tokens))
+                tokens[start:start + rng.randint(0, 15)] = rng.sample(base, rng.randint(0, 8))
+        old_text, new_text = "".join(old), "".join(new)
+        assert patch_content(new_text, diff_content(old_text, new_text)) == old_text
+
+def version(n):
+    return {
+        "id": "blog-1", "slug": "post", "title": f"Title {n % 3}", "excerpt": "e",
+        "content": f"<p>Shared opening.</p><p>Edit number {n}.</p>" + "<p>tail</p>" * (n % 4),
+        "keywords": "k", "meta_description": "m", "author": "a", "published": n % 2 == 0,
+        "featured_image": None,
+    }
+
+@pytest.mark.anyio
+async def test_every_revision_rebuilds_across_full_boundaries(mock_db):
+    store = RevisionStore(full_every=4)
+    await store.start(mock_db)
+    edits = 11
+    for n in range(1, edits + 1):
+        await store.record(n, version(n - 1), version(n))
+    current = {**version(edits), "revision": edits}
+    kinds = {doc["revision"]: doc["kind"] for doc in await store.list(current)}
+    assert [r for r, kind in kinds.items() if kind == "full"] == [8, 4]
+    for n in range(1, edits + 1):
+        rebuilt = await store.reconstruct(current, n)
+        assert rebuilt == revisions.snapshot_fields(version(n - 1)), n
+
+@pytest.mark.anyio
+async def test_reconstruct_rejects_out_of_range_and_broken_chains(mock_db):
+    store = RevisionStore(full_every=10)
+    await store.start(mock_db)
+    for n in range(1, 4):
+        await store.record(n, version(n - 1), version(n))
+    current = {**version(3), "revision": 3}
+    assert await store.reconstruct(current, 0) is None
+    assert await store.reconstruct(current, 4) is None
+    await mock_db.blog_revisions.delete_one({"revision": 2})
+    assert await store.reconstruct(current, 1) is None
+    assert await store.reconstruct(current, 3) is not None
+
+def blog_payload(**fields):
+    return {
+        "slug": "post", "title": "First", "excerpt": "e", "content": "<p>one</p>",
+        "keywords": "k", "meta_description": "m", **fields,
+    }
+
+def test_restore_is_recorded_as_an_edit(api):
+    client, headers = api
+    assert client.post("/api/blogs", json=blog_payload(), headers=headers).status_code == 200
+    for title, content in [("Second", "<p>two</p>"), ("Third", "<p>three</p>")]:
+        response = client.put("/api/blogs/post", json={"title": title, "content": content}, headers=headers)
+        assert response.status_code == 200
+    assert response.json()["revision"] == 2
+
+    listed = client.get("/api/blogs/post/revisions", headers=headers).json()
+    assert [r["revision"] for r in listed] == [2, 1]
+    assert client.get("/api/blogs/post/revisions/1", headers=headers).json()["title"] == "First"
+
+    restored = client.post("/api/blogs/post/revisions/1/restore", headers=headers)
+    assert restored.status_code == 200
+    assert restored.json()["title"] == "First"
+    assert restored.json()["content"] == "<p>one</p>"
+    # The restore itself is revision 3, holding the version it replaced
+    assert restored.json()["revision"] == 3
+    assert client.get("/api/blogs/post/revisions/3", headers=headers).json()["title"] == "Third"
+    assert client.get("/api/blogs/post", headers=headers).json()["title"] == "First"
+
+def test_stale_edit_conflicts(api):
+    client, headers = api
+    client.post("/api/blogs", json=blog_payload(), headers=headers)
+    import server
+
+    existing = client.portal.call(server.db.blogs.find_one, {"slug": "post"}, {"_id": 0})
+    client.put("/api/blogs/post", json={"title": "Newer"}, headers=headers)
+    with pytest.raises(Exception) as error:
+        client.portal.call(server.save_blog_update, existing, {"title": "Stale"}, {"email": "x"})
+    assert getattr(error.value, "status_code", None) == 409
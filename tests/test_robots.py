@@ -0,0 +1,72 @@
+import server
+
+def publish(client, headers, content):
+    response = client.put("/api/robots-txt", json={"content": content}, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+def test_publish_stores_versions_and_serves_the_latest(api):
+    client, headers = api
+    assert publish(client, headers, "User-agent: *\nAllow: /")["version"] == 1
+    assert publish(client, headers, "User-agent: *\nDisallow: /admin/")["version"] == 2
+
+    response = client.get("/robots.txt")
+    assert response.status_code == 200
+    assert response.text == "User-agent: *\nDisallow: /admin/"
+    assert response.headers["etag"].startswith('"2-')
+    assert "last-modified" in response.headers
+    assert client.get("/api/robots-txt").json() == {"content": "User-agent: *\nDisallow: /admin/", "version": 2}
+
+    versions = client.get("/api/robots-txt/versions", headers=headers).json()
+    assert [v["version"] for v in versions] == [2, 1]
+    pointer = client.portal.call(server.db.site_pointers.find_one, {"_id": server.ROBOTS_POINTER_ID})
+    assert pointer["active_version"] == pointer["last_version"] == 2
+
+def test_other_workers_load_the_active_version(api):
+    client, headers = api
+    publish(client, headers, "one")
+    publish(client, headers, "two")
+    # What a worker that did not handle the update sees after the invalidation
+    server.cache.clear()
+    assert client.get("/robots.txt").text == "two"
+
+def test_rollback_publishes_the_old_content_as_a_new_version(api):
+    client, headers = api
+    publish(client, headers, "one")
+    publish(client, headers, "two")
+    etag_two = client.get("/robots.txt").headers["etag"]
+
+    restored = client.post("/api/robots-txt/versions/1/restore", headers=headers)
+    assert restored.status_code == 200
+    assert restored.json()["version"] == 3 and restored.json()["content"] == "one"
+
+    response = client.get("/robots.txt")
+    assert response.text == "one"
+    assert response.headers["etag"].startswith('"3-') and response.headers["etag"] != etag_two
+    server.cache.clear()
+    assert client.get("/robots.txt").text == "one"
+
+    assert client.post("/api/robots-txt/versions/99/restore", headers=headers).status_code == 404
+    assert client.post("/api/robots-txt/versions/1/restore").status_code in (401, 403)
+
+def test_matching_etag_is_not_modified(api):
+    client, headers = api
+    publish(client, headers, "User-agent: *\nAllow: /")
+    etag = client.get("/robots.txt").headers["etag"]
+
+    response = client.get("/robots.txt", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert client.get("/robots.txt", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+
+def test_stale_etag_gets_the_new_content(api):
+    client, headers = api
+    publish(client, headers, "old")
+    stale = client.get("/robots.txt").headers["etag"]
+    publish(client, headers, "new")
+
+    response = client.get("/robots.txt", headers={"If-None-Match": stale})
+    assert response.status_code == 200
+    assert response.text == "new"
+    assert response.headers["etag"] != stale
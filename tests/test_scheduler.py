@@ -0,0 +1,130 @@
+import asyncio
+import heapq
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from scheduler import PublishScheduler, resolve_schedule, to_utc
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+def test_naive_times_are_utc():
+    assert to_utc(datetime(2026, 3, 1, 12, 0)) == NOW
+    ist = timezone(timedelta(hours=5, minutes=30))
+    assert to_utc(datetime(2026, 3, 1, 17, 30, tzinfo=ist)) == NOW
+
+def test_future_publish_at_holds_back_published():
+    fields = resolve_schedule({"published": True, "publish_at": NOW + timedelta(hours=1)}, NOW)
+    assert fields["published"] is False
+    assert fields["publish_at"] == NOW + timedelta(hours=1)
+
+def test_due_times_apply_immediately():
+    assert resolve_schedule({"publish_at": NOW - timedelta(seconds=1)}, NOW) == {"published": True, "publish_at": None}
+    assert resolve_schedule({"unpublish_at": NOW}, NOW) == {"published": False, "unpublish_at": None}
+
+@pytest.mark.anyio
+async def test_heap_orders_both_kinds_by_due_time(mock_db):
+    times = {
+        "c": ("publish_at", NOW + timedelta(minutes=3)),
+        "a": ("unpublish_at", NOW + timedelta(minutes=1)),
+        "d": ("unpublish_at", NOW + timedelta(minutes=4)),
+        "b": ("publish_at", NOW + timedelta(minutes=2)),
+    }
+    await mock_db.blogs.insert_many([
+        {"slug": slug, field: due.isoformat()} for slug, (field, due) in times.items()
+    ] + [{"slug": "unscheduled", "publish_at": None}])
+    scheduler = PublishScheduler(None)
+    scheduler.db = mock_db
+    await scheduler.load()
+    assert scheduler.next_due() == NOW + timedelta(minutes=1)
+    order = [heapq.heappop(scheduler._heap)[1:3] for _ in range(len(scheduler._heap))]
+    assert order == [("a", "unpublish_at"), ("b", "publish_at"), ("c", "publish_at"), ("d", "unpublish_at")]
+
+@pytest.mark.anyio
+async def test_run_due_applies_only_due_transitions_in_order(mock_db):
+    applied = []
+
+    async def apply(slug, field, due):
+        applied.append(slug)
+        return True
+
+    await mock_db.blogs.insert_many([
+        {"slug": "later", "publish_at": (NOW + timedelta(minutes=5)).isoformat()},
+        {"slug": "second", "publish_at": (NOW - timedelta(minutes=1)).isoformat()},
+        {"slug": "first", "unpublish_at": (NOW - timedelta(minutes=2)).isoformat()},
+    ])
+    scheduler = PublishScheduler(apply)
+    scheduler.db = mock_db
+    await scheduler.load()
+    assert await scheduler.run_due(NOW) == 2
+    assert applied == ["first", "second"]
+    assert scheduler.next_due() == NOW + timedelta(minutes=5)
+
+@pytest.mark.anyio
+async def test_failed_transition_is_retried_after_a_backoff():
+    attempts = []
+
+    async def apply(slug, field, due):
+        attempts.append(slug)
+        if slug == "flaky" and attempts.count("flaky") == 1:
+            raise RuntimeError("primary stepped down")
+        return True
+
+    scheduler = PublishScheduler(apply, retry=30)
+    scheduler._heap = [(NOW - timedelta(minutes=2), "flaky", "publish_at", "x"),
+                       (NOW - timedelta(minutes=1), "other", "publish_at", "y")]
+    heapq.heapify(scheduler._heap)
+    assert await scheduler.run_due(NOW) == 1
+    assert attempts == ["flaky", "other"]
+    assert scheduler.next_due() == NOW + timedelta(seconds=30)
+
+    assert await scheduler.run_due(NOW + timedelta(seconds=29)) == 0
+    assert await scheduler.run_due(NOW + timedelta(seconds=30)) == 1
+    assert attempts == ["flaky", "other", "flaky"]
+    assert scheduler.next_due() is None
+
+def blog_payload(**fields):
+    return {
+        "slug": "post", "title": "T", "excerpt": "e", "content": "<p>x</p>",
+        "keywords": "k", "meta_description": "m", **fields,
+    }
+
+def test_null_cancels_a_scheduled_publish(api):
+    client, headers = api
+    publish_at = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+    created = client.post("/api/blogs", json=blog_payload(publish_at=publish_at), headers=headers).json()
+    assert created["published"] is False
+    assert created["publish_at"] is not None
+
+    # Leaving the field out keeps the schedule; an explicit null cancels it
+    kept = client.put("/api/blogs/post", json={"title": "T2"}, headers=headers).json()
+    assert kept["publish_at"] is not None
+    cancelled = client.put("/api/blogs/post", json={"publish_at": None}, headers=headers).json()
+    assert cancelled["publish_at"] is None
+    assert cancelled["published"] is False
+
+    import server
+
+    client.portal.call(server.publish_scheduler.load)
+    assert server.publish_scheduler.next_due() is None
+
+def test_only_one_worker_applies_a_due_transition(api):
+    client, headers = api
+    import server
+
+    publish_at = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+    client.post("/api/blogs", json=blog_payload(publish_at=publish_at), headers=headers)
+    stored = client.portal.call(server.db.blogs.find_one, {"slug": "post"}, {"_id": 0})
+
+    async def every_worker_fires():
+        return await asyncio.gather(*(
+            server.apply_scheduled_transition("post", "publish_at", stored["publish_at"]) for _ in range(5)
+        ))
+
+    results = client.portal.call(every_worker_fires)
+    assert results.count(True) == 1
+    blog = client.get("/api/blogs/post").json()
+    assert blog["published"] is True
+    assert blog["publish_at"] is None
+    revisions = client.get("/api/blogs/post/revisions", headers=headers).json()
+    assert [(r["revision"], r["created_by"]) for r in revisions] == [(1, "scheduler")]
@@ -0,0 +1,85 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from slow_queries import SlowQueryLog, query_shape
+
+def event(name, command=None, request_id=1, duration_ms=0.0):
+    return SimpleNamespace(command_name=name, command=command or {}, connection_id=("db", 1), request_id=request_id,
+                           database_name="test_database", duration_micros=int(duration_ms * 1000))
+
+def run(log, name, command, duration_ms, request_id=1, failed=False):
+    log.started(event(name, command, request_id))
+    finish = log.failed if failed else log.succeeded
+    finish(event(name, request_id=request_id, duration_ms=duration_ms))
+
+def queued(log):
+    items = []
+    while not log._queue.empty():
+        items.append(log._queue.get_nowait())
+    return items
+
+def test_query_shape_hides_values():
+    assert query_shape({"slug": "a", "published": True, "tags": {"$in": ["x", "y"]}}) == {
+        "slug": "<str>", "published": "<bool>", "tags": {"$in": ["?"]},
+    }
+    assert query_shape([{"$match": {"n": 1}}, {"$limit": 5}]) == [{"$match": {"n": "<int>"}}, {"$limit": "<int>"}]
+
+def test_only_commands_over_the_threshold_are_queued():
+    log = SlowQueryLog(threshold_ms=50)
+    run(log, "find", {"find": "blogs", "filter": {"slug": "fast"}}, 49.9, request_id=1)
+    run(log, "find", {"find": "blogs", "filter": {"slug": "slow"}}, 50, request_id=2)
+    run(log, "update", {"update": "blogs", "updates": [{"q": {"slug": "x"}}]}, 120, request_id=3, failed=True)
+    items = queued(log)
+    assert [(collection, name, round(ms), failed) for _, collection, name, _, ms, failed in items] == [
+        ("blogs", "find", 50, False),
+        ("blogs", "update", 120, True),
+    ]
+    assert items[0][3]["filter"] == {"slug": "slow"}
+    assert not log._pending
+
+def test_ignored_commands_and_its_own_writes_are_skipped():
+    log = SlowQueryLog(threshold_ms=0)
+    run(log, "getMore", {"getMore": 1, "collection": "blogs"}, 500, request_id=1)
+    run(log, "update", {"update": "slow_queries", "updates": [{"q": {}}]}, 500, request_id=2)
+    assert queued(log) == []
+
+@pytest.mark.anyio
+async def test_slow_queries_are_aggregated_by_shape(mock_db):
+    log = SlowQueryLog(threshold_ms=10, explain=False)
+    log.db = mock_db
+    for i, ms in enumerate((15.0, 40.0)):
+        run(log, "find", {"find": "blogs", "filter": {"slug": f"post-{i}"}, "sort": {"created_at": -1}}, ms, request_id=i)
+    run(log, "find", {"find": "blogs", "filter": {"published": True}}, 20.0, request_id=9)
+    run(log, "find", {"find": "blogs", "filter": {"tags": {"$in": ["a"]}}}, 20.0, request_id=10)
+    for item in queued(log):
+        await log._record(*item)
+
+    docs = {json.loads(doc["shape"]).popitem()[0]: doc async for doc in mock_db.slow_queries.find({}, {"_id": 0})}
+    by_slug = docs["slug"]
+    assert json.loads(by_slug["shape"]) == {"slug": "<str>"} and json.loads(by_slug["sort"]) == {"created_at": "<int>"}
+    assert by_slug["count"] == 2 and by_slug["max_ms"] == 40.0 and by_slug["last_ms"] == 40.0
+    assert by_slug["total_ms"] == 55.0 and by_slug["failures"] == 0
+    assert docs["published"]["count"] == 1 and docs["published"]["sort"] is None
+    # Operator keys only ever appear inside the JSON string
+    assert json.loads(docs["tags"]["shape"]) == {"tags": {"$in": ["?"]}}
+
+@pytest.mark.anyio
+async def test_drain_wakes_when_a_driver_thread_queues_a_slow_query(mock_db):
+    log = SlowQueryLog(threshold_ms=10, explain=False)
+    recorded = asyncio.Event()
+
+    async def record(*item):
+        recorded.set()
+
+    log._record = record
+    await log.start(mock_db)
+    try:
+        await asyncio.sleep(0)
+        # Listener callbacks arrive on driver threads
+        await asyncio.to_thread(run, log, "find", {"find": "blogs", "filter": {}}, 50.0)
+        await asyncio.wait_for(recorded.wait(), timeout=0.2)
+    finally:
+        await log.stop()
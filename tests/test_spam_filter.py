@@ -0,0 +1,147 @@
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import spam_filter
+from spam_filter import ContactScreen, bands, distance, normalize, simhash
+
+NOW = datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+IP = "203.0.113.5"
+MESSAGE = ("Hello, we are looking for help migrating our analytics platform to Azure "
+           "and would like a quote for the work and a call next week")
+
+def unrelated_message():
+    return " ".join(uuid.uuid4().hex[i:i + 6] for i in range(0, 30, 6))
+
+async def submit(screen, collection, message, email="a@example.com", ip=IP, now=NOW):
+    verdict = await screen.screen(collection, message, email, ip, now)
+    submission_id = str(uuid.uuid4())
+    screen.remember(verdict, submission_id)
+    await collection.insert_one({
+        "id": submission_id, "email": email, "ip": ip, "submitted_at": now.isoformat(),
+        "fingerprint": verdict["fingerprint"], "fingerprint_bands": verdict["fingerprint_bands"],
+    })
+    return verdict, submission_id
+
+def test_distance_counts_differing_bits():
+    assert distance(0, 0) == 0
+    assert distance(0b1011, 0b0001) == 2
+    assert distance(0, (1 << 64) - 1) == 64
+
+def test_near_duplicates_hash_close_and_unrelated_far():
+    base = simhash(normalize(MESSAGE))
+    edited = simhash(normalize(MESSAGE.replace("next week", "this week")))
+    relinked = simhash(normalize(MESSAGE + " https://one.example/a"))
+    rotated = simhash(normalize(MESSAGE + " https://two.example/b"))
+    assert distance(base, edited) <= spam_filter.SIMHASH_MAX_DISTANCE
+    assert distance(relinked, rotated) <= spam_filter.SIMHASH_MAX_DISTANCE
+    for _ in range(20):
+        other = simhash(normalize(unrelated_message()))
+        assert distance(base, other) > spam_filter.SIMHASH_MAX_DISTANCE
+
+def test_hashes_within_indexed_distance_share_a_band():
+    rng = random.Random(7)
+    for _ in range(200):
+        a = rng.getrandbits(64)
+        b = a
+        for bit in rng.sample(range(64), spam_filter.MAX_INDEXED_DISTANCE):
+            b ^= 1 << bit
+        assert set(bands(a)) & set(bands(b))
+
+@pytest.mark.anyio
+async def test_stored_duplicate_found_by_band_lookup(mock_db):
+    collection = mock_db.contact_submissions
+    first, first_id = await submit(ContactScreen(), collection, MESSAGE)
+    assert first["flags"] == [] and first["duplicate_of"] is None
+
+    # A new screen has an empty memory, so this match comes from MongoDB
+    again = await ContactScreen().screen(collection, MESSAGE.replace("Azure", "AWS"), "c@example.com", IP, NOW)
+    assert again["flags"] == ["duplicate"]
+    assert again["duplicate_of"] == first_id
+
+@pytest.mark.anyio
+async def test_colleagues_sharing_a_domain_and_network_are_not_duplicates(mock_db):
+    screen, collection = ContactScreen(), mock_db.contact_submissions
+    messages = [
+        # Within 7 bits of each other once the shared domain and /24 were hashed in
+        "Pricing please",
+        "Send pricing",
+        "We need help with Power BI dashboards for our finance team this quarter",
+        "Looking for a partner to run our Microsoft 365 rollout across three offices",
+    ]
+    for i, message in enumerate(messages):
+        verdict, _ = await submit(screen, collection, message, email=f"person{i}@acme.example", ip=f"203.0.113.{i + 4}")
+        assert verdict["flags"] == [] and verdict["duplicate_of"] is None
+
+@pytest.mark.anyio
+async def test_short_messages_are_never_duplicates(mock_db):
+    screen, collection = ContactScreen(min_duplicate_words=8), mock_db.contact_submissions
+    for i in range(2):
+        verdict, _ = await submit(screen, collection, "Please call me back", email=f"p{i}@example.com")
+        assert verdict["duplicate_of"] is None
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("links,flagged", [(2, False), (3, True)])
+async def test_link_count_flag(mock_db, links, flagged):
+    message = "See " + " and ".join(f"https://site{i}.example/page" for i in range(links))
+    verdict = await ContactScreen(max_links=3).screen(mock_db.contact_submissions, message, "a@example.com", None, NOW)
+    assert ("links" in verdict["flags"]) is flagged
+
+@pytest.mark.anyio
+async def test_memory_entries_expire_after_the_window(mock_db, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(spam_filter.time, "monotonic", lambda: clock[0])
+    screen = ContactScreen(window_hours=1)
+    _, first_id = await submit(screen, mock_db.contact_submissions, MESSAGE)
+    await mock_db.contact_submissions.delete_many({})
+
+    clock[0] += 3599
+    verdict = await screen.screen(mock_db.contact_submissions, MESSAGE, "a@example.com", IP, NOW)
+    assert verdict["duplicate_of"] == first_id
+
+    clock[0] += 2
+    verdict = await screen.screen(mock_db.contact_submissions, MESSAGE, "a@example.com", IP, NOW)
+    assert verdict["flags"] == []
+    assert not screen._recent
+
+@pytest.mark.anyio
+async def test_stored_submissions_expire_after_the_window(mock_db):
+    collection = mock_db.contact_submissions
+    _, first_id = await submit(ContactScreen(window_hours=1), collection, MESSAGE)
+
+    # Fresh screens, so only the stored fingerprint can match
+    inside = await ContactScreen(window_hours=1).screen(
+        collection, MESSAGE, "a@example.com", IP, NOW + timedelta(minutes=59))
+    outside = await ContactScreen(window_hours=1).screen(
+        collection, MESSAGE, "a@example.com", IP, NOW + timedelta(minutes=61))
+    assert inside["duplicate_of"] == first_id
+    assert outside["flags"] == [] and outside["duplicate_of"] is None
+
+@pytest.mark.anyio
+async def test_rate_limit_per_email(mock_db):
+    screen, collection = ContactScreen(max_per_sender=3), mock_db.contact_submissions
+    for i in range(3):
+        verdict, _ = await submit(screen, collection, unrelated_message(), ip=f"198.51.100.{i}")
+        assert verdict["flags"] == []
+    verdict, _ = await submit(screen, collection, unrelated_message(), ip="198.51.100.99")
+    assert verdict["flags"] == ["rate"]
+
+    # Older submissions fall out of the window
+    later = NOW + timedelta(hours=spam_filter.SPAM_WINDOW_HOURS, minutes=1)
+    verdict, _ = await submit(screen, collection, unrelated_message(), now=later)
+    assert verdict["flags"] == []
+
+@pytest.mark.anyio
+async def test_rate_limit_is_shared_by_one_ip(mock_db):
+    # Everyone behind one address (an office NAT, a proxy) shares its limit
+    screen, collection = ContactScreen(max_per_sender=3), mock_db.contact_submissions
+    flags = []
+    for i in range(4):
+        verdict, _ = await submit(screen, collection, unrelated_message(), email=f"person{i}@example.com")
+        flags.append(verdict["flags"])
+    assert flags == [[], [], [], ["rate"]]
+
+    verdict, _ = await submit(screen, collection, unrelated_message(), email="other@example.com", ip="192.0.2.1")
+    assert verdict["flags"] == []
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import timing
+
+def test_phase_excludes_db_time_inside_it():
+    timings = timing.RequestTimings()
+    token = timing._current.set(timings)
+    try:
+        with timing.phase("auth"):
+            time.sleep(0.02)
+            # What MongoTimingListener records for a lookup inside the phase
+            timings.add("db", 0.015)
+    finally:
+        timing._current.reset(token)
+    assert timings.total("db") == 0.015
+    assert 0.0 <= timings.total("auth") < 0.015
+
+def test_phase_without_request_is_a_no_op():
+    with timing.phase("auth"):
+        pass
+    assert timing.current() is None
+
+def test_header_lists_phases_and_call_counts():
+    timings = timing.RequestTimings()
+    timings.add("db", 0.001)
+    timings.add("db", 0.002)
+    header = timings.header()
+    assert 'db;dur=3.0;desc="2 calls"' in header
+    assert header.split(", ")[-1].startswith("app;dur=")
+
+@pytest.mark.anyio
+async def test_concurrent_requests_get_their_own_timings():
+    both_started = asyncio.Barrier(2)
+
+    async def app(scope, receive, send):
+        name = scope["path"].strip("/")
+        with timing.phase(name):
+            await both_started.wait()
+        timing.current().add("db", 0.001)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = timing.ServerTimingMiddleware(app, allow_origins=["https://techresona.com"])
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url="http://test") as client:
+        first, second = await asyncio.gather(client.get("/first"), client.get("/second"))
+    for response, own, other in ((first, "first", "second"), (second, "second", "first")):
+        header = response.headers["server-timing"]
+        assert f"{own};dur=" in header and other not in header
+        assert "db;dur=1.0" in header and "calls" not in header
+        assert response.headers["timing-allow-origin"] == "https://techresona.com"
+    assert timing.current() is None
+
+def test_api_responses_carry_server_timing(api):
+    client, headers = api
+    public = client.get("/api/blogs").headers["server-timing"]
+    assert "serialize;dur=" in public and public.split(", ")[-1].startswith("app;dur=")
+    assert "auth" not in public
+    admin = client.get("/api/contact/submissions", headers=headers).headers["server-timing"]
+    assert "auth;dur=" in admin
+    assert client.get("/metrics").headers["server-timing"].startswith("serialize;dur=")